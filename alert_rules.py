@@ -0,0 +1,450 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+ALERT_THRESHOLD = int(os.environ.get('ALERT_THRESHOLD', 70))
+# Optional JSON list of rule specs (same format as DEFAULT_RULES) replacing the defaults
+ALERT_RULES_PATH = os.environ.get('ALERT_RULES_PATH', os.path.join('data', 'alert_rules.json'))
+ALERT_COOLDOWN = 15 * 60       # seconds before a cleared alert may fire again
+RECENT_SECONDS = 60 * 60       # crossing alerts stay listed this long
+MARKET = 'MARKET'
+SEVERITY_ORDER = {'red': 0, 'orange': 1, 'yellow': 2}
+
+# Signals per key: MARKET has the composite ``score``, the five family scores and
+# every risk input; universe tickers have their family scores, ``overall`` and inputs;
+# quoted symbols have ``price`` and ``change_pct``
+DEFAULT_RULES = [
+    {'name': 'High Risk', 'signal': 'score', 'above': ALERT_THRESHOLD, 'severity': 'red',
+     'message': 'Risk score exceeded {level}'},
+    {'name': 'Options', 'severity': 'yellow', 'message': 'IV low ({iv_level:.0%}) while prices run up {price_change:+.0%}',
+     'all': [{'signal': 'iv_level', 'below': 0.2}, {'signal': 'price_change', 'above': 0.2}]},
+    {'name': 'Regime Change', 'signal': 'score', 'crosses_above': 55, 'severity': 'orange',
+     'message': 'Risk score crossed {level} ({score:.0f})'},
+    {'name': 'Risk Spike', 'signal': 'score', 'rises_by': 10, 'periods': 3, 'severity': 'orange',
+     'message': 'Risk score up {change:+.0f} pts in {periods} updates'},
+    {'name': 'Credit Stress', 'severity': 'orange', 'message': 'Credit spreads widening with narrow breadth',
+     'all': [{'signal': 'credit_spreads', 'above': 2.5}, {'signal': 'breadth', 'below': 0.3}]},
+    {'name': 'Ticker Risk', 'scope': 'universe', 'signal': 'overall', 'crosses_above': 50, 'severity': 'yellow',
+     'message': '{key} risk score crossed {level}'}
+]
+
+
+class Threshold:
+    """True while ``signal`` is above (or below) ``level``"""
+    edge = False
+
+    def __init__(self, signal, level, above=True):
+        self.signals = (signal,)
+        self.signal = signal
+        self.level = level
+        self.above = above
+
+    @property
+    def group(self):
+        return (Threshold, self.signal, self.above)
+
+    @property
+    def parameter(self):
+        return self.level
+
+    def test_many(self, levels, engine, rows):
+        """(condition x row) results for thresholds like this one at each of ``levels`` (a column)"""
+        values = engine.values[rows, engine.columns[self.signal]]
+        # NaN (no value yet) compares False either way
+        return values > levels if self.above else values < levels
+
+    def test(self, engine, rows):
+        return self.test_many(np.array([[self.parameter]]), engine, rows)[0]
+
+
+class Crossing:
+    """True on the update where ``signal`` crosses ``level``"""
+    edge = True
+
+    def __init__(self, signal, level, upward=True):
+        self.signals = (signal,)
+        self.signal = signal
+        self.level = level
+        self.upward = upward
+
+    @property
+    def group(self):
+        return (Crossing, self.signal, self.upward)
+
+    @property
+    def parameter(self):
+        return self.level
+
+    def test_many(self, levels, engine, rows):
+        column = engine.columns[self.signal]
+        before, values = engine.previous[rows, column], engine.values[rows, column]
+        # Only a change in this signal can cross; another signal changing must not re-fire it
+        fresh = engine.changed_at[rows, column] == engine.tick
+        if self.upward:
+            return fresh & (before <= levels) & (values > levels)
+        return fresh & (before >= levels) & (values < levels)
+
+    def test(self, engine, rows):
+        return self.test_many(np.array([[self.parameter]]), engine, rows)[0]
+
+
+class RateOfChange:
+    """True while ``signal`` has moved by ``change`` or more over its last ``periods`` updates"""
+    edge = False
+
+    def __init__(self, signal, change, periods):
+        self.signals = (signal,)
+        self.signal = signal
+        self.change = change
+        self.periods = periods
+
+    @property
+    def group(self):
+        return (RateOfChange, self.signal, self.periods, self.change > 0)
+
+    @property
+    def parameter(self):
+        return self.change
+
+    def moved(self, engine, rows):
+        slot = engine.history_slots[self.signal]
+        counts = engine.history_counts[rows, slot]
+        size = engine.history.shape[2]
+        latest = engine.history[rows, slot, (counts - 1) % size]
+        earlier = engine.history[rows, slot, (counts - 1 - self.periods) % size]
+        return np.where(counts > self.periods, latest - earlier, np.nan)
+
+    def test_many(self, changes, engine, rows):
+        moved = self.moved(engine, rows)
+        return moved >= changes if self.change > 0 else moved <= changes
+
+    def test(self, engine, rows):
+        return self.test_many(np.array([[self.parameter]]), engine, rows)[0]
+
+
+class AllOf:
+    """True when every condition is"""
+
+    def __init__(self, conditions):
+        self.conditions = conditions
+        self.signals = tuple(dict.fromkeys(signal for condition in conditions for signal in condition.signals))
+        self.edge = any(condition.edge for condition in conditions)
+
+    def test(self, engine, rows):
+        result = self.conditions[0].test(engine, rows)
+        for condition in self.conditions[1:]:
+            result &= condition.test(engine, rows)
+        return result
+
+
+def parse_condition(spec):
+    """Build a condition from its spec dict"""
+    if 'all' in spec:
+        return AllOf([parse_condition(child) for child in spec['all']])
+    signal = spec['signal']
+    if 'above' in spec:
+        return Threshold(signal, spec['above'])
+    if 'below' in spec:
+        return Threshold(signal, spec['below'], above=False)
+    if 'crosses_above' in spec:
+        return Crossing(signal, spec['crosses_above'])
+    if 'crosses_below' in spec:
+        return Crossing(signal, spec['crosses_below'], upward=False)
+    if 'rises_by' in spec:
+        return RateOfChange(signal, abs(spec['rises_by']), spec.get('periods', 1))
+    if 'falls_by' in spec:
+        return RateOfChange(signal, -abs(spec['falls_by']), spec.get('periods', 1))
+    raise ValueError(f"No condition in alert spec: {spec}")
+
+
+class Rule:
+    """A named condition with its severity, message template, scope, debounce and cooldown"""
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        try:
+            self.condition = parse_condition(spec)
+        except (KeyError, ValueError) as error:
+            raise ValueError(f"Invalid alert rule {self.name!r}: {error}") from error
+        self.severity = spec.get('severity', 'yellow')
+        self.message = spec.get('message', self.name)
+        self.scope = spec.get('scope', 'market')
+        self.for_seconds = spec.get('for_seconds', 0)
+        self.cooldown = spec.get('cooldown', ALERT_COOLDOWN)
+        self.level = next((spec[name] for name in ('above', 'below', 'crosses_above', 'crosses_below')
+                           if name in spec), None)
+
+    def conditions(self):
+        return getattr(self.condition, 'conditions', [self.condition])
+
+
+def load_rules(path=ALERT_RULES_PATH):
+    """Rules from ``path`` if it exists, else DEFAULT_RULES"""
+    if os.path.exists(path):
+        with open(path) as handle:
+            specs = json.load(handle)
+    else:
+        specs = DEFAULT_RULES
+    return [Rule(spec) for spec in specs]
+
+
+class AlertEngine:
+    """Evaluates alert rules incrementally against a stream of snapshots.
+
+    Signals arrive as tables (one row per key, one column per signal) and
+    are kept as one (key x signal) array. Each tick compares the new
+    values with it and evaluates only the keys where a signal changed.
+    Conditions of the same kind on the same signal (say, every ``above``
+    on ``pe_ratio``) form a group that is tested as one NumPy comparison
+    of a (condition x key) matrix, whatever the number of rules. Rule
+    state (holding, pending, active, timestamps) is kept as (rule x key)
+    arrays and updated with the same masks. A rule with ``for_seconds``
+    must hold that long before it fires (debounce). An alert fires once
+    while its condition holds, and a cleared alert fires again only after
+    its ``cooldown`` (dedupe).
+    """
+
+    def __init__(self, rules=None, clock=time.time, capacity=64):
+        self.rules = list(load_rules() if rules is None else rules)
+        self.clock = clock
+        signals = dict.fromkeys(signal for rule in self.rules for signal in rule.condition.signals)
+        self.columns = {signal: column for column, signal in enumerate(signals)}
+        periods = {}
+        for rule in self.rules:
+            for condition in rule.conditions():
+                if isinstance(condition, RateOfChange):
+                    periods[condition.signal] = max(periods.get(condition.signal, 0), condition.periods)
+        self.history_slots = {signal: slot for slot, signal in enumerate(periods)}
+        # Column -> ring buffer slot, -1 for signals without a rate-of-change rule
+        self._history_slot_of = np.full(len(signals), -1, dtype=np.int64)
+        for signal, slot in self.history_slots.items():
+            self._history_slot_of[self.columns[signal]] = slot
+        self.keys = []
+        self._index = pd.Index([], dtype=object)
+        self.values = np.full((capacity, len(signals)), np.nan)
+        self.previous = np.full((capacity, len(signals)), np.nan)
+        self.changed_at = np.zeros((capacity, len(signals)), dtype=np.int64)
+        self.history = np.full((capacity, len(periods), max(periods.values(), default=0) + 1), np.nan)
+        self.history_counts = np.zeros((capacity, len(periods)), dtype=np.int64)
+        self._market = np.zeros(capacity, dtype=bool)
+        # Every simple condition in rule order, so each rule's conditions are one contiguous run
+        leaves, starts = [], []
+        for rule in self.rules:
+            starts.append(len(leaves))
+            leaves.extend(rule.conditions())
+        self._leaf_count = len(leaves)
+        self._rule_starts = np.array(starts, dtype=np.int64)
+        grouped = {}
+        for position, leaf in enumerate(leaves):
+            grouped.setdefault(leaf.group, []).append(position)
+        # (first condition, parameters as a column, leaf positions) per group
+        self._groups = [
+            (leaves[positions[0]], np.array([leaves[p].parameter for p in positions], dtype=np.float64)[:, None],
+             np.array(positions))
+            for positions in grouped.values()
+        ]
+        rule_count = len(self.rules)
+        self._reads = np.zeros((rule_count, len(signals)), dtype=np.float32)
+        for position, rule in enumerate(self.rules):
+            self._reads[position, [self.columns[signal] for signal in rule.condition.signals]] = 1
+        self._edge = np.array([rule.condition.edge for rule in self.rules], dtype=bool)
+        self._market_rule = np.array([rule.scope == 'market' for rule in self.rules], dtype=bool)
+        self._for_seconds = np.array([rule.for_seconds for rule in self.rules], dtype=np.float64)
+        self._cooldown = np.array([rule.cooldown for rule in self.rules], dtype=np.float64)
+        # (rule x key) state
+        self._holding = np.zeros((rule_count, capacity), dtype=bool)    # condition currently true
+        self._pending = np.zeros((rule_count, capacity), dtype=bool)    # holding, waiting out for_seconds
+        self._active = np.zeros((rule_count, capacity), dtype=bool)     # fired and not yet cleared
+        self._since = np.full((rule_count, capacity), np.nan)
+        self._last_fired = np.full((rule_count, capacity), np.nan)
+        # Latest crossing alert per (rule, key), oldest first
+        self._recent = {}
+        self.tick = 0
+        self.evaluations = 0
+        self._lock = threading.Lock()
+
+    def _grow(self, needed):
+        capacity = len(self.values)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, fill in (('values', np.nan), ('previous', np.nan), ('changed_at', 0),
+                           ('history', np.nan), ('history_counts', 0), ('_market', False)):
+            array = getattr(self, name)
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+        for name, fill in (('_holding', False), ('_pending', False), ('_active', False),
+                           ('_since', np.nan), ('_last_fired', np.nan)):
+            array = getattr(self, name)
+            grown = np.full((len(array), capacity), fill, dtype=array.dtype)
+            grown[:, :array.shape[1]] = array
+            setattr(self, name, grown)
+
+    def _row_indexer(self, index):
+        rows = self._index.get_indexer(index)
+        new = rows < 0
+        if new.any():
+            added = index[new].unique()
+            self._index = self._index.append(added)
+            self._grow(len(self._index))
+            self._market[len(self.keys):len(self._index)] = added == MARKET
+            self.keys.extend(added)
+            rows = self._index.get_indexer(index)
+        return rows
+
+    def _fold(self, frame):
+        """Write the cells of ``frame`` that changed into the value array, stamped with this tick"""
+        positions = [position for position, column in enumerate(frame.columns) if column in self.columns]
+        if not positions:
+            return
+        rows = self._row_indexer(frame.index)
+        targets = np.array([self.columns[frame.columns[position]] for position in positions])
+        values = frame.to_numpy()[:, positions].astype(np.float64)
+        current = self.values[np.ix_(rows, targets)]
+        changed = (values != current) & ~(np.isnan(values) & np.isnan(current))
+        row_hits, column_hits = np.nonzero(changed)
+        if not len(row_hits):
+            return
+        rows, targets = rows[row_hits], targets[column_hits]
+        self.previous[rows, targets] = self.values[rows, targets]
+        self.values[rows, targets] = values[row_hits, column_hits]
+        self.changed_at[rows, targets] = self.tick
+        slots = self._history_slot_of[targets]
+        tracked = slots >= 0
+        if tracked.any():
+            # Append changed rate-of-change signals to their ring buffers
+            hit_rows, hit_slots = rows[tracked], slots[tracked]
+            counts = self.history_counts[hit_rows, hit_slots]
+            self.history[hit_rows, hit_slots, counts % self.history.shape[2]] = values[row_hits, column_hits][tracked]
+            self.history_counts[hit_rows, hit_slots] = counts + 1
+
+    def evaluate(self, tables, now=None):
+        """Fold new signal tables ({name: DataFrame}) in; returns the alerts that fired"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.tick += 1
+            for frame in tables.values():
+                if frame is not None and not frame.empty:
+                    self._fold(frame)
+            count = len(self.keys)
+            fired = []
+            changed = self.changed_at[:count] == self.tick
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows) and self.rules:
+                # (rule x row): the rule reads a signal that changed at that key, and the key is in its scope
+                relevant = (self._reads @ changed[rows].T.astype(np.float32)) > 0
+                relevant &= self._market_rule[:, None] == self._market[rows][None, :]
+                leaves = np.empty((self._leaf_count, len(rows)), dtype=bool)
+                for first, parameters, positions in self._groups:
+                    leaves[positions] = first.test_many(parameters, self, rows)
+                holds = np.logical_and.reduceat(leaves, self._rule_starts, axis=0)
+                self.evaluations += int(relevant.sum())
+                self._update(rows, holds, relevant, now, fired)
+            debounced = self._pending[:, :count]
+            if debounced.any():
+                # Debounced alerts fire once their condition has held long enough
+                due = debounced & (now - self._since[:, :count] >= self._for_seconds[:, None])
+                rule_hits, key_hits = np.nonzero(due)
+                self._pending[rule_hits, key_hits] = False
+                self._fire(rule_hits, key_hits, now, fired)
+            while self._recent and now - next(iter(self._recent.values()))['since'] > RECENT_SECONDS:
+                del self._recent[next(iter(self._recent))]
+            return fired
+
+    def _update(self, rows, holds, relevant, now, fired):
+        edge = self._edge[:, None]
+        level = relevant & ~edge
+        was = self._holding[:, rows]
+        started, cleared = level & holds & ~was, level & ~holds & was
+        self._holding[:, rows] = np.where(level, holds, was)
+        rule_hits, key_hits = np.nonzero(cleared)
+        self._active[rule_hits, rows[key_hits]] = False
+        self._pending[rule_hits, rows[key_hits]] = False
+        rule_hits, key_hits = np.nonzero(started)
+        self._since[rule_hits, rows[key_hits]] = now
+        waits = self._for_seconds[rule_hits] > 0
+        self._pending[rule_hits[waits], rows[key_hits[waits]]] = True
+        fire = edge & holds & relevant
+        fire[rule_hits[~waits], key_hits[~waits]] = True
+        rule_hits, key_hits = np.nonzero(fire)
+        self._fire(rule_hits, rows[key_hits], now, fired)
+
+    def _fire(self, rule_hits, key_hits, now, fired):
+        if not len(rule_hits):
+            return
+        self._active[rule_hits, key_hits] = True
+        last = self._last_fired[rule_hits, key_hits]
+        ready = np.isnan(last) | (now - last >= self._cooldown[rule_hits])
+        rule_hits, key_hits = rule_hits[ready], key_hits[ready]
+        self._last_fired[rule_hits, key_hits] = now
+        alerts = self._alerts(rule_hits, key_hits, np.full(len(rule_hits), now))
+        fired.extend(alerts)
+        for alert, position, row, edge in zip(alerts, rule_hits.tolist(), key_hits.tolist(), self._edge[rule_hits]):
+            if edge:
+                # A rule firing again at a key replaces its earlier alert and moves it to the end
+                self._recent.pop((position, row), None)
+                self._recent[(position, row)] = alert
+
+    def _alerts(self, rule_hits, key_hits, stamps):
+        """Alert dicts for (rule, key) pairs, built from one gather of their signal values"""
+        names = list(self.columns)
+        values = self.values[key_hits].tolist()
+        changes = np.full(len(rule_hits), np.nan)
+        rates = {}
+        for hit, position in enumerate(rule_hits.tolist()):
+            condition = self.rules[position].condition
+            if isinstance(condition, RateOfChange):
+                rates.setdefault((condition.signal, condition.periods), (condition, []))[1].append(hit)
+        for condition, hits in rates.values():
+            changes[hits] = condition.moved(self, key_hits[hits])
+        alerts = []
+        for position, row, row_values, change, ts in zip(rule_hits.tolist(), key_hits.tolist(), values,
+                                                         changes.tolist(), stamps.tolist()):
+            rule, key = self.rules[position], self.keys[row]
+            fields = dict(zip(names, row_values))
+            if isinstance(rule.condition, RateOfChange):
+                fields.update(change=change, periods=rule.condition.periods)
+            try:
+                message = rule.message.format(key=key, level=rule.level, **fields)
+            except (KeyError, ValueError, TypeError):
+                message = rule.message
+            alerts.append({'type': rule.name, 'message': message, 'severity': rule.severity, 'key': key, 'since': ts})
+        return alerts
+
+    def active(self):
+        """Alerts whose condition holds, plus recent crossings, most severe first"""
+        with self._lock:
+            alerts = list(self._recent.values())
+            rule_hits, key_hits = np.nonzero(self._active[:, :len(self.keys)] & ~self._edge[:, None])
+            alerts += self._alerts(rule_hits, key_hits, self._since[rule_hits, key_hits])
+        return sorted(alerts, key=lambda alert: (SEVERITY_ORDER.get(alert['severity'], 3), -alert['since']))
+
+
+def snapshot_tables(snapshot):
+    """Signal tables for AlertEngine.evaluate from a refresher Snapshot"""
+    tables = {}
+    risk = snapshot.get('risk')
+    if risk is not None:
+        row = {'score': risk['score'], **risk['components']}
+        for family in risk['inputs'].values():
+            row.update(family)
+        tables['market'] = pd.DataFrame([row], index=[MARKET])
+    universe = snapshot.get('universe_risk')
+    if universe is not None:
+        tables['universe_scores'] = universe['scores']
+        tables['universe_inputs'] = universe['inputs']
+    quotes = snapshot.get('quotes')
+    if quotes is not None:
+        ok = quotes[quotes['status'] != 'error']
+        previous = ok['price'] - ok['change']
+        tables['quotes'] = pd.DataFrame({
+            'price': ok['price'],
+            'change_pct': (ok['change'] / previous.where(previous != 0) * 100)
+        })
+    return tables
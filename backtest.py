@@ -0,0 +1,267 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from alert_rules import ALERT_THRESHOLD
+from dashboard_state import REGIME_BOUNDS, REGIME_LABELS
+from risk_calculator import (
+    RISK_INPUT_COLUMNS, RISK_THRESHOLDS, RISK_WEIGHTS, _vector_composite, vector_scorers
+)
+
+# Daily inputs to replay: a date column, an optional symbol column and the RISK_INPUT_COLUMNS columns
+BACKTEST_INPUTS_PATH = os.environ.get('BACKTEST_INPUTS_PATH', os.path.join('data', 'risk_inputs.parquet'))
+CHUNK_DAYS = 252               # days streamed through the scorers at a time
+INPUT_COLUMNS = [column for columns in RISK_INPUT_COLUMNS.values() for column in columns]
+MISSING = -1                   # score/regime code of a day without inputs
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """One weight/threshold setting to replay"""
+    name: str = 'baseline'
+    weights: dict = field(default_factory=lambda: dict(RISK_WEIGHTS))
+    thresholds: dict = field(default_factory=lambda: dict(RISK_THRESHOLDS))
+    alert_threshold: int = ALERT_THRESHOLD
+    regime_bounds: tuple = REGIME_BOUNDS
+
+
+class InputPanel:
+    """Daily risk inputs as a dense (date x symbol x input) array, in chronological order"""
+
+    def __init__(self, frame):
+        if 'symbol' not in frame.columns:
+            frame = frame.assign(symbol='MARKET')
+        frame = frame.assign(date=pd.to_datetime(frame['date']).dt.normalize())
+        # Several rows for one symbol and day (e.g. intraday snapshots): keep the last whole record
+        frame = (frame.drop_duplicates(['date', 'symbol'], keep='last')
+                 .set_index(['date', 'symbol']).sort_index())
+        self.dates = frame.index.levels[0]
+        self.symbols = frame.index.levels[1]
+        full = pd.MultiIndex.from_product([self.dates, self.symbols], names=['date', 'symbol'])
+        present = pd.Series(True, index=frame.index).reindex(full, fill_value=False)
+        # Absent columns count as 0, as in the scalar methods; NaN inputs stay NaN, so their rules do not fire
+        values = frame.reindex(columns=INPUT_COLUMNS, fill_value=0.0).reindex(index=full)
+        shape = (len(self.dates), len(self.symbols))
+        self.present = present.to_numpy().reshape(shape)
+        self.values = values.to_numpy(dtype=np.float64, na_value=np.nan).reshape(shape + (len(INPUT_COLUMNS),))
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def load_inputs(path=BACKTEST_INPUTS_PATH):
+    """Read daily inputs from Parquet or CSV"""
+    if path.endswith('.parquet'):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    missing = [column for column in ['date'] + INPUT_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Backtest inputs {path} have no column for: {', '.join(missing)}")
+    return InputPanel(frame)
+
+
+def history_inputs(store=None, keys=None, start=None, end=None):
+    """Risk inputs recorded by the refresher in the HistoryStore, one row per symbol and day"""
+    from history_store import get_history_store
+
+    store = store or get_history_store()
+    frame = store.query('risk_inputs', keys=keys, start=start, end=end)
+    return InputPanel(frame.rename(columns={'ts': 'date'}))
+
+
+def _batch_key(config):
+    return tuple(sorted(config.thresholds.items()))
+
+
+def _family_codes(values, present, thresholds, chunk_days):
+    """Stream the panel through the family scorers in date order.
+
+    Every family score takes only a few values, so each (date, symbol) is
+    reduced to the index of its distinct five-score combination. Returns
+    (combinations x families scores, date x symbol combination index);
+    days without inputs get index ``len(combinations)``.
+    """
+    days, symbols, _ = values.shape
+    scorers = vector_scorers(thresholds)
+    keys = np.empty((days, symbols), dtype=np.int64)
+    for start in range(0, days, chunk_days):
+        stop = min(start + chunk_days, days)
+        block = values[start:stop].reshape(-1, values.shape[2])
+
+        def col(name):
+            return block[:, INPUT_COLUMNS.index(name)]
+
+        key = np.zeros(len(block), dtype=np.int64)
+        for family, scorer in scorers.items():
+            # Scores are 0-100, so base 101 packs the five of them into one integer
+            key = key * 101 + scorer(col)
+        keys[start:stop] = key.reshape(stop - start, symbols)
+    unique, inverse = np.unique(keys[present], return_inverse=True)
+    codes = np.full((days, symbols), len(unique), dtype=np.int64)
+    codes[present] = inverse.ravel()
+    families = np.empty((len(unique), len(scorers)), dtype=np.int64)
+    for position in range(len(scorers) - 1, -1, -1):
+        unique, families[:, position] = np.divmod(unique, 101)
+    return families, codes
+
+
+def _replay_configs(args):
+    """Replay the panel for ``configs``; returns per-config totals, alert cells and optionally scores"""
+    values, present, configs, chunk_days, keep_series = args
+    groups = {}
+    for position, config in enumerate(configs):
+        groups.setdefault(_batch_key(config), []).append(position)
+    results = [None] * len(configs)
+    for positions in groups.values():
+        # Family scores depend only on the thresholds; every weighting is one extra column
+        families, codes = _family_codes(values, present, configs[positions[0]].thresholds, chunk_days)
+        weights = {family: np.array([configs[position].weights[family] for position in positions])
+                   for family in RISK_WEIGHTS}
+        table = _vector_composite(
+            {family: families[:, [column]] for column, family in enumerate(RISK_WEIGHTS)}, weights
+        )
+        # Extra last row: the score of a day without inputs
+        table = np.vstack([table, np.full((1, len(positions)), MISSING)]).astype(np.int8)
+        counts = np.bincount(codes.ravel(), minlength=len(table))
+        counts[-1] = 0
+        # An alert fires on the day a score rises above the threshold; whether it does
+        # depends only on the previous and current combination, so check each pair once
+        previous = np.vstack([np.full((1, codes.shape[1]), len(table) - 1), codes[:-1]])
+        pairs, pair_index = np.unique(previous * len(table) + codes, return_inverse=True)
+        # Cells grouped by pair, so a config's alerts are gathered without scanning the panel
+        cells = np.argsort(pair_index.ravel(), kind='stable')
+        starts = np.searchsorted(pair_index.ravel()[cells], np.arange(len(pairs) + 1))
+        for column, position in enumerate(positions):
+            config = configs[position]
+            scores = table[:, column]
+            above = scores > config.alert_threshold
+            fires = np.flatnonzero(above[pairs % len(table)] & ~above[pairs // len(table)])
+            lengths = starts[fires + 1] - starts[fires]
+            offsets = np.repeat(starts[fires] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            fired_days, fired_symbols = np.divmod(np.sort(cells[offsets]), codes.shape[1])
+            regimes = np.searchsorted(np.asarray(config.regime_bounds), scores[:-1], side='right')
+            results[position] = {
+                'scores': scores[codes] if keep_series else None,
+                'alerts': np.column_stack([fired_days, fired_symbols, scores[codes[fired_days, fired_symbols]]]),
+                'total': int(counts @ scores.astype(np.int64)),
+                'max': int(scores[:-1][counts[:-1] > 0].max(initial=MISSING)),
+                'regime_counts': np.bincount(regimes, weights=counts[:-1], minlength=len(REGIME_LABELS)).astype(np.int64)
+            }
+    return results
+
+
+def replay(panel, configs=None, workers=0, chunk_days=CHUNK_DAYS, keep_series=True):
+    """Replay ``panel`` under each BacktestConfig, in chronological order.
+
+    Configurations are split across ``workers`` processes (0 runs them in
+    this process); configurations sharing thresholds are scored together.
+    Returns one result per config with alert events and a summary, plus
+    the score series (date x symbol) and regime labels when
+    ``keep_series`` is set. Leave it off for large parameter sweeps.
+    """
+    configs = list(configs or [BacktestConfig()])
+    # Keep configs with the same thresholds in the same batch so their family scores are shared
+    order = sorted(range(len(configs)), key=lambda position: _batch_key(configs[position]))
+    batches = [list(batch) for batch in np.array_split(order, max(1, min(workers, len(configs)))) if len(batch)]
+    jobs = [(panel.values, panel.present, [configs[position] for position in batch], chunk_days, keep_series)
+            for batch in batches]
+    if workers and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_replay_configs, jobs))
+    else:
+        outputs = [_replay_configs(job) for job in jobs]
+    raw = {}
+    for batch, output in zip(batches, outputs):
+        raw.update(zip(batch, output))
+    return [_result(panel, configs[position], raw[position]) for position in range(len(configs))]
+
+
+def _result(panel, config, raw):
+    cells = raw['alerts']
+    # Cells come in (date, symbol) order already
+    alerts = pd.DataFrame({
+        'date': panel.dates[cells[:, 0]],
+        'symbol': panel.symbols[cells[:, 1]],
+        'score': cells[:, 2].astype(int)
+    })
+    counts = raw['regime_counts']
+    scored = int(counts.sum())
+    result = {
+        'config': config,
+        'alerts': alerts,
+        'summary': {
+            'mean_score': raw['total'] / scored if scored else float('nan'),
+            'max_score': raw['max'],
+            'alerts': len(alerts),
+            'first_alert': alerts['date'].iloc[0] if len(alerts) else None,
+            'regime_share': dict(zip(REGIME_LABELS, (counts / max(scored, 1)).tolist()))
+        }
+    }
+    scores = raw['scores']
+    if scores is not None:
+        missing = scores == MISSING
+        codes = np.where(missing, MISSING, np.searchsorted(np.asarray(config.regime_bounds), scores, side='right'))
+        result['scores'] = pd.DataFrame(np.where(missing, np.nan, scores), index=panel.dates, columns=panel.symbols)
+        result['regimes'] = pd.DataFrame({
+            symbol: pd.Categorical.from_codes(codes[:, column], REGIME_LABELS)
+            for column, symbol in enumerate(panel.symbols)
+        }, index=panel.dates)
+    return result
+
+
+def weight_grid(step=0.05, minimum=0.05, **settings):
+    """A BacktestConfig for every weighting of the five families on a ``step`` grid that sums to 1"""
+    units = round(1 / step)
+    low = int(np.ceil(minimum / step - 1e-9))
+    configs = []
+    for a in range(low, units + 1):
+        for b in range(low, units - a + 1):
+            for c in range(low, units - a - b + 1):
+                for d in range(low, units - a - b - c + 1):
+                    e = units - a - b - c - d
+                    if e < low:
+                        continue
+                    weights = dict(zip(RISK_WEIGHTS, (round(part * step, 10) for part in (a, b, c, d, e))))
+                    name = '/'.join(f'{weight:.2f}' for weight in weights.values())
+                    configs.append(BacktestConfig(name=name, weights=weights, **settings))
+    return configs
+
+
+def synthetic_inputs(symbols=('MARKET',), start='1995-01-02', end='2024-12-31', seed=0):
+    """Daily inputs with bubbles peaking in March 2000 and November 2021, for demos and benchmarks"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    years = (dates - dates[0]).days.to_numpy() / 365.25
+    # Froth builds for ~3 years into each peak and unwinds over ~2 years
+    froth = np.zeros(len(dates))
+    for peak in (pd.Timestamp('2000-03-10'), pd.Timestamp('2021-11-19')):
+        offset = (dates - peak).days.to_numpy() / 365.25
+        froth = np.maximum(froth, np.where(offset < 0, np.exp(offset / 1.2), np.exp(-offset / 0.6)))
+    frames = []
+    for symbol in symbols:
+        beta = rng.uniform(0.6, 1.4)
+        level = np.clip(froth * beta + 0.05 * np.sin(years * 2 * np.pi / 4 + rng.uniform(0, 6)), 0, 1.5)
+
+        def noisy(center, swing, scale):
+            return center + swing * level + rng.normal(0, scale, len(dates))
+
+        frames.append(pd.DataFrame({
+            'date': dates,
+            'symbol': symbol,
+            'fcf_margin': noisy(0.08, -0.12, 0.02),
+            'revenue_growth': noisy(0.15, -0.08, 0.03),
+            'price_change': noisy(0.05, 0.35, 0.08),
+            'pe_ratio': noisy(22, 45, 6),
+            'price_to_sales': noisy(6, 20, 3),
+            'credit_spreads': noisy(1.6, 1.2, 0.3),
+            'breadth': noisy(0.55, -0.35, 0.08),
+            'iv_level': noisy(0.22, -0.06, 0.03),
+            'skew': noisy(0.05, 0.08, 0.02),
+            'news_sentiment': noisy(0.55, 0.35, 0.08),
+            'social_sentiment': noisy(0.6, 0.35, 0.08)
+        }))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,283 @@
+import os
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:            # Windows: no cross-process lock, every process writes
+    fcntl = None
+
+BAR_STORE_PATH = os.environ.get('BAR_STORE_PATH', os.path.join('data', 'bars.bin'))
+# Bars kept per symbol: 24 hours at the default 30 s refresh
+BAR_CAPACITY = int(os.environ.get('BAR_CAPACITY', 2880))
+BAR_MAX_SYMBOLS = int(os.environ.get('BAR_MAX_SYMBOLS', 256))
+
+# One fixed-width record per quote: 40 bytes instead of a ~1 kB dict
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'),             # epoch milliseconds
+    ('price', '<f8'),
+    ('change', '<f8'),
+    ('volume', '<i8'),
+    ('market_cap', '<f8')
+])
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('layout', '<u4'),
+    ('record_size', '<u4'),
+    ('capacity', '<i8'),
+    ('max_symbols', '<i8'),
+    ('symbols', '<i8')
+])
+MAGIC = b'AIBBARS1'
+LAYOUT = 1
+SYMBOL_DTYPE = np.dtype('S16')
+PAGE = 4096
+
+
+def _align(offset, boundary=64):
+    return -(-offset // boundary) * boundary
+
+
+def _layout(capacity, max_symbols):
+    """Byte offsets of the symbol table, the counters and the bars, and the file size"""
+    symbols = _align(HEADER_DTYPE.itemsize)
+    counts = _align(symbols + SYMBOL_DTYPE.itemsize * max_symbols)
+    bars = _align(counts + 8 * max_symbols, PAGE)
+    # Each symbol's ring has capacity + 1 slots, and every bar is written twice (slot and slot + ring)
+    size = bars + BAR_DTYPE.itemsize * max_symbols * 2 * (capacity + 1)
+    return symbols, counts, bars, size
+
+
+class BarStore:
+    """Ring buffer of intraday bars per symbol in one memory-mapped file.
+
+    The file holds a header, a fixed table of up to ``max_symbols``
+    symbols, one append counter per symbol and a (symbol x slot) array of
+    BAR_DTYPE records. Appends overwrite the oldest bar in place, so the
+    file never grows. Every bar is stored twice, one ring apart, so the
+    latest ``n`` bars of a symbol are always contiguous and ``window()``
+    returns a view into the mapping rather than a copy.
+
+    One process per file writes: the first to take an exclusive lock on
+    ``<path>.lock``. Any other process (another Streamlit worker on the
+    same host) maps the file read-only and sees appends as they land; it
+    takes over writing once the writer exits and releases the lock.
+    """
+
+    def __init__(self, path=BAR_STORE_PATH, capacity=BAR_CAPACITY, max_symbols=BAR_MAX_SYMBOLS, write=True):
+        self.path = path
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self.writable = False
+        self.appended = 0
+        self._lock_file = None
+        self._mapping = None
+        self._index = {}
+        self._write_lock = threading.Lock()
+        if not (write and self.acquire()):
+            self._open('r')
+
+    def acquire(self):
+        """Become this file's writer if no other process is; returns whether this store can append"""
+        if self.writable:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path + '.lock', 'a+b')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self._lock_file = lock_file
+        if not os.path.exists(self.path):
+            self._create()
+        self._open('r+')
+        self.writable = True
+        return True
+
+    def _create(self):
+        _, _, _, size = _layout(self.capacity, self.max_symbols)
+        partial = self.path + '.tmp'
+        with open(partial, 'wb') as handle:
+            # Sparse on most filesystems: pages are only allocated as bars land in them
+            handle.truncate(size)
+            header = np.zeros(1, HEADER_DTYPE)
+            header[0] = (MAGIC, LAYOUT, BAR_DTYPE.itemsize, self.capacity, self.max_symbols, 0)
+            handle.write(header.tobytes())
+        os.replace(partial, self.path)
+
+    def _open(self, mode):
+        """Map the file; a missing file (no writer yet) leaves the store empty until the next read"""
+        self._mapping = None
+        if not os.path.exists(self.path):
+            return
+        raw = np.memmap(self.path, dtype=np.uint8, mode=mode)
+        header = np.ndarray((), HEADER_DTYPE, buffer=raw)
+        if bytes(header['magic']) != MAGIC or header['layout'] != LAYOUT or header['record_size'] != BAR_DTYPE.itemsize:
+            raise ValueError(f"{self.path} is not a bar store of layout {LAYOUT}")
+        # The file's dimensions win over the arguments, so every process agrees on them
+        self.capacity = int(header['capacity'])
+        self.max_symbols = int(header['max_symbols'])
+        symbols, counts, bars, _ = _layout(self.capacity, self.max_symbols)
+        self._header = header
+        self._symbols = np.ndarray(self.max_symbols, SYMBOL_DTYPE, buffer=raw, offset=symbols)
+        self._counts = np.ndarray(self.max_symbols, '<i8', buffer=raw, offset=counts)
+        self._bars = np.ndarray((self.max_symbols, 2 * (self.capacity + 1)), BAR_DTYPE, buffer=raw, offset=bars)
+        self._mapping = raw
+        self._index = {}
+
+    def _lookup(self, symbol):
+        index = self._index.get(symbol)
+        if index is None:
+            if self._mapping is None:
+                self._open('r')
+                if self._mapping is None:
+                    return None
+            # Symbols registered since the last lookup (by this or the writing process)
+            known = int(self._header['symbols'])
+            for position in range(len(self._index), known):
+                self._index[self._symbols[position].decode()] = position
+            index = self._index.get(symbol)
+        return index
+
+    def _register(self, symbol):
+        index = self._lookup(symbol)
+        if index is None:
+            index = int(self._header['symbols'])
+            if index >= self.max_symbols:
+                raise ValueError(f"Bar store is full ({self.max_symbols} symbols)")
+            encoded = symbol.encode()
+            if len(encoded) > SYMBOL_DTYPE.itemsize:
+                raise ValueError(f"Symbol {symbol!r} is longer than {SYMBOL_DTYPE.itemsize} bytes")
+            self._symbols[index] = encoded
+            self._counts[index] = 0
+            # Published after the name, so readers never see a registered symbol without it
+            self._header['symbols'] = index + 1
+            self._index[symbol] = index
+        return index
+
+    def symbols(self):
+        if self._mapping is None:
+            self._lookup('')
+        if self._mapping is None:
+            return []
+        return [name.decode() for name in self._symbols[:int(self._header['symbols'])]]
+
+    def __len__(self):
+        return len(self.symbols())
+
+    def total(self, symbol):
+        """Bars ever appended for ``symbol``; changes with every append, so it versions charts"""
+        index = self._lookup(symbol)
+        return 0 if index is None else int(self._counts[index])
+
+    def append(self, symbol, ts, price, change=np.nan, volume=0, market_cap=np.nan):
+        """Append one bar in place; bars not newer than the symbol's last one are ignored"""
+        if not self.writable:
+            raise PermissionError(f"{self.path} is opened read-only; another process writes it")
+        with self._write_lock:
+            index = self._register(symbol)
+            total = int(self._counts[index])
+            ring = self.capacity + 1
+            row = self._bars[index]
+            if total and row[(total - 1) % ring]['ts'] >= ts:
+                return False
+            record = (ts, price, change, volume, market_cap)
+            slot = total % ring
+            row[slot] = record
+            row[slot + ring] = record
+            # The counter moves last, so a reader never sees a bar before it is written
+            self._counts[index] = total + 1
+            self.appended += 1
+            return True
+
+    def append_quotes(self, quotes, ts):
+        """Append one bar per row of a quote frame (``get_stock_data_many``), skipping stale and failed quotes"""
+        if 'status' in quotes:
+            quotes = quotes[quotes['status'] == 'ok']
+        if quotes.empty:
+            return 0
+        ts = _epoch_ms(ts)
+        with self._write_lock:
+            indexes = np.array([self._register(symbol) for symbol in quotes.index], dtype=np.int64)
+            totals = self._counts[indexes]
+            ring = self.capacity + 1
+            last = self._bars[indexes, (totals - 1) % ring]['ts']
+            fresh = (totals == 0) | (last < ts)
+            indexes, totals = indexes[fresh], totals[fresh]
+            records = np.zeros(len(indexes), BAR_DTYPE)
+            records['ts'] = ts
+            for column in ('price', 'change', 'volume', 'market_cap'):
+                values = quotes[column][fresh]
+                fill = 0 if column == 'volume' else np.nan
+                records[column] = values.to_numpy(dtype=BAR_DTYPE[column], na_value=fill)
+            slots = totals % ring
+            self._bars[indexes, slots] = records
+            self._bars[indexes, slots + ring] = records
+            self._counts[indexes] = totals + 1
+            self.appended += len(indexes)
+            return len(indexes)
+
+    def window(self, symbol, n=None, since=None):
+        """Latest ``n`` bars (all kept bars by default), from ``since`` on if given, oldest first.
+
+        The result is a read-only view of the mapped file, not a copy. It
+        stays valid while fewer than ``capacity - n`` bars are appended
+        after it; copy it to keep it longer.
+        """
+        index = self._lookup(symbol)
+        if index is None:
+            return np.empty(0, BAR_DTYPE)
+        total = int(self._counts[index])
+        n = min(total, self.capacity) if n is None else max(0, min(n, total, self.capacity))
+        start = (total - n) % (self.capacity + 1)
+        bars = self._bars[index, start:start + n]
+        if since is not None:
+            bars = bars[np.searchsorted(bars['ts'], _epoch_ms(since)):]
+        bars = bars.view()
+        bars.flags.writeable = False
+        return bars
+
+    def latest(self, symbols):
+        """Most recent bar of each symbol (a copy), ts 0 where a symbol has none"""
+        out = np.zeros(len(symbols), BAR_DTYPE)
+        for position, symbol in enumerate(symbols):
+            bars = self.window(symbol, 1)
+            if len(bars):
+                out[position] = bars[0]
+        return out
+
+    def flush(self):
+        if self.writable and self._mapping is not None:
+            self._mapping.flush()
+
+    def close(self):
+        self.flush()
+        self._mapping = self._header = self._symbols = self._counts = self._bars = None
+        self._index = {}
+        self.writable = False
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def _epoch_ms(value):
+    if isinstance(value, (int, float, np.number)):
+        return int(value)
+    return int(np.datetime64(value, 'ms').astype(np.int64))
+
+
+# Process-wide store; the refresher appends, every session reads
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bar_store():
+    """Return the process-wide BarStore (writable if no other process writes BAR_STORE_PATH)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BarStore()
+        return _store
@@ -0,0 +1,80 @@
+"""Alert rule evaluation time per tick across a ticker universe.
+
+Builds a rule set mixing thresholds, crossings, rates of change and
+conjunctions, scoped to every ticker, then times AlertEngine.evaluate on
+ticks where all, some or none of the inputs changed. Run from the
+repository root:
+
+    python benchmarks/alert_rules.py [--symbols 100 1000] [--rules 2000 5000]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_rules import AlertEngine, Rule  # noqa: E402
+from risk_calculator import RISK_INPUT_COLUMNS, RiskCalculator  # noqa: E402
+
+INPUTS = [name for names in RISK_INPUT_COLUMNS.values() for name in names]
+CHANGED_SHARES = [1.0, 0.1, 0.01, 0.0]
+TICKS = 30
+
+
+def make_rules(count, rng):
+    specs = []
+    for position in range(count):
+        name, signal = f'rule {position}', INPUTS[position % len(INPUTS)]
+        kind = position % 4
+        if kind == 0:
+            spec = {'signal': signal, 'above': float(rng.uniform(0, 1))}
+        elif kind == 1:
+            spec = {'signal': 'overall', 'crosses_above': int(rng.integers(10, 50))}
+        elif kind == 2:
+            spec = {'signal': signal, 'rises_by': 0.1, 'periods': 3}
+        else:
+            spec = {'all': [{'signal': signal, 'above': 0.5}, {'signal': 'overall', 'above': 20}]}
+        specs.append({'name': name, 'scope': 'universe', **spec})
+    return [Rule(spec) for spec in specs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', nargs='+', type=int, default=[100, 1000])
+    parser.add_argument('--rules', nargs='+', type=int, default=[2000, 5000])
+    args = parser.parse_args()
+
+    calculator = RiskCalculator()
+    print(f"{'rules':>6} {'symbols':>8} {'rule x key':>11} {'changed':>8} {'evaluated':>10} {'ms/tick':>8} "
+          f"{'fired':>6}")
+    for rules, symbols in itertools.product(args.rules, args.symbols):
+        rng = np.random.default_rng(0)
+        engine = AlertEngine(make_rules(rules, rng))
+        inputs = pd.DataFrame(rng.normal(0.5, 0.3, (symbols, len(INPUTS))),
+                              index=[f'T{i:04d}' for i in range(symbols)], columns=INPUTS)
+        engine.evaluate({'universe_scores': calculator.score_universe(inputs), 'universe_inputs': inputs}, now=0.0)
+        now = 0.0
+        for share in CHANGED_SHARES:
+            times, evaluations, fired = [], 0, 0
+            for _ in range(TICKS):
+                now += 30
+                moved = rng.random(inputs.shape) < share
+                inputs = inputs.mask(moved, inputs + rng.normal(0, 0.05, inputs.shape))
+                # Scoring is the refresher's work, not the engine's
+                tables = {'universe_scores': calculator.score_universe(inputs), 'universe_inputs': inputs}
+                before = engine.evaluations
+                started = time.perf_counter()
+                fired += len(engine.evaluate(tables, now=now))
+                times.append(time.perf_counter() - started)
+                evaluations += engine.evaluations - before
+            print(f"{rules:>6,} {symbols:>8,} {rules * symbols:>11,} {share:>8.0%} {evaluations // TICKS:>10,} "
+                  f"{np.median(times) * 1000:>8.2f} {fired // TICKS:>6,}")
+
+
+if __name__ == '__main__':
+    main()
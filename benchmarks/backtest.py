@@ -0,0 +1,101 @@
+"""Backtest replay time for a multi-decade universe and a weight/threshold sweep.
+
+Builds synthetic daily inputs from 1995 to 2024 with bubbles peaking in
+March 2000 and November 2021, then times replaying them under the current
+RiskCalculator settings (full score series) and under every weighting on a
+0.05 grid at several alert thresholds (summaries only). A share of the
+synthetic inputs (``--missing``) is blanked, as gaps in real data are. Run from the
+repository root:
+
+    python benchmarks/backtest.py [--symbols 100] [--step 0.05] [--workers 4]
+
+Pass --inputs to replay a local CSV/Parquet file instead of synthetic data.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import (  # noqa: E402
+    INPUT_COLUMNS, BacktestConfig, InputPanel, load_inputs, replay, synthetic_inputs, weight_grid
+)
+from risk_calculator import RISK_INPUT_COLUMNS, RiskCalculator  # noqa: E402
+
+
+def scalar_mismatches(panel, scores, frame, samples=500, seed=0):
+    """Replayed scores that differ from calculate_overall_risk_score on a sample of source rows"""
+    rng = np.random.default_rng(seed)
+    # The source rows, not the panel, so the panel's own handling of gaps is checked too
+    rows = frame.assign(date=pd.to_datetime(frame['date']).dt.normalize()).drop_duplicates(
+        ['date', 'symbol'], keep='last').set_index(['date', 'symbol'])
+    days, symbols = np.nonzero(panel.present)
+    picks = rng.choice(len(days), min(samples, len(days)), replace=False)
+    calculator = RiskCalculator()
+    mismatches = 0
+    for day, symbol in zip(days[picks], symbols[picks]):
+        row = rows.loc[(panel.dates[day], panel.symbols[symbol])]
+        inputs = {family: {name: row[name] for name in names if name in row.index}
+                  for family, names in RISK_INPUT_COLUMNS.items()}
+        mismatches += calculator.calculate_overall_risk_score(inputs) != scores.iat[day, symbol]
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--step', type=float, default=0.05)
+    parser.add_argument('--alert-thresholds', nargs='+', type=int, default=[30, 40, 50, 70])
+    parser.add_argument('--workers', type=int, default=0)
+    parser.add_argument('--inputs', help='daily inputs file (date, symbol and risk input columns)')
+    parser.add_argument('--missing', type=float, default=0.02, help="share of synthetic inputs blanked to NaN")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.inputs:
+        frame = pd.read_parquet(args.inputs) if args.inputs.endswith('.parquet') else pd.read_csv(args.inputs)
+        panel = load_inputs(args.inputs)
+    else:
+        frame = synthetic_inputs([f'S{i:03d}' for i in range(args.symbols)], seed=2)
+        # Gaps in the inputs, so the RiskCalculator check below covers NaN handling
+        blank = np.random.default_rng(3).random((len(frame), len(INPUT_COLUMNS))) < args.missing
+        frame[INPUT_COLUMNS] = frame[INPUT_COLUMNS].mask(blank)
+        panel = InputPanel(frame)
+    if 'symbol' not in frame.columns:
+        frame = frame.assign(symbol='MARKET')
+    print(f"Inputs: {len(panel):,} days x {len(panel.symbols)} symbols, loaded in "
+          f"{time.perf_counter() - started:.2f} s")
+
+    started = time.perf_counter()
+    baseline = replay(panel, [BacktestConfig()], workers=args.workers)[0]
+    print(f"Baseline replay with score series: {time.perf_counter() - started:.2f} s")
+    print(f"  {scalar_mismatches(panel, baseline['scores'], frame)} of 500 sampled scores differ from RiskCalculator")
+    summary = baseline['summary']
+    print(f"  max score {summary['max_score']}, {summary['alerts']} alerts, regime share "
+          + ', '.join(f"{regime} {share:.1%}" for regime, share in summary['regime_share'].items()))
+    for label, start, end in (('2000 bubble', '1999-01-01', '2001-12-31'),
+                              ('2021-22 bubble', '2021-01-01', '2022-12-31')):
+        window = baseline['scores'].loc[start:end]
+        if len(window):
+            print(f"  {label}: mean score {window.stack().mean():.1f}, peak {window.max().max():.0f}")
+
+    configs = [config for threshold in args.alert_thresholds
+               for config in weight_grid(args.step, alert_threshold=threshold)]
+    started = time.perf_counter()
+    results = replay(panel, configs, workers=args.workers, keep_series=False)
+    elapsed = time.perf_counter() - started
+    print(f"Sweep: {len(configs):,} configs in {elapsed:.2f} s ({elapsed / len(configs) * 1000:.2f} ms each)")
+    print(f"{'weights':>26} {'alert >':>8} {'alerts':>8} {'first alert':>12} {'max':>4}")
+    fired = [result for result in results if result['summary']['alerts']]
+    for result in sorted(fired, key=lambda result: result['summary']['first_alert'])[:5]:
+        summary = result['summary']
+        print(f"{result['config'].name:>26} {result['config'].alert_threshold:>8} {summary['alerts']:>8,} "
+              f"{summary['first_alert']:%Y-%m-%d} {summary['max_score']:>4}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Intraday bar history: quote dicts in lists versus the memory-mapped BarStore.
+
+Fills ``--bars`` refreshes of quotes for each of ``--symbols`` symbols,
+once as per-symbol lists of ``get_stock_data``-style dicts and once in a
+BarStore, then compares memory, append time per refresh, and the time to
+turn the last ``--window`` bars of every symbol into price arrays for the
+chart and realized volatility. A second process then maps the same file
+read-only and reads every window, as another worker would. Run from the
+repository root:
+
+    python benchmarks/bar_store.py [--symbols 100 500] [--bars 2880] [--window 720]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bar_store import BAR_DTYPE, BarStore  # noqa: E402
+from risk_calculator import realized_volatility  # noqa: E402
+
+START_MS = 1_700_000_000_000
+STEP_MS = 30_000
+
+READER = r"""
+import sys, time
+sys.path.insert(0, {root!r})
+from bar_store import BarStore
+store = BarStore({path!r}, write=False)
+symbols = store.symbols()
+started = time.perf_counter()
+total = sum(float(store.window(symbol, {window})['price'].sum()) for symbol in symbols)
+read = time.perf_counter() - started
+with open('/proc/self/status') as handle:
+    rss = next((int(line.split()[1]) / 1024 for line in handle if line.startswith('VmRSS:')), float('nan'))
+print(store.writable, len(symbols), read * 1000, rss)
+"""
+
+
+def make_quotes(symbols, rng):
+    return pd.DataFrame({
+        'price': rng.uniform(50, 500, len(symbols)),
+        'change': rng.uniform(-10, 10, len(symbols)),
+        'volume': rng.integers(1_000_000, 10_000_000, len(symbols)),
+        'market_cap': rng.integers(100_000_000_000, 1_000_000_000_000, len(symbols)),
+        'status': 'ok'
+    }, index=pd.Index(symbols, name='symbol'))
+
+
+def fill_dicts(frames, symbols):
+    history = {symbol: [] for symbol in symbols}
+    started = time.perf_counter()
+    for step, frame in enumerate(frames):
+        ts = START_MS + step * STEP_MS
+        for symbol, price, change, volume, market_cap in zip(
+                symbols, frame['price'].tolist(), frame['change'].tolist(),
+                frame['volume'].tolist(), frame['market_cap'].tolist()):
+            history[symbol].append({'symbol': symbol, 'ts': ts, 'price': price, 'change': change,
+                                    'volume': volume, 'market_cap': market_cap})
+    return history, (time.perf_counter() - started) / len(frames)
+
+
+def fill_store(store, frames):
+    started = time.perf_counter()
+    for step, frame in enumerate(frames):
+        store.append_quotes(frame, START_MS + step * STEP_MS)
+    return (time.perf_counter() - started) / len(frames)
+
+
+def best_of(function, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', nargs='+', type=int, default=[100, 500])
+    parser.add_argument('--bars', type=int, default=2880, help="refreshes kept per symbol")
+    parser.add_argument('--window', type=int, default=720, help="bars per chart / volatility window")
+    args = parser.parse_args()
+
+    print(f"{'symbols':>7} {'layout':<10} {'memory MB':>10} {'append ms':>10} {'window ms':>10} "
+          f"{'reader read ms':>15} {'reader RSS MB':>14}")
+    for count in args.symbols:
+        rng = np.random.default_rng(0)
+        symbols = [f'S{index:04d}' for index in range(count)]
+        frames = [make_quotes(symbols, rng) for _ in range(args.bars)]
+
+        tracemalloc.start()
+        history, dict_append = fill_dicts(frames, symbols)
+        dict_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        def dict_windows():
+            for symbol in symbols:
+                bars = history[symbol][-args.window:]
+                realized_volatility(np.array([bar['price'] for bar in bars]), np.array([bar['ts'] for bar in bars]))
+
+        print(f"{count:>7} {'dicts':<10} {dict_memory / 1e6:>10.1f} {dict_append * 1000:>10.3f} "
+              f"{best_of(dict_windows) * 1000:>10.2f} {'':>15} {'':>14}")
+        del history
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bars.bin')
+            store = BarStore(path, capacity=args.bars, max_symbols=count)
+            store_append = fill_store(store, frames)
+
+            def store_windows():
+                for symbol in symbols:
+                    bars = store.window(symbol, args.window)
+                    realized_volatility(bars['price'], bars['ts'])
+
+            windows = best_of(store_windows)
+            store.flush()
+            reader = subprocess.run([sys.executable, '-c', READER.format(root=ROOT, path=path, window=args.window)],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            writable, seen, read, rss = reader[0] == 'True', int(reader[1]), float(reader[2]), float(reader[3])
+            assert not writable and seen == count
+            # Both copies of each bar (see BarStore) are counted
+            used = count * 2 * (args.bars + 1) * BAR_DTYPE.itemsize
+            print(f"{count:>7} {'bar store':<10} {used / 1e6:>10.1f} {store_append * 1000:>10.3f} "
+                  f"{windows * 1000:>10.2f} {read:>15.1f} {rss:>14.1f}")
+            store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Monte Carlo crash-scenario throughput and memory ceiling.
+
+Runs CrashSimulator on the mock risk inputs for growing path counts and
+reports wall time, paths per second and peak traced memory, which should
+stay flat as paths grow. With --workers the same seed is also run on a
+process pool and checked for identical results. Run from the repository
+root:
+
+    python benchmarks/crash_simulation.py [--paths 100000 1000000 4000000] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crash_simulator import CHUNK_PATHS, CrashSimulator  # noqa: E402
+from risk_calculator import MOCK_RISK_INPUTS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', nargs='+', type=int, default=[100_000, 1_000_000, 4_000_000])
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_PATHS)
+    parser.add_argument('--workers', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'paths':>10} {'workers':>8} {'seconds':>8} {'paths/s':>11} {'peak MB':>8}")
+    for paths in args.paths:
+        for workers in sorted({0, args.workers}):
+            simulator = CrashSimulator(paths=paths, chunk_size=args.chunk_size, seed=1, workers=workers)
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = simulator.run(MOCK_RISK_INPUTS)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if workers:
+                # Pool workers' memory is not traced; the parent only holds counts
+                assert np.array_equal(result['histogram'], reference['histogram']), "pool result differs"
+            else:
+                reference = result
+            print(f"{paths:>10,} {workers:>8} {elapsed:>8.2f} {paths / elapsed:>11,.0f} {peak / 2 ** 20:>8.1f}")
+    transitions = ', '.join(f"{regime} {share:.1%}" for regime, share in reference['regime_transitions'].items())
+    print(f"From {reference['current_regime']} (score {reference['base_score']}): {transitions}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Fundamentals ingestion, cache reload and scoring time for a large universe.
+
+Fills a statement cache in a temporary directory from synthetic
+Alpha Vantage payloads, then times a warm refresh (nothing due), reloading
+the columnar table from its Parquet file and from the raw payloads, and
+computing metrics plus calculate_fundamental_divergence over every ticker
+against the scalar method called per ticker. Run from the repository root:
+
+    python benchmarks/fundamentals.py [--symbols 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fundamentals import FundamentalsStore, fundamental_metrics, synthetic_statements  # noqa: E402
+from risk_calculator import RiskCalculator  # noqa: E402
+
+
+def directory_bytes(root):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(root) for name in names)
+
+
+def timed(label, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{label:<44} {(time.perf_counter() - started) * 1000:>9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    args = parser.parse_args()
+
+    symbols = [f'S{i:04d}' for i in range(args.symbols)]
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=2 * 252)
+    prices = pd.DataFrame(50 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), len(symbols))), axis=0)),
+                          index=dates, columns=symbols)
+    calculator = RiskCalculator()
+    with tempfile.TemporaryDirectory() as root:
+        store = FundamentalsStore(root)
+        timed(f"Cold fetch ({args.symbols:,} symbols x 3 statements)",
+              lambda: store.refresh(symbols, synthetic_statements, 'mock'))
+        table = timed("Build columnar table", store.table)
+        timed("Warm refresh (nothing due)", lambda: store.refresh(symbols, synthetic_statements, 'mock'))
+        print(f"  {len(table):,} quarters, table {table.memory_usage(deep=True).sum() / 1e3:,.0f} kB in memory, "
+              f"cache {directory_bytes(root) / 1e6:,.1f} MB on disk")
+        timed("Reload table from Parquet", lambda: FundamentalsStore(root).table())
+        for name in os.listdir(os.path.join(root, 'tables')):
+            os.remove(os.path.join(root, 'tables', name))
+        timed("Rebuild table from cached payloads", lambda: FundamentalsStore(root).table())
+        metrics = timed("Metrics for every ticker", lambda: fundamental_metrics(table, prices))
+        vector = timed("calculate_fundamental_divergence (table)",
+                       lambda: calculator.calculate_fundamental_divergence(metrics))
+        rows = metrics[['fcf_margin', 'revenue_growth', 'price_change']].to_dict('records')
+        scalar = timed("calculate_fundamental_divergence (per ticker)",
+                       lambda: [calculator.calculate_fundamental_divergence(row) for row in rows])
+        print(f"  {int((vector.to_numpy() != np.array(scalar)).sum())} scores differ; "
+              f"{int((vector > 0).sum())} of {len(vector)} tickers diverging")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""Concurrent-session load test for streamlit_app.py.
+
+Starts one headless Streamlit server on the offline mock provider (or
+targets ``--url``) and drives N simulated viewers over the same websocket
+protocol the browser uses (the ``/_stcore/stream`` endpoint of the
+Starlette server Streamlit runs since 1.57). Each viewer opens a session, then keeps
+switching the sidebar navigation through every page, waiting for each
+rerun to finish plus ``--think-ms``. For every concurrency level it
+reports reruns per second, p50/p95/p99 rerun latency, server CPU time per
+rerun, and the RSS of each server process. CPU and RSS come from
+/proc, so they are reported on Linux for a server this script started.
+Run from the repository root:
+
+    python benchmarks/load_test.py [--sessions 1 5 10 25] [--duration 30]
+
+The client runs on the same machine, so on small hosts it competes with
+the server for CPU; use ``--url`` against a server on another host to
+size a deployment.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NAVIGATION_LABEL = "Select Page"
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(port, env):
+    command = [sys.executable, '-m', 'streamlit', 'run', os.path.join(ROOT, 'streamlit_app.py'),
+               '--server.headless', 'true', '--server.port', str(port),
+               '--browser.gatherUsageStats', 'false']
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except OSError:
+            time.sleep(0.25)
+    server.kill()
+    raise RuntimeError("Streamlit server did not become healthy within 120s")
+
+
+def process_tree(pid):
+    """``pid`` and its descendants (Linux /proc)"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        for task in os.listdir(f'/proc/{current}/task') if os.path.isdir(f'/proc/{current}/task') else ():
+            try:
+                with open(f'/proc/{current}/task/{task}/children') as handle:
+                    pending.extend(int(child) for child in handle.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def rss_mb(pid):
+    """Current and peak resident set size of one process, in MB"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/status') as handle:
+            for line in handle:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    values[line[:5]] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return values.get('VmRSS', float('nan')), values.get('VmHWM', float('nan'))
+
+
+def cpu_seconds(pids):
+    total = 0.0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as handle:
+                fields = handle.read().rsplit(')', 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+class Viewer:
+    """One browser session: reruns the script and reads ForwardMsgs until it finishes"""
+
+    def __init__(self, url):
+        self.url = url
+        self.navigation = None
+        self.pages = []
+        self.socket = None
+
+    async def connect(self):
+        self.socket = await websockets.connect(self.url, max_size=None)
+        await self.rerun()
+        if self.navigation is None:
+            raise RuntimeError(f"No {NAVIGATION_LABEL!r} selectbox in the first run")
+
+    async def rerun(self, page=None):
+        """Rerun with ``page`` selected; returns (seconds, exceptions rendered)"""
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.page_script_hash = ''
+        if page is not None:
+            states = WidgetStates()
+            widget = states.widgets.add()
+            widget.id = self.navigation
+            widget.string_value = page
+            message.rerun_script.widget_states.CopyFrom(states)
+        started = time.perf_counter()
+        await self.socket.send(message.SerializeToString())
+        exceptions = 0
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.socket.recv())
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_type = element.WhichOneof('type')
+                if element_type == 'exception':
+                    exceptions += 1
+                elif element_type == 'selectbox' and element.selectbox.label == NAVIGATION_LABEL:
+                    self.navigation = element.selectbox.id
+                    self.pages = list(element.selectbox.options)
+            elif kind == 'script_finished':
+                return time.perf_counter() - started, exceptions
+
+    async def close(self):
+        if self.socket is not None:
+            await self.socket.close()
+
+
+async def run_level(url, sessions, duration, think, offset):
+    """Drive ``sessions`` viewers for ``duration`` seconds; returns latencies and error count"""
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + duration
+
+    async def viewer_loop(index):
+        viewer = Viewer(url)
+        try:
+            await viewer.connect()
+            # Viewers start on different pages so every page is under load at once
+            step = index + offset
+            while time.perf_counter() < deadline:
+                page = viewer.pages[step % len(viewer.pages)]
+                step += 1
+                seconds, exceptions = await viewer.rerun(page)
+                latencies.append(seconds)
+                errors[0] += exceptions
+                if think:
+                    await asyncio.sleep(think)
+        except (OSError, websockets.WebSocketException, RuntimeError):
+            errors[0] += 1
+        finally:
+            await viewer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(viewer_loop(index) for index in range(sessions)))
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', nargs='+', type=int, default=[1, 5, 10, 25])
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds per concurrency level")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="pause between a viewer's reruns")
+    parser.add_argument('--warmup', type=float, default=10.0, help="seconds to let the first refresh cycle finish")
+    parser.add_argument('--url', help="websocket URL of a running server (ws://host:port/_stcore/stream)")
+    parser.add_argument('--fixtures', help="serve REPLAY_FIXTURES_PATH instead of mock data")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        env = dict(os.environ, ALPHA_VANTAGE_KEY='', NEWSDATA_API_KEY='')
+        env.pop('REPLAY_FIXTURES_PATH', None)
+        if args.fixtures:
+            env['REPLAY_FIXTURES_PATH'] = os.path.abspath(args.fixtures)
+        server = start_server(port, env)
+        url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    try:
+        # One session starts the background refresher; later levels then measure steady state
+        asyncio.run(run_level(url, 1, args.warmup, 0.0, 0))
+        print(f"{'sessions':>8} {'reruns':>7} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'max ms':>8} {'errors':>6} {'cpu ms/rerun':>13} {'rss MB':>16}")
+        results = []
+        for sessions in args.sessions:
+            pids = process_tree(server.pid) if server is not None else []
+            cpu_before = cpu_seconds(pids)
+            latencies, errors, elapsed = asyncio.run(
+                run_level(url, sessions, args.duration, args.think_ms / 1000, len(results)))
+            if not latencies:
+                print(f"{sessions:>8} no rerun finished ({errors} errors)")
+                continue
+            pids = process_tree(server.pid) if server is not None else []
+            cpu = (cpu_seconds(pids) - cpu_before) / len(latencies) if pids else float('nan')
+            rss = {pid: rss_mb(pid) for pid in pids}
+            milliseconds = np.array(latencies) * 1000
+            p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+            memory = ' + '.join(f"{current:.0f}" for current, _ in rss.values()) or 'n/a'
+            print(f"{sessions:>8} {len(latencies):>7} {len(latencies) / elapsed:>9.1f} {p50:>8.0f} {p95:>8.0f} "
+                  f"{p99:>8.0f} {milliseconds.max():>8.0f} {errors:>6} {cpu * 1000:>13.1f} {memory:>16}")
+            results.append({
+                'sessions': sessions, 'reruns': len(latencies), 'seconds': elapsed,
+                'throughput': len(latencies) / elapsed, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+                'max_ms': float(milliseconds.max()), 'errors': errors, 'cpu_ms_per_rerun': cpu * 1000,
+                'rss_mb': {str(pid): {'current': current, 'peak': peak} for pid, (current, peak) in rss.items()}
+            })
+        if args.json:
+            with open(args.json, 'w') as handle:
+                json.dump({'url': url, 'duration': args.duration, 'think_ms': args.think_ms,
+                           'levels': results}, handle, indent=1)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(30)
+
+
+if __name__ == '__main__':
+    main()
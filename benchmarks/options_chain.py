@@ -0,0 +1,64 @@
+"""Options-chain analytics time for SPX-sized chains.
+
+Prices synthetic chains from a known volatility surface, then times
+analyze_chain (batch IV solve, greeks, skew, put/call, gamma exposure) and
+checks the recovered IVs against the surface. Run from the repository root:
+
+    python benchmarks/options_chain.py [--sizes 60x250 60x500 100x500]
+
+Each size is expiries x strikes; every strike has a call and a put.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from options_analytics import (  # noqa: E402
+    RISK_FREE_RATE, analyze_chain, black_scholes, implied_volatility, synthetic_chain
+)
+
+
+def solver_error(samples=100000, seed=3):
+    """Max |IV error| on random exact Black-Scholes prices with usable vega"""
+    rng = np.random.default_rng(seed)
+    spot = np.full(samples, 100.0)
+    strike = spot * np.exp(rng.uniform(-0.5, 0.5, samples))
+    years = rng.uniform(7, 720, samples) / 365
+    sigma = rng.uniform(0.05, 1.2, samples)
+    is_call = rng.random(samples) < 0.5
+    price, vega = black_scholes(spot, strike, years, sigma, is_call, RISK_FREE_RATE)
+    started = time.perf_counter()
+    solved = implied_volatility(price, spot, strike, years, is_call, RISK_FREE_RATE)
+    elapsed = time.perf_counter() - started
+    # Deep ITM quotes with ~zero vega carry no volatility information
+    ok = ~np.isnan(solved) & (vega > 1e-3)
+    return np.abs(solved[ok] - sigma[ok]).max(), ok.mean(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=['60x250', '60x500', '100x500'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    error, coverage, elapsed = solver_error()
+    print(f"IV solver: 100,000 exact prices in {elapsed * 1000:.0f} ms, "
+          f"max error {error:.1e}, {coverage:.1%} solved")
+    print(f"{'contracts':>10} {'median ms':>10} {'solved':>8}")
+    for size in args.sizes:
+        expiries, strikes = (int(part) for part in size.split('x'))
+        chain = synthetic_chain(expiries=expiries, strikes=strikes, seed=1)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = analyze_chain(chain)
+            timings.append(time.perf_counter() - started)
+        print(f"{len(chain):>10,} {np.median(timings) * 1000:>10.1f} {result['solved'] / len(chain):>8.1%}")
+
+
+if __name__ == '__main__':
+    main()
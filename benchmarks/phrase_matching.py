@@ -0,0 +1,106 @@
+"""Bubble-phrase matching throughput: Aho-Corasick vs. one regex per phrase.
+
+Builds a synthetic news corpus and a lexicon of the shipped bubble phrases
+plus generated filler phrases, then compares the word-level automaton in
+phrase_detector.py with the naive approach of scanning the text once per
+phrase variant. The automaton also counts overlapping matches, so its
+match total can be slightly higher. Run from the repository root:
+
+    python benchmarks/phrase_matching.py [--mb 1] [--phrases 0 100 300]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phrase_detector import BUBBLE_PHRASES, PhraseMatcher, tokenize  # noqa: E402
+
+VOCABULARY = (
+    'nvidia ai chip data center revenue growth strong demand gpu supply market stock '
+    'shares investors analysts valuation earnings quarter guidance cloud microsoft '
+    'semiconductor rally risk bubble concern rates fed capex hyperscaler software '
+    'model training inference margin outlook record high billion trillion the a of '
+    'and to in on for with as is are was said says new time this different once'
+).split()
+
+
+def make_corpus(megabytes, seed=7):
+    """Random article text with real bubble phrases sprinkled in, ~``megabytes`` MB"""
+    rng = random.Random(seed)
+    phrases = [text for phrase, (_, variants) in BUBBLE_PHRASES.items() for text in [phrase, *variants]]
+    articles = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(40, 120))]
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words)), rng.choice(phrases).upper() + ',')
+        article = ' '.join(words).capitalize() + '.'
+        articles.append(article)
+        size += len(article) + 1
+    return articles
+
+
+def make_lexicon(extra, seed=11):
+    """The bubble lexicon plus ``extra`` generated 2-4 word phrases"""
+    rng = random.Random(seed)
+    lexicon = dict(BUBBLE_PHRASES)
+    for index in range(extra):
+        words = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 4)))
+        lexicon[f'filler {index}'] = ('Filler', [words])
+    return lexicon
+
+
+def naive_count(patterns, articles):
+    """Scan every article once per phrase variant"""
+    total = 0
+    for article in articles:
+        text = article.lower()
+        for pattern in patterns:
+            total += len(pattern.findall(text))
+    return total
+
+
+def automaton_count(matcher, articles):
+    total = 0
+    for article in articles:
+        total += sum(1 for _ in matcher.matches(tokenize(article)))
+    return total
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mb', type=float, default=1)
+    parser.add_argument('--phrases', type=int, nargs='+', default=[0, 100, 300],
+                        help='generated phrases added to the bubble lexicon')
+    args = parser.parse_args()
+
+    articles = make_corpus(args.mb)
+    megabytes = sum(len(article) + 1 for article in articles) / 1024 / 1024
+    print(f"corpus: {len(articles):,} articles, {megabytes:.1f} MB")
+    print(f"{'variants':>9} {'naive MB/s':>11} {'automaton MB/s':>15} {'speedup':>8} {'matches':>16}")
+    for extra in args.phrases:
+        lexicon = make_lexicon(extra)
+        variants = {' '.join(tokenize(text)) for phrase, (_, others) in lexicon.items()
+                    for text in [phrase, *others]}
+        # Case- and punctuation-insensitive, whole words only, like the automaton
+        patterns = [re.compile(r'\b' + r'[^a-z0-9]+'.join(variant.split()) + r'\b') for variant in variants]
+        matcher = PhraseMatcher(lexicon).compile()
+
+        naive, naive_seconds = timed(naive_count, patterns, articles)
+        found, automaton_seconds = timed(automaton_count, matcher, articles)
+        print(f"{len(variants):>9} {megabytes / naive_seconds:>11.1f} {megabytes / automaton_seconds:>15.1f} "
+              f"{naive_seconds / automaton_seconds:>7.1f}x {found:>7,}/{naive:<8,}")
+
+
+if __name__ == '__main__':
+    main()
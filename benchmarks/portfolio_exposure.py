@@ -0,0 +1,68 @@
+"""Portfolio exposure engine time for large portfolios over long histories.
+
+Generates a factor-model price history, then times the full EWMA covariance
+fit, the incremental update for a few new daily bars and the summary
+(betas, diversification, leveraged decay and drawdown stress). The
+incremental covariance is checked against a full refit. Run from the
+repository root:
+
+    python benchmarks/portfolio_exposure.py [--positions 50 200 500] [--years 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio_engine import TRADING_DAYS, ExposureEngine  # noqa: E402
+
+
+def price_history(positions, days, seed=5):
+    """One market factor plus idiosyncratic noise, with SPY as the market"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.011, (days, 1))
+    betas = rng.uniform(0.5, 2.0, positions)
+    returns = market * betas + rng.normal(0, 0.015, (days, positions))
+    returns = np.hstack([returns, market])
+    symbols = [f'S{i:04d}' for i in range(positions)] + ['SPY']
+    dates = pd.bdate_range(end='2026-01-02', periods=days)
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=dates, columns=symbols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', nargs='+', type=int, default=[50, 200, 500])
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--new-bars', type=int, default=5)
+    args = parser.parse_args()
+
+    days = args.years * TRADING_DAYS
+    print(f"{'positions':>10} {'fit ms':>8} {'update ms':>10} {'summary ms':>11} {'max rel diff':>13}")
+    for positions in args.positions:
+        prices = price_history(positions, days + args.new_bars)
+        weights = dict.fromkeys(prices.columns[:-1], 1.0 / positions)
+        history, latest = prices.iloc[:days], prices
+
+        started = time.perf_counter()
+        engine = ExposureEngine(weights).fit(history)
+        fit = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine.update(latest)
+        update = time.perf_counter() - started
+
+        started = time.perf_counter()
+        engine.summary(seed=1)
+        summary = time.perf_counter() - started
+
+        refit = ExposureEngine(weights).fit(latest).covariance
+        diff = np.abs(engine.covariance - refit).max() / np.abs(refit).max()
+        print(f"{positions:>10,} {fit * 1000:>8.1f} {update * 1000:>10.1f} {summary * 1000:>11.1f} {diff:>13.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Single-writer refresh across replicas sharing one Redis.
+
+Starts ``--replicas`` SharedRefreshers in this process, each with its own
+SnapshotStore and a counting refresh task whose result is about
+``--payload-kb`` of numeric arrays. They share the in-process Redis
+stand-in, or a real server with ``--redis-url``. After ``--duration``
+seconds it reports how many times each replica ran the tasks (only the
+leader should), pushes, pulls and how far behind the leader followers
+installed each snapshot. It then stops the leader without releasing its
+lease, as a crash would, and times until another replica publishes.
+Run from the repository root:
+
+    python benchmarks/shared_tier.py [--replicas 4] [--redis-url redis://localhost:6379/0]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_tier import SharedRefresher, connect, encode_snapshot  # noqa: E402
+
+
+def make_replica(client, prefix, index, args, lags):
+    runs = [0]
+
+    def task():
+        runs[0] += 1
+        rows = max(1, args.payload_kb * 1024 // 8 // 4)
+        return {'replica': index, 'values': np.random.default_rng(runs[0]).normal(size=(rows, 4))}
+
+    refresher = SharedRefresher(
+        client, tasks={'payload': task}, interval_ms=args.interval_ms, prefix=prefix,
+        ttl_ms=args.ttl_ms, poll_ms=args.poll_ms, owner=f'replica-{index}'
+    )
+    # created_at is the leader's wall clock; replicas here share it
+    refresher.add_listener(lambda snapshot: lags.append(time.time() - snapshot.created_at.timestamp()))
+    return refresher, runs
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--interval-ms', type=int, default=250, help="leader's refresh period")
+    parser.add_argument('--poll-ms', type=int, default=50)
+    parser.add_argument('--ttl-ms', type=int, default=1000)
+    parser.add_argument('--payload-kb', type=int, default=64)
+    parser.add_argument('--redis-url', default='memory://benchmark')
+    args = parser.parse_args()
+
+    client = connect(args.redis_url)
+    prefix = f'benchmark-{uuid.uuid4().hex[:8]}'
+    lags = [[] for _ in range(args.replicas)]
+    replicas = [make_replica(client, prefix, index, args, lags[index]) for index in range(args.replicas)]
+    for refresher, _ in replicas:
+        refresher.start()
+    time.sleep(args.duration)
+
+    print(f"{args.replicas} replicas on {args.redis_url}, {args.duration:g}s, refresh every {args.interval_ms} ms, "
+          f"poll {args.poll_ms} ms")
+    print(f"{'replica':<10} {'role':<9} {'task runs':>9} {'pushes':>7} {'pulls':>6} {'lag p50 ms':>11} "
+          f"{'lag max ms':>11} {'errors':>6}")
+    for index, (refresher, runs) in enumerate(replicas):
+        # The leader installs its own snapshots, so its lag is the notify cost only
+        lag = np.array(lags[index] or [np.nan]) * 1000
+        print(f"{refresher.owner:<10} {refresher.role:<9} {runs[0]:>9} {refresher.pushes:>7} {refresher.pulls:>6} "
+              f"{np.median(lag):>11.1f} {lag.max():>11.1f} {refresher.tier_errors:>6}")
+    leaders = [refresher for refresher, _ in replicas if refresher.lease.held]
+    latest = leaders[0].latest() if leaders else None
+    if latest is not None:
+        started = time.perf_counter()
+        blob = encode_snapshot(latest)
+        print(f"Snapshot: {len(blob) / 1e3:,.1f} kB compressed, encoded in "
+              f"{(time.perf_counter() - started) * 1000:.2f} ms")
+
+    if len(leaders) == 1 and args.replicas > 1:
+        leader = leaders[0]
+        leader.stop(release=False)
+        crashed = time.monotonic()
+        survivors = [refresher for refresher, _ in replicas if refresher is not leader]
+        version = latest.version
+        if wait_for(lambda: any(refresher.pushes and refresher.latest().version > version
+                                for refresher in survivors), args.ttl_ms / 1000 * 3 + 10):
+            successor = next(refresher for refresher in survivors if refresher.lease.held)
+            print(f"Failover: {successor.owner} published {(time.monotonic() - crashed) * 1000:.0f} ms after "
+                  f"{leader.owner} stopped (lease TTL {args.ttl_ms} ms)")
+        else:
+            print("Failover: no replica took over")
+    for refresher, _ in replicas:
+        refresher.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""CPU cost per refresh cycle as the number of concurrent viewers grows.
+
+Compares every session building its own dashboard state (the old
+behaviour) with one shared DashboardState per cycle that all sessions
+read. Run from the repository root:
+
+    python benchmarks/snapshot_fanout.py
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_state import DashboardStateService, build_dashboard_state  # noqa: E402
+from refresh_worker import SnapshotStore  # noqa: E402
+from risk_calculator import MOCK_RISK_INPUTS, RiskCalculator  # noqa: E402
+
+WATCHLIST = ['NVDA', 'MSFT', 'AMD', 'SOXL']
+VIEWERS = [1, 10, 50, 100]
+CYCLES = 20
+
+
+def make_snapshot(store, calculator, symbols):
+    n = len(symbols)
+    inputs = pd.DataFrame({
+        'fcf_margin': np.random.normal(0.15, 0.15, n),
+        'pe_ratio': np.random.lognormal(3.5, 0.5, n),
+        'iv_level': np.random.uniform(0.12, 0.6, n),
+    }, index=symbols)
+    quotes = pd.DataFrame({
+        'price': np.random.uniform(50, 500, n),
+        'change': np.random.uniform(-10, 10, n),
+        'status': 'ok',
+    }, index=symbols)
+    score = calculator.calculate_risk_score_incremental('MARKET', MOCK_RISK_INPUTS)
+    return store.publish({
+        'risk': {'inputs': MOCK_RISK_INPUTS, 'score': score,
+                 'components': calculator.component_scores('MARKET')},
+        'quotes': quotes,
+        'universe_risk': {'inputs': inputs, 'scores': calculator.score_universe(inputs)},
+    })
+
+
+def render(state):
+    # What a page render touches on the shared state
+    for item in state.drivers + state.alerts + state.watchlist:
+        item.get('risk')
+    return state.risk_score
+
+
+def run(viewers, shared):
+    store = SnapshotStore()
+    calculator = RiskCalculator()
+    service = DashboardStateService(WATCHLIST)
+    symbols = WATCHLIST + ['SOXX'] + [f'T{i}' for i in range(100)]
+    started = time.process_time()
+    for _ in range(CYCLES):
+        snapshot = make_snapshot(store, calculator, symbols)
+        if shared:
+            service.update(snapshot)
+
+        def session():
+            state = service.current() if shared else build_dashboard_state(snapshot, WATCHLIST)
+            render(state)
+
+        threads = [threading.Thread(target=session) for _ in range(viewers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return (time.process_time() - started) / CYCLES * 1000
+
+
+def main():
+    print(f"{'viewers':>8} {'per-session ms/cycle':>22} {'shared ms/cycle':>17}")
+    for viewers in VIEWERS:
+        print(f"{viewers:>8} {run(viewers, shared=False):>22.2f} {run(viewers, shared=True):>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
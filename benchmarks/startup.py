@@ -0,0 +1,99 @@
+"""Cold-start benchmark for streamlit_app.py.
+
+Each sample runs in a fresh interpreter so nothing is already imported:
+
+* ``import streamlit`` time, as the floor every worker pays
+* time to first paint: the first full script run of the Executive Summary
+* heavy modules the first run imported on the first-paint path, and
+  those the background threads it started (refresher, scheduler, fetch
+  pool) imported meanwhile
+
+Run from the repository root:
+
+    python benchmarks/startup.py [--samples 5] [--importtime]
+
+``--importtime`` also prints the slowest imports of the first run, from
+``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'requests', 'plotly.express', 'sqlalchemy', 'scipy']
+# Threads the app starts; imports on any other thread (the script runner) are on the first-paint path
+BACKGROUND_THREADS = ('background-refresh', 'request-scheduler', 'provider-fetch', 'lease-keeper', 'metrics-server')
+
+PROBE = r"""
+import json, sys, threading, time
+importers = {{}}
+
+class ImportWatch:
+    def find_spec(self, name, path=None, target=None):
+        if name in {heavy!r} and name not in sys.modules:
+            importers.setdefault(name, threading.current_thread().name)
+        return None
+
+sys.meta_path.insert(0, ImportWatch())
+started = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=120)
+app.run()
+painted = time.perf_counter()
+assert not app.exception, app.exception
+print(json.dumps({{
+    'import_streamlit': imported - started,
+    'first_paint': painted - imported,
+    'paint_path': [name for name, thread in importers.items() if not thread.startswith({background!r})],
+    'background': [f'{{name}} ({{thread}})' for name, thread in importers.items() if thread.startswith({background!r})],
+}}))
+"""
+
+
+def run_probe(extra_args=()):
+    script = PROBE.format(app=os.path.join(ROOT, 'streamlit_app.py'), heavy=HEAVY_MODULES,
+                          background=BACKGROUND_THREADS)
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, HISTORY_DB_PATH=os.path.join(data_dir, 'history.db'))
+        result = subprocess.run(
+            [sys.executable, *extra_args, '-c', script],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--importtime', action='store_true')
+    args = parser.parse_args()
+
+    samples = [json.loads(run_probe().stdout.strip().splitlines()[-1]) for _ in range(args.samples)]
+    for key in ('import_streamlit', 'first_paint'):
+        values = [sample[key] * 1000 for sample in samples]
+        print(f"{key:>18}: median {statistics.median(values):7.1f} ms   "
+              f"min {min(values):7.1f} ms   max {max(values):7.1f} ms")
+    print(f"{'first-paint path':>18}: {', '.join(samples[-1]['paint_path']) or 'none'}")
+    print(f"{'background':>18}: {', '.join(samples[-1]['background']) or 'none'}")
+
+    if args.importtime:
+        lines = run_probe(['-X', 'importtime']).stderr.splitlines()
+        rows = []
+        for line in lines:
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, self_us, cumulative_us, name = [part.strip() for part in line.split('|')]
+            rows.append((int(cumulative_us), name))
+        print('\nslowest top-level imports (cumulative ms):')
+        for cumulative_us, name in sorted(rows, reverse=True)[:15]:
+            print(f"{cumulative_us / 1000:9.1f}  {name}")
+
+
+if __name__ == '__main__':
+    main()
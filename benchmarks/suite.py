@@ -0,0 +1,297 @@
+"""Deterministic performance suite run against recorded replay fixtures.
+
+Every provider call is served from the fixtures directory through
+replay_provider.FixtureSet with seeded latency and failures, so two runs
+see the same data, delays and errors. Cases:
+
+* ``risk.*``: RiskCalculator throughput (composite score, universe scoring)
+* ``provider.*``: DataProvider fetch fan-out and analytics over fixtures
+* ``page.*``: a full script rerun of every ``render_*`` page (AppTest), after
+  the background refresher has published its first snapshot
+
+Each case is timed ``--repeat`` times after a warm-up, with the garbage
+collector paused inside a sample. Results are saved to
+``benchmarks/results/<time>-<commit>.json`` and compared with the latest
+earlier result for the same fixtures and settings, so regressions between
+commits show up as percentages. The comparison uses each case's fastest
+sample, which is the least sensitive to other load on the machine. The fixtures are recorded first
+if the directory is missing (live data where API keys are set, else the
+mock generators, seeded). Run from the repository root:
+
+    python benchmarks/suite.py [--only risk provider] [--repeat 7] [--record]
+"""
+import argparse
+import gc
+import glob
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+GROUPS = ('risk', 'provider', 'page')
+UNIVERSE_COPIES = 50           # universe rows tiled to ~5,500 tickers for risk.score_universe*
+
+RECORD = r"""
+import os, sys
+sys.path.insert(0, {root!r})
+import streamlit_app
+streamlit_app.DataProvider(api_keys=streamlit_app.SERVER_API_KEYS).record_fixtures({path!r}, seed={seed})
+"""
+
+
+def git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def fingerprint(path):
+    """SHA-256 over the fixture files, so results are only compared on the same data"""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(path)):
+        digest.update(name.encode())
+        with open(os.path.join(path, name), 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:16]
+
+
+def record(path, seed):
+    env = {key: value for key, value in os.environ.items() if key != 'REPLAY_FIXTURES_PATH'}
+    subprocess.run([sys.executable, '-c', RECORD.format(root=ROOT, path=path, seed=seed)],
+                   cwd=ROOT, env=env, check=True, stderr=subprocess.DEVNULL)
+
+
+def measure(function, repeat, number=1):
+    """Seconds per call over ``repeat`` samples of ``number`` calls, after one warm-up sample.
+
+    Simulated provider failures that reach the caller are counted, not
+    raised: they are part of the replayed run.
+    """
+    from replay_provider import ReplayError
+
+    samples, errors = [], 0
+    for sample in range(repeat + 1):
+        # As timeit does: collect between samples, never during one
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for _ in range(number):
+                try:
+                    function()
+                except ReplayError:
+                    errors += bool(sample)
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        if sample:
+            samples.append(elapsed / number)
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'repeat': repeat,
+        'number': number,
+        'errors': errors
+    }
+
+
+def risk_cases(app):
+    import pandas as pd
+    from risk_calculator import RiskCalculator
+
+    provider = app.DataProvider(api_keys={'alpha_vantage': '', 'newsdata': ''})
+    inputs = provider.get_risk_inputs()
+    universe = provider.get_universe_risk_inputs(app.UNIVERSE)
+    tiled = pd.concat([universe] * UNIVERSE_COPIES, ignore_index=True)
+    moved = tiled.copy()
+    # Every 10th ticker's valuation moves between the two frames the incremental case alternates
+    moved.loc[moved.index % 10 == 0, 'pe_ratio'] *= 1.05
+    frames = [tiled, moved]
+    calculator = RiskCalculator()
+
+    def incremental():
+        calculator.score_universe_incremental(frames[0])
+        frames.reverse()
+
+    yield 'risk.overall_score', (lambda: calculator.calculate_overall_risk_score(inputs)), 2000
+    yield f'risk.score_universe[{len(tiled)}]', (lambda: calculator.score_universe(tiled)), 50
+    yield f'risk.score_universe_incremental[{len(tiled)}]', incremental, 50
+
+
+def provider_cases(app):
+    from data_cache import get_quote_cache
+
+    provider = app.DataProvider(api_keys={'alpha_vantage': '', 'newsdata': ''})
+    symbols = list(dict.fromkeys(app.HEATMAP_SYMBOLS + app.HOLDINGS))
+    price_symbols = list(dict.fromkeys(list(app.PORTFOLIO_WEIGHTS) + app.EXPOSURE_BENCHMARKS + app.NASDAQ_100))
+
+    def quotes():
+        # Cold cache each time: every symbol goes to the (replayed) provider
+        get_quote_cache().clear()
+        provider.get_stock_data_many(symbols)
+
+    def news():
+        get_quote_cache().clear()
+        provider.get_news_sentiment(app.SENTIMENT_QUERY)
+
+    yield f'provider.quotes_fanout[{len(symbols)}]', quotes, 1
+    yield 'provider.news_sentiment', news, 1
+    yield 'provider.options_analytics', provider.get_options_analytics, 1
+    yield f'provider.price_history[{len(price_symbols)}]', (lambda: provider.get_price_history(price_symbols)), 1
+    yield 'provider.universe_inputs', (lambda: provider.get_universe_risk_inputs(app.UNIVERSE)), 5
+
+
+def wait_for_refresh(timeout):
+    """Block until the app's background refresher has published its first cycle"""
+    from refresh_worker import BackgroundRefresher
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        refreshers = [item for item in gc.get_objects() if isinstance(item, BackgroundRefresher)]
+        if refreshers and all(refresher.cycles for refresher in refreshers):
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"No refresh cycle within {timeout}s")
+
+
+def page_cases(app):
+    from streamlit.testing.v1 import AppTest
+
+    test = AppTest.from_file(os.path.join(ROOT, 'streamlit_app.py'), default_timeout=300)
+    test.run()
+    wait_for_refresh(300)
+
+    def render(page):
+        test.sidebar.selectbox[0].select(page).run()
+        if test.exception:
+            raise RuntimeError(f"{page}: {test.exception[0].message}")
+
+    for page, method in app.PAGES.items():
+        yield f'page.{method}', (lambda page=page: render(page)), 1
+
+
+CASES = {'risk': risk_cases, 'provider': provider_cases, 'page': page_cases}
+
+
+def latest_baseline(result):
+    """Most recent earlier result with the same fixtures and replay settings"""
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')), reverse=True):
+        with open(path) as handle:
+            earlier = json.load(handle)
+        if earlier['fixtures'] == result['fixtures'] and earlier['replay'] == result['replay']:
+            return path, earlier
+    return None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=os.path.join(ROOT, 'data', 'fixtures'))
+    parser.add_argument('--record', action='store_true', help="re-record the fixtures first")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--compare', help="results file to compare with (default: latest matching)")
+    parser.add_argument('--threshold', type=float, default=0.15, help="slowdown of the fastest sample flagged as a regression")
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    fixtures = os.path.abspath(args.fixtures)
+    if args.record or not os.path.isdir(fixtures):
+        print(f"Recording fixtures to {fixtures}")
+        record(fixtures, args.seed)
+
+    # Provider configuration is read at import time, so it is set before the app is imported.
+    # Local data files and caches are pointed at an empty directory so only fixtures are served.
+    scratch = tempfile.mkdtemp(prefix='suite-')
+    os.environ.update({
+        'REPLAY_FIXTURES_PATH': fixtures,
+        'REPLAY_LATENCY_MS': str(args.latency_ms),
+        'REPLAY_JITTER_MS': str(args.jitter_ms),
+        'REPLAY_ERROR_RATE': str(args.error_rate),
+        'REPLAY_SEED': str(args.seed),
+        'ALPHA_VANTAGE_KEY': '',
+        'NEWSDATA_API_KEY': '',
+        'REFRESH_INTERVAL': str(24 * 3600 * 1000),
+        'FUNDAMENTALS_CACHE_DIR': os.path.join(scratch, 'fundamentals'),
+        'PRICE_HISTORY_PATH': os.path.join(scratch, 'prices.parquet'),
+        'OPTIONS_CHAIN_PATH': os.path.join(scratch, 'options_chain.parquet'),
+        'NEWS_REPLAY_PATH': os.path.join(scratch, 'news.jsonl'),
+        'BACKTEST_INPUTS_PATH': os.path.join(scratch, 'risk_inputs.parquet'),
+        'ALERT_RULES_PATH': os.path.join(scratch, 'alert_rules.json'),
+        'HISTORY_DB_PATH': os.path.join(scratch, 'history.db'),
+        'BAR_STORE_PATH': os.path.join(scratch, 'bars.bin'),
+        'REDIS_URL': ''
+    })
+    sys.path.insert(0, ROOT)
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+    import streamlit_app as app
+    import numpy as np
+    import pandas as pd
+
+    result = {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': f"{platform.machine()} x{os.cpu_count()}",
+        'fixtures': fingerprint(fixtures),
+        'replay': {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+                   'error_rate': args.error_rate, 'seed': args.seed},
+        'cases': {}
+    }
+    baseline_path, baseline = latest_baseline(result)
+    if args.compare:
+        baseline_path = args.compare
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+    if baseline is not None:
+        print(f"Baseline: {os.path.relpath(baseline_path, ROOT)} ({baseline['commit']})")
+
+    print(f"{'case':<44} {'median ms':>10} {'min ms':>9} {'stdev':>6} {'errors':>6} {'base min':>9} {'change':>8}")
+    regressions = []
+    for group in args.only:
+        for name, function, number in CASES[group](app):
+            stats = measure(function, args.repeat, number)
+            result['cases'][name] = stats
+            line = (f"{name:<44} {stats['median'] * 1000:>10.3f} {stats['min'] * 1000:>9.3f} "
+                    f"{stats['stdev'] / stats['median']:>6.0%} {stats['errors']:>6} ")
+            before = (baseline or {}).get('cases', {}).get(name)
+            if before is not None:
+                change = stats['min'] / before['min'] - 1
+                flag = '  REGRESSION' if change > args.threshold else ''
+                if flag:
+                    regressions.append(name)
+                line += f"{before['min'] * 1000:>9.3f} {change:>+8.1%}{flag}"
+            print(line)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit'] or 'nogit'}.json")
+        with open(path, 'w') as handle:
+            json.dump(result, handle, indent=1, sort_keys=True)
+        print(f"Saved {os.path.relpath(path, ROOT)}")
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
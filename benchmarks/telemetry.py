@@ -0,0 +1,66 @@
+"""Per-call overhead of the telemetry spans.
+
+Times an empty function called directly, through the ``timed`` decorator
+and inside a ``span`` block, with the registry enabled and disabled, and
+the cost of rendering the Prometheus and JSON-lines exports for a
+registry with as many series as the dashboard records. Run from the
+repository root:
+
+    python benchmarks/telemetry.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry import Registry  # noqa: E402
+
+SERIES = 40
+
+
+def per_call(function, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    def noop():
+        pass
+
+    baseline = per_call(noop, args.calls)
+    print(f"{'variant':<28} {'ns/call':>9} {'overhead ns':>12}")
+    print(f"{'direct call':<28} {baseline * 1e9:>9.0f} {0:>12.0f}")
+    for enabled in (True, False):
+        registry = Registry(enabled=enabled)
+        decorated = registry.timed('bench')(noop)
+
+        def in_span():
+            with registry.span('bench', 'span'):
+                pass
+
+        state = 'on' if enabled else 'off'
+        for label, function in ((f"timed decorator ({state})", decorated), (f"span block ({state})", in_span)):
+            cost = per_call(function, args.calls)
+            print(f"{label:<28} {cost * 1e9:>9.0f} {(cost - baseline) * 1e9:>12.0f}")
+
+    registry = Registry()
+    for i in range(SERIES):
+        for j in range(1000):
+            registry.observe('bench', f'series{i}', (j % 97) * 1e-4)
+    for label, export in (("prometheus()", registry.prometheus), ("json_lines()", registry.json_lines)):
+        started = time.perf_counter()
+        text = export()
+        print(f"{label:<28} {(time.perf_counter() - started) * 1000:>9.2f} ms for {SERIES} series, "
+              f"{len(text) / 1e3:,.1f} kB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Watchlist ranking cost per refresh as the watchlist grows.
+
+Compares the WatchlistIndex (skip lists re-ranked only for symbols whose
+score or change moved) with sorting the whole watchlist DataFrame for
+every query, for a refresh that moves a share of the symbols followed by
+top-K and risk-range queries. Run from the repository root:
+
+    python benchmarks/watchlist_index.py [--symbols 500 5000] [--moved 0.1]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from watchlist_index import WatchlistIndex  # noqa: E402
+
+TOP_K = 24
+REFRESHES = 20
+QUERIES = 10
+
+
+def make_table(symbols, rng):
+    return pd.DataFrame({
+        'risk': rng.integers(0, 101, symbols),
+        'change': rng.normal(0, 2.5, symbols)
+    }, index=pd.Index([f'S{i:05d}' for i in range(symbols)], name='symbol'))
+
+
+def move(table, share, rng):
+    moved = rng.random(len(table)) < share
+    table = table.copy()
+    table.loc[moved, 'risk'] = np.clip(table['risk'][moved] + rng.integers(-5, 6, moved.sum()), 0, 100)
+    table.loc[moved, 'change'] = table['change'][moved] + rng.normal(0, 0.5, moved.sum())
+    return table
+
+
+def query_sorted(table):
+    for _ in range(QUERIES):
+        table.sort_values('risk', ascending=False).head(TOP_K)
+        table.sort_values('change', ascending=False).head(TOP_K)
+        in_range = table[table['risk'].between(40, 60)]
+        in_range.sort_values('risk', ascending=False).head(TOP_K)
+
+
+def query_index(index):
+    for _ in range(QUERIES):
+        index.top(TOP_K)
+        index.top(TOP_K, by='change')
+        index.range(40, 60, limit=TOP_K)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', nargs='+', type=int, default=[500, 5000])
+    parser.add_argument('--moved', type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{'symbols':>8} {'build ms':>9} {'update ms':>10} {'moved':>6} "
+          f"{'index query ms':>15} {'sort query ms':>14}")
+    for symbols in args.symbols:
+        rng = np.random.default_rng(0)
+        table = make_table(symbols, rng)
+        index = WatchlistIndex()
+        started = time.perf_counter()
+        index.update_many(table)
+        build = time.perf_counter() - started
+        updates, moves, indexed, sorted_ = [], 0, [], []
+        for _ in range(REFRESHES):
+            table = move(table, args.moved, rng)
+            started = time.perf_counter()
+            moves += index.update_many(table)
+            updates.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            query_index(index)
+            indexed.append((time.perf_counter() - started) / QUERIES)
+            started = time.perf_counter()
+            query_sorted(table)
+            sorted_.append((time.perf_counter() - started) / QUERIES)
+        print(f"{symbols:>8,} {build * 1000:>9.2f} {np.median(updates) * 1000:>10.2f} {moves // REFRESHES:>6,} "
+              f"{np.median(indexed) * 1000:>15.3f} {np.median(sorted_) * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
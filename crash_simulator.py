@@ -0,0 +1,144 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dashboard_state import REGIME_BOUNDS, REGIME_LABELS
+from risk_calculator import RISK_INPUT_COLUMNS, VECTOR_SCORERS, RiskCalculator, _vector_composite
+
+SIMULATION_PATHS = int(os.environ.get('SIMULATION_PATHS', 1_000_000))
+CHUNK_PATHS = 65536            # paths per chunk; bounds working memory at ~25 MB per worker
+TAIL_DOF = 4                   # Student-t degrees of freedom: shocks cluster in crashes
+WITHIN_FAMILY = 0.7            # share of an input's shock variance driven by its family factor
+
+FAMILIES = list(RISK_INPUT_COLUMNS)
+
+# One-sigma shock per input, signed so a positive shock is a sell-off:
+# margins, growth, prices, multiples and sentiment fall; spreads, IV and put skew rise
+SHOCK_SCALES = {
+    'fcf_margin': -0.03,
+    'revenue_growth': -0.05,
+    'price_change': -0.15,
+    'pe_ratio': -10.0,
+    'price_to_sales': -4.0,
+    'credit_spreads': 0.5,
+    'breadth': -0.10,
+    'iv_level': 0.05,
+    'skew': 0.03,
+    'news_sentiment': -0.10,
+    'social_sentiment': -0.08
+}
+
+# Correlation of the five family factors; leverage stress and options move together in a crash
+FAMILY_CORRELATION = np.array([
+    # fundamentals valuation leverage options sentiment
+    [1.00, 0.50, 0.40, 0.30, 0.30],
+    [0.50, 1.00, 0.50, 0.50, 0.50],
+    [0.40, 0.50, 1.00, 0.70, 0.50],
+    [0.30, 0.50, 0.70, 1.00, 0.60],
+    [0.30, 0.50, 0.50, 0.60, 1.00]
+])
+
+
+def _column_layout():
+    """(column names, family index of each column) in RISK_INPUT_COLUMNS order"""
+    names, families = [], []
+    for position, family in enumerate(FAMILIES):
+        for name in RISK_INPUT_COLUMNS[family]:
+            names.append(name)
+            families.append(position)
+    return names, np.array(families)
+
+
+def _simulate_chunk(args):
+    """Score ``paths`` shocked copies of ``base``; returns count arrays only, never the paths"""
+    seed, paths, base, scales, cholesky, severity = args
+    names, families = _column_layout()
+    rng = np.random.default_rng(seed)
+    factors = rng.standard_normal((paths, len(FAMILIES))) @ cholesky.T
+    noise = rng.standard_normal((paths, len(names)))
+    shocks = np.sqrt(WITHIN_FAMILY) * factors[:, families] + np.sqrt(1 - WITHIN_FAMILY) * noise
+    # Multivariate Student-t: one variance draw per path scales every input together
+    shocks *= np.sqrt(TAIL_DOF / rng.chisquare(TAIL_DOF, (paths, 1)))
+    values = base + severity * scales * shocks
+
+    def col(name):
+        return values[:, names.index(name)]
+
+    scores = {family: VECTOR_SCORERS[family](col) for family in FAMILIES}
+    composite = _vector_composite(scores)
+    return (
+        np.bincount(composite, minlength=101),
+        np.array([scores[family].sum() for family in FAMILIES], dtype=np.float64)
+    )
+
+
+class CrashSimulator:
+    """Monte Carlo distribution of the composite risk score under correlated shocks.
+
+    Each path draws one fat-tailed shock per family, correlated through
+    FAMILY_CORRELATION, plus an idiosyncratic shock per input, and rescores
+    the shocked inputs with the vectorized risk scorers. Paths are generated
+    and scored ``chunk_size`` at a time and only score counts are kept, so
+    memory does not grow with the number of paths. Every chunk has its own
+    seed spawned from ``seed``, so results are identical with or without a
+    process pool.
+    """
+
+    def __init__(self, paths=SIMULATION_PATHS, chunk_size=CHUNK_PATHS, seed=0,
+                 severity=1.0, workers=0):
+        self.paths = paths
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.severity = severity
+        self.workers = workers
+        self._cholesky = np.linalg.cholesky(FAMILY_CORRELATION)
+
+    def _chunks(self, base):
+        names, _ = _column_layout()
+        scales = np.array([SHOCK_SCALES[name] for name in names])
+        sizes = [self.chunk_size] * (self.paths // self.chunk_size)
+        if self.paths % self.chunk_size:
+            sizes.append(self.paths % self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        return [(seed, size, base, scales, self._cholesky, self.severity) for seed, size in zip(seeds, sizes)]
+
+    def run(self, inputs):
+        """Simulate shocks around ``inputs`` ({family: {column: value}}, as for calculate_overall_risk_score)"""
+        names, _ = _column_layout()
+        flat = {name: value for family in inputs.values() for name, value in family.items()}
+        # Missing inputs count as 0, as in the scalar methods
+        base = np.array([float(flat.get(name, 0)) for name in names])
+        chunks = self._chunks(base)
+        if self.workers and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_simulate_chunk, chunks))
+        else:
+            results = [_simulate_chunk(chunk) for chunk in chunks]
+        histogram = sum(result[0] for result in results)
+        family_totals = sum(result[1] for result in results)
+        base_score = RiskCalculator().calculate_overall_risk_score(inputs)
+        return self._summarize(histogram, family_totals, base_score)
+
+    def _summarize(self, histogram, family_totals, base_score):
+        scores = np.arange(len(histogram))
+        total = histogram.sum()
+        cdf = np.cumsum(histogram) / total
+        mean = float(scores @ histogram / total)
+        regime_counts = np.add.reduceat(histogram, (0,) + REGIME_BOUNDS)
+        current = int(np.searchsorted(REGIME_BOUNDS, base_score, side='right'))
+        return {
+            'paths': int(total),
+            'seed': self.seed,
+            'base_score': base_score,
+            'current_regime': REGIME_LABELS[current],
+            'mean': mean,
+            'std': float(np.sqrt((scores - mean) ** 2 @ histogram / total)),
+            'percentiles': {q: int(np.searchsorted(cdf, q / 100)) for q in (1, 5, 25, 50, 75, 95, 99)},
+            'histogram': histogram,
+            'family_means': dict(zip(FAMILIES, (family_totals / total).tolist())),
+            # Probability of each regime after the shock, starting from the current one
+            'regime_transitions': dict(zip(REGIME_LABELS, (regime_counts / total).tolist())),
+            'p_escalation': float(regime_counts[current + 1:].sum() / total),
+            'p_deescalation': float(regime_counts[:current].sum() / total)
+        }
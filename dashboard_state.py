@@ -0,0 +1,257 @@
+import threading
+from bisect import bisect_right
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from alert_rules import AlertEngine, snapshot_tables
+from risk_calculator import RISK_WEIGHTS
+from watchlist_index import WatchlistIndex
+
+DRIVER_LABELS = {
+    'fundamentals': 'Fundamental Divergence',
+    'valuation': 'Valuation Stretch',
+    'leverage': 'Leverage & Liquidity Stress',
+    'options': 'Options Euphoria',
+    'sentiment': 'Sentiment Crowding'
+}
+
+
+class FrozenMapping(Mapping):
+    """Read-only mapping whose pandas values are handed out as shallow copies.
+
+    The stored frames hold read-only arrays, so writing into a returned
+    frame copies first (or raises on pandas without copy-on-write) and
+    adding or replacing a column changes only that copy. Every session
+    can mutate what it reads without touching the shared state.
+    """
+
+    __slots__ = ('_items',)
+
+    def __init__(self, items=()):
+        self._items = dict(items)
+
+    def __getitem__(self, key):
+        value = self._items[key]
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy(deep=False)
+        return value
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return f"FrozenMapping({self._items!r})"
+
+
+def _read_only(array):
+    array = np.array(array)
+    array.flags.writeable = False
+    return array
+
+
+def _frozen_pandas(value):
+    """Private copy of a frame or series with its NumPy-backed columns read-only"""
+    if isinstance(value, pd.Series):
+        if isinstance(value.dtype, np.dtype):
+            return pd.Series(_read_only(value.to_numpy()), index=value.index, name=value.name, copy=False)
+        return value.copy()
+    # One array per column, so no consolidation copies them back into a writable block
+    columns = {name: _read_only(column.to_numpy()) if isinstance(column.dtype, np.dtype) else column.copy()
+               for name, column in value.items()}
+    return pd.DataFrame(columns, index=value.index, columns=value.columns, copy=False)
+
+
+def freeze(value):
+    """Deep read-only copy of ``value``, shared by every session without further copying.
+
+    Mappings become FrozenMappings, lists and tuples become tuples, NumPy
+    arrays and pandas objects become read-only copies, and everything
+    else is kept as is.
+    """
+    if isinstance(value, Mapping):
+        return FrozenMapping((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return _read_only(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return _frozen_pandas(value)
+    return value
+
+
+# Lowest score of every regime above "Healthy Expansion"
+REGIME_BOUNDS = (35, 55, 75)
+REGIME_LABELS = ("Healthy Expansion", "Late-Cycle Froth", "Bubble Risk Elevated", "Bubble / Unwind Risk")
+REGIME_COLORS = ("green", "yellow", "orange", "red")
+
+
+def risk_regime(score):
+    """Return (regime label, color) for a 0-100 risk score"""
+    regime = bisect_right(REGIME_BOUNDS, score)
+    return REGIME_LABELS[regime], REGIME_COLORS[regime]
+
+
+@dataclass(frozen=True)
+class DashboardState:
+    """Everything the pages render, computed once per refresh cycle and deep-frozen (see ``freeze``)"""
+    version: int
+    created_at: datetime
+    risk_score: int
+    regime: str
+    color: str
+    components: FrozenMapping
+    drivers: tuple
+    alerts: tuple
+    watchlist: tuple
+    indicators: FrozenMapping
+    news_summary: FrozenMapping = field(default_factory=FrozenMapping)
+    topics: tuple = ()
+    bubble_phrases: tuple = ()
+    news: tuple = ()
+    options: FrozenMapping = field(default_factory=FrozenMapping)
+    exposure: FrozenMapping = field(default_factory=FrozenMapping)
+    scenarios: FrozenMapping = field(default_factory=FrozenMapping)
+    fundamentals: FrozenMapping = field(default_factory=FrozenMapping)
+
+
+def _percent_change(quote):
+    previous = quote['price'] - quote['change']
+    return quote['change'] / previous * 100 if previous else 0.0
+
+
+def watchlist_table(snapshot, symbols, default_risk=0):
+    """Risk score and daily change (%) of each watchlist symbol, one row per symbol.
+
+    Symbols the universe scores do not cover get ``default_risk``. The
+    change comes from the live quote where there is one, else from the
+    last daily close (``daily_changes``), else NaN.
+    """
+    index = pd.Index(list(dict.fromkeys(symbols)), name='symbol')
+    universe = snapshot.get('universe_risk')
+    risk = pd.Series(default_risk, index=index, dtype=np.int64)
+    if universe is not None:
+        risk = universe['scores']['overall'].reindex(index).fillna(default_risk).astype(np.int64)
+    change = pd.Series(np.nan, index=index)
+    quotes = snapshot.get('quotes')
+    if quotes is not None:
+        ok = quotes[quotes['status'] != 'error']
+        previous = ok['price'] - ok['change']
+        change = (ok['change'] / previous.where(previous != 0) * 100).reindex(index)
+    daily = snapshot.get('daily_changes')
+    if daily is not None:
+        change = change.fillna(daily.reindex(index))
+    return pd.DataFrame({'risk': risk, 'change': change})
+
+
+def build_dashboard_state(snapshot, watchlist, alerts=None, watchlist_index=None):
+    """Derive the shared DashboardState from a refresher Snapshot.
+
+    ``alerts`` and ``watchlist_index`` come from a long-lived AlertEngine and
+    WatchlistIndex that have already seen this snapshot; without them, both
+    are built from this snapshot alone.
+    """
+    risk = snapshot.get('risk') or {}
+    score = risk.get('score', 0)
+    components = risk.get('components', {})
+    inputs = risk.get('inputs', {})
+    regime, color = risk_regime(score)
+
+    drivers = []
+    for family, component in sorted(components.items(),
+                                    key=lambda item: item[1] * RISK_WEIGHTS[item[0]],
+                                    reverse=True)[:4]:
+        level = "High" if component >= 50 else "Medium" if component >= 25 else "Low"
+        drivers.append({
+            'driver': DRIVER_LABELS[family],
+            'impact': f"+{component * RISK_WEIGHTS[family]:.0f} pts",
+            'risk': level
+        })
+
+    if alerts is None:
+        engine = AlertEngine()
+        engine.evaluate(snapshot_tables(snapshot), now=snapshot.created_at.timestamp())
+        alerts = engine.active()
+    options = inputs.get('options', {})
+
+    if watchlist_index is None:
+        watchlist_index = WatchlistIndex()
+        watchlist_index.update_many(watchlist_table(snapshot, watchlist, default_risk=score))
+    # Highest risk first
+    items = watchlist_index.top(len(watchlist_index))
+
+    quotes = snapshot.get('quotes')
+    indicators = {}
+    leverage = inputs.get('leverage', {})
+    if 'breadth' in leverage:
+        indicators['Market Breadth'] = f"{leverage['breadth'] * 100:.1f}%"
+    if 'skew' in options:
+        indicators['Options Skew'] = f"{options['skew'] * 100:.1f}%"
+    if quotes is not None and {'NVDA', 'SOXX'} <= set(quotes.index):
+        relative = _percent_change(quotes.loc['NVDA']) - _percent_change(quotes.loc['SOXX'])
+        indicators['NVDA vs SOXX'] = f"{relative:.1f}%"
+
+    feed = snapshot.get('news') or {}
+
+    return DashboardState(
+        version=snapshot.version,
+        created_at=snapshot.created_at,
+        risk_score=score,
+        regime=regime,
+        color=color,
+        components=freeze(components),
+        drivers=freeze(drivers),
+        alerts=freeze(alerts),
+        watchlist=freeze(items),
+        indicators=freeze(indicators),
+        news_summary=freeze({key: feed[key] for key in ('sentiment', 'intensity', 'article_count') if key in feed}),
+        topics=freeze(feed.get('topics', [])),
+        bubble_phrases=freeze(feed.get('phrases', [])),
+        news=freeze(feed.get('recent', [])),
+        options=freeze(snapshot.get('options') or {}),
+        exposure=freeze(snapshot.get('exposure') or {}),
+        scenarios=freeze(snapshot.get('scenarios') or {}),
+        fundamentals=freeze(snapshot.get('fundamentals') or {})
+    )
+
+
+class DashboardStateService:
+    """Builds one DashboardState per refresh cycle and hands the same object to every session"""
+
+    def __init__(self, watchlist, alert_rules=None):
+        self.watchlist = list(watchlist)
+        self.alerts = AlertEngine(alert_rules)
+        self.watchlist_index = WatchlistIndex()
+        self.builds = 0
+        self._state = None
+        self._folded_version = 0
+        self._lock = threading.Lock()
+
+    def update(self, snapshot):
+        """Snapshot listener: evaluate alert rules, re-rank the watchlist and rebuild the shared state"""
+        with self._lock:
+            # Rules keep history (crossings, rate of change), so each snapshot is folded in once, in order
+            if snapshot.version > self._folded_version:
+                self.alerts.evaluate(snapshot_tables(snapshot), now=snapshot.created_at.timestamp())
+                # Only symbols whose score or change moved are re-ranked
+                score = (snapshot.get('risk') or {}).get('score', 0)
+                self.watchlist_index.update_many(watchlist_table(snapshot, self.watchlist, default_risk=score))
+                self._folded_version = snapshot.version
+            alerts = self.alerts.active()
+        state = build_dashboard_state(snapshot, self.watchlist, alerts=alerts,
+                                      watchlist_index=self.watchlist_index)
+        with self._lock:
+            if self._state is None or state.version > self._state.version:
+                self._state = state
+                self.builds += 1
+        return state
+
+    def current(self):
+        # Single attribute read; sessions never block on a rebuild
+        return self._state
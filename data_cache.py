@@ -0,0 +1,215 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Time-to-live (seconds) for each class of provider data
+DEFAULT_TTLS = {
+    'intraday': 60,            # quotes move every tick
+    'news': 15 * 60,           # news sentiment aggregates
+    'daily': 6 * 60 * 60,      # fundamentals and overviews change at most daily
+}
+
+# Which data class each provider endpoint belongs to
+ENDPOINT_DATA_CLASSES = {
+    'GLOBAL_QUOTE': 'intraday',
+    'TIME_SERIES_INTRADAY': 'intraday',
+    'TIME_SERIES_DAILY': 'daily',
+    'OVERVIEW': 'daily',
+    'INCOME_STATEMENT': 'daily',
+    'CASH_FLOW': 'daily',
+    'NEWS': 'news',
+}
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def _estimate_size(value):
+    """Rough in-memory size of a cached value in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + _estimate_size(item)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += _estimate_size(item)
+    return size
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'expires_at', 'size')
+
+    def __init__(self, value, stored_at, expires_at, size):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.size = size
+
+
+class _Inflight:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QuoteCache:
+    """Thread-safe LRU cache with per-data-class TTLs and a memory cap.
+
+    Keys are ``(provider, symbol, endpoint)`` tuples. Concurrent misses for
+    the same key are collapsed so only one caller hits the upstream API.
+    """
+
+    def __init__(self, ttls=None, max_bytes=DEFAULT_MAX_BYTES, clock=time.monotonic):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def ttl_for(self, endpoint):
+        """Return the TTL in seconds for an endpoint's data class"""
+        data_class = ENDPOINT_DATA_CLASSES.get(endpoint, 'intraday')
+        return self.ttls.get(data_class, self.ttls['intraday'])
+
+    def get(self, provider, symbol, endpoint):
+        """Return a fresh cached value or None"""
+        key = (provider, symbol, endpoint)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.value
+
+    def get_stale(self, provider, symbol, endpoint):
+        """Return the cached value even if its TTL has passed, or None"""
+        with self._lock:
+            entry = self._entries.get((provider, symbol, endpoint))
+            return entry.value if entry is not None else None
+
+    def set(self, provider, symbol, endpoint, value):
+        """Store a value under its endpoint's TTL"""
+        key = (provider, symbol, endpoint)
+        now = self._clock()
+        entry = _Entry(value, now, now + self.ttl_for(endpoint), _estimate_size(value))
+        with self._lock:
+            self._store(key, entry)
+
+    def get_or_fetch(self, provider, symbol, endpoint, fetch):
+        """Return the cached value, calling ``fetch()`` once on a miss"""
+        key = (provider, symbol, endpoint)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _Inflight()
+                self._inflight[key] = inflight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
+
+        try:
+            value = fetch()
+        except Exception as error:
+            inflight.error = error
+            raise
+        else:
+            inflight.value = value
+            if value is not None:
+                self.set(provider, symbol, endpoint, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    def invalidate(self, provider=None, symbol=None, endpoint=None):
+        """Drop every entry matching the given key parts"""
+        with self._lock:
+            for key in list(self._entries):
+                if ((provider is None or key[0] == provider) and
+                        (symbol is None or key[1] == symbol) and
+                        (endpoint is None or key[2] == endpoint)):
+                    self._bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current footprint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'coalesced': self.coalesced,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _lookup(self, key):
+        # Caller holds the lock. Expired entries stay until LRU eviction so
+        # they can still be served as stale values when a provider is throttled.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, entry):
+        # Caller holds the lock
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+
+# Process-wide instance shared by every Streamlit session
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_quote_cache():
+    """Return the process-wide QuoteCache"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = QuoteCache()
+        return _shared_cache
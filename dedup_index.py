@@ -0,0 +1,165 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from phrase_detector import tokenize
+
+NUM_PERM = 64                  # MinHash signature length
+BANDS = 16                     # LSH bands of NUM_PERM // BANDS rows each
+SHINGLE_WORDS = 3              # words per shingle
+SIMILARITY = 0.6               # estimated Jaccard at or above which two articles are the same story
+WINDOW_SECONDS = 48 * 60 * 60  # syndicated copies older than this are forgotten
+MAX_ENTRIES = 20000            # hard cap on indexed articles
+MAX_BUCKET = 32                # newest keys kept per LSH bucket, bounding candidates per lookup
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """crc32 hashes of the overlapping ``size``-word shingles of ``text``"""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return np.array([zlib.crc32(' '.join(tokens).encode())], dtype=np.uint64)
+    return np.fromiter(
+        (zlib.crc32(' '.join(tokens[i:i + size]).encode()) for i in range(len(tokens) - size + 1)),
+        dtype=np.uint64, count=len(tokens) - size + 1
+    )
+
+
+class MinHasher:
+    """MinHash signatures from ``num_perm`` universal hash functions (seeded, so stable across runs)"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        # h(x) = (a*x + b) mod p, truncated to 32 bits; a, b < 2**32 keep a*x below 2**64
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, text):
+        values = shingles(text)
+        hashed = (self._a * values + self._b) % np.uint64(_PRIME) & _MAX_HASH
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+class _Entry:
+    __slots__ = ('signature', 'band_keys', 'ts')
+
+    def __init__(self, signature, band_keys, ts):
+        self.signature = signature
+        self.band_keys = band_keys
+        self.ts = ts
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of recent articles for constant-time near-duplicate checks.
+
+    Each article's signature is split into bands; articles sharing any band
+    bucket are candidates and are confirmed by their estimated Jaccard
+    similarity. Buckets keep only their ``max_bucket`` newest keys, so a
+    lookup checks a bounded number of candidates however many near-identical
+    templates are indexed. Entries expire after ``window`` seconds and the
+    index never holds more than ``max_entries`` articles.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=SIMILARITY,
+                 window=WINDOW_SECONDS, max_entries=MAX_ENTRIES, max_bucket=MAX_BUCKET,
+                 clock=time.time):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = window
+        self.max_entries = max_entries
+        self.max_bucket = max_bucket
+        self.clock = clock
+        self._entries = OrderedDict()          # key -> _Entry, oldest first
+        self._buckets = [{} for _ in range(bands)]   # band key -> {article key: None}, oldest first
+        self._lock = threading.Lock()
+        self.duplicates = 0
+        self.evictions = 0
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _best_match(self, signature, band_keys):
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(band_key, ()))
+        if not candidates:
+            return None
+        candidates = list(candidates)
+        matrix = np.stack([self._entries[candidate].signature for candidate in candidates])
+        similarity = np.count_nonzero(matrix == signature, axis=1) / len(signature)
+        best = int(similarity.argmax())
+        return candidates[best] if similarity[best] >= self.threshold else None
+
+    def add(self, key, text, ts=None):
+        """Index an article; returns the key of the story it duplicates, else None.
+
+        Duplicates are not indexed themselves, so every copy of a story is
+        matched against its first-seen version.
+        """
+        ts = self.clock() if ts is None else ts
+        signature = self.hasher.signature(text)
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            self._expire(self.clock())
+            original = self._best_match(signature, band_keys)
+            if original is not None:
+                self.duplicates += 1
+                return original
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(signature, band_keys, ts)
+            for band, band_key in enumerate(band_keys):
+                bucket = self._buckets[band].setdefault(band_key, {})
+                bucket[key] = None
+                if len(bucket) > self.max_bucket:
+                    del bucket[next(iter(bucket))]
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return None
+
+    def query(self, text):
+        """Key of an indexed near-duplicate of ``text``, without indexing it"""
+        signature = self.hasher.signature(text)
+        with self._lock:
+            return self._best_match(signature, self._band_keys(signature))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for band, band_key in enumerate(entry.band_keys):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def _expire(self, now):
+        # Entries are kept in insertion order, which tracks publish time closely enough
+        cutoff = now - self.window
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.ts >= cutoff:
+                break
+            self._remove(key)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'duplicates': self.duplicates,
+                'evictions': self.evictions
+            }
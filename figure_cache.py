@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from telemetry import span
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def fingerprint(*parts):
+    """Stable hash of chart inputs (DataFrames, dicts, lists, scalars)"""
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            labels = part.columns if isinstance(part, pd.DataFrame) else [part.name]
+            digest.update(json.dumps([str(label) for label in labels]).encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class _CachedFigure:
+    __slots__ = ('figure', 'source', 'version')
+
+    def __init__(self, figure, source, version):
+        self.figure = figure
+        self.source = source
+        self.version = version
+
+
+class FigureCache:
+    """Process-wide LRU cache of built Plotly figures.
+
+    Figures are keyed by chart name plus a hash of their input data and
+    layout, so a chart whose data has not changed is never rebuilt. Figures
+    may also be tagged with the version of a data source; when the source
+    publishes a new version its figures are dropped.
+
+    A hit saves building and validating the figure. ``st.plotly_chart``
+    takes a Figure and serializes it itself on every call, so the JSON is
+    not cached here.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_build(self, name, build, data=None, layout=None, source=None, version=None):
+        """Return the cached figure for these inputs, calling ``build()`` on a miss"""
+        if source is not None and version is not None:
+            self.set_version(source, version)
+        key = (name, fingerprint(data, layout))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.figure
+            self.misses += 1
+        with span('figure', name):
+            figure = build()
+        entry = _CachedFigure(figure, source, version)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry.figure
+
+    def set_version(self, source, version):
+        """Record a source's current data version, dropping figures built from older ones"""
+        with self._lock:
+            if self._versions.get(source) == version:
+                return
+            self._versions[source] = version
+            for key in [key for key, entry in self._entries.items()
+                        if entry.source == source and entry.version != version]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries)
+            }
+
+
+# Process-wide cache shared by every Streamlit session
+_figure_cache = None
+_figure_cache_lock = threading.Lock()
+
+
+def get_figure_cache():
+    """Return the process-wide FigureCache"""
+    global _figure_cache
+    with _figure_cache_lock:
+        if _figure_cache is None:
+            _figure_cache = FigureCache()
+        return _figure_cache
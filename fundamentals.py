@@ -0,0 +1,331 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+FUNDAMENTALS_CACHE_DIR = os.environ.get('FUNDAMENTALS_CACHE_DIR', os.path.join('data', 'fundamentals'))
+REPORT_LAG_DAYS = 45           # quarterly results are filed within ~45 days of quarter end
+EARNINGS_WINDOW_DAYS = 10      # start polling this many days before a report is expected
+RETRY_SECONDS = 24 * 60 * 60   # poll a symbol at most daily while its report is due
+QUARTERS_KEPT = 12
+# Synthetic revenue compounds from this quarter, so a reported quarter never changes
+SYNTHETIC_BASE_QUARTER = pd.Period('2024Q1', freq='Q')
+
+# Statement endpoint -> {report field: table column}
+STATEMENT_FIELDS = {
+    'INCOME_STATEMENT': {'totalRevenue': 'revenue', 'netIncome': 'net_income'},
+    'CASH_FLOW': {'operatingCashflow': 'operating_cash_flow', 'capitalExpenditures': 'capex'},
+    # Price/FCF needs a share count, which only the balance sheet carries
+    'BALANCE_SHEET': {'commonStockSharesOutstanding': 'shares'}
+}
+TABLE_COLUMNS = [column for fields in STATEMENT_FIELDS.values() for column in fields.values()]
+
+# Quality points (fcf margin, revenue growth, FCF conversion, margin trend; 0-6) -> grade
+QUALITY_GRADES = ('D', 'C', 'B-', 'B', 'A-', 'A', 'A+')
+
+
+def _canonical(payload):
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(partial, 'wb') as handle:
+        handle.write(data)
+    os.replace(partial, path)
+
+
+class StatementCache:
+    """Content-addressed store of raw statement payloads.
+
+    Each payload is saved once under the SHA-256 of its canonical JSON, so
+    re-downloading an unchanged statement writes nothing. ``manifest.json``
+    maps (symbol, endpoint) to the current digest plus when and from which
+    provider it was fetched.
+    """
+
+    def __init__(self, root=FUNDAMENTALS_CACHE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        try:
+            with open(self.manifest_path) as handle:
+                self.manifest = json.load(handle)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest[2:]}.json")
+
+    def put(self, payload):
+        """Store ``payload``; returns its digest"""
+        data = _canonical(payload)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        return digest
+
+    def get(self, digest):
+        with open(self._object_path(digest), 'rb') as handle:
+            return json.loads(handle.read())
+
+    def entry(self, symbol):
+        return self.manifest.get(symbol)
+
+    def record(self, symbol, entry):
+        self.manifest[symbol] = entry
+
+    def save(self):
+        _write_atomic(self.manifest_path, _canonical(self.manifest))
+
+    def prune(self):
+        """Delete payloads no manifest entry points to; returns how many"""
+        live = {digest for entry in self.manifest.values() for digest in entry['digests'].values()}
+        removed = 0
+        objects = os.path.join(self.root, 'objects')
+        for folder in os.listdir(objects) if os.path.isdir(objects) else ():
+            for name in os.listdir(os.path.join(objects, folder)):
+                if folder + name[:-len('.json')] not in live:
+                    os.remove(os.path.join(objects, folder, name))
+                    removed += 1
+        return removed
+
+
+def _number(value):
+    # Alpha Vantage sends numbers as strings and "None" when missing
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _statement_rows(symbol, payloads):
+    """(symbol, fiscal date, *TABLE_COLUMNS) tuples for the latest QUARTERS_KEPT quarters"""
+    quarters = {}
+    for endpoint, fields in STATEMENT_FIELDS.items():
+        for report in (payloads.get(endpoint) or {}).get('quarterlyReports', []):
+            row = quarters.setdefault(report['fiscalDateEnding'], {})
+            for field, column in fields.items():
+                row[column] = _number(report.get(field))
+    return [(symbol, date, *(quarters[date].get(column, np.nan) for column in TABLE_COLUMNS))
+            for date in sorted(quarters)[-QUARTERS_KEPT:]]
+
+
+def _columnar(rows):
+    table = pd.DataFrame(rows, columns=['symbol', 'fiscal_date', *TABLE_COLUMNS])
+    return table.astype({'symbol': 'category', 'fiscal_date': 'datetime64[ns]',
+                         **{column: np.float32 for column in TABLE_COLUMNS}})
+
+
+def parse_statements(symbol, payloads):
+    """Quarterly statement table for one symbol from Alpha Vantage payloads ({endpoint: payload})"""
+    return _columnar(_statement_rows(symbol, payloads))
+
+
+def next_report_date(fiscal_dates):
+    """When the quarter after the latest of ``fiscal_dates`` should be reported"""
+    latest = pd.Timestamp(max(fiscal_dates)) if len(fiscal_dates) else None
+    if latest is None:
+        return None
+    return latest + pd.offsets.QuarterEnd(1) + pd.Timedelta(days=REPORT_LAG_DAYS)
+
+
+class FundamentalsStore:
+    """Quarterly statements for a universe, fetched around earnings and kept on disk.
+
+    A symbol's statements are fetched once, then again only from
+    EARNINGS_WINDOW_DAYS before its next report is expected, at most every
+    RETRY_SECONDS, until a newer quarter arrives. Parsed statements are
+    combined into one columnar table (categorical symbol, float32 values)
+    that is rebuilt only when a stored payload changes, and saved next to
+    the cache under a name derived from the payload digests.
+    """
+
+    def __init__(self, root=FUNDAMENTALS_CACHE_DIR, clock=time.time):
+        self.cache = StatementCache(root)
+        self.clock = clock
+        self.fetches = 0
+        self._table = None
+        self.table_key = None
+        self._lock = threading.Lock()
+
+    def due(self, symbols, provider, now=None):
+        """Symbols whose statements should be (re)fetched from ``provider``"""
+        now = self.clock() if now is None else now
+        due = []
+        for symbol in symbols:
+            entry = self.cache.entry(symbol)
+            if (entry is None or entry['provider'] != provider or entry.get('pending')
+                    or set(entry['digests']) != set(STATEMENT_FIELDS)):
+                due.append(symbol)
+                continue
+            expected = entry.get('next_report')
+            opens = expected - EARNINGS_WINDOW_DAYS * 86400 if expected is not None else now
+            if now >= opens and now - entry['fetched_at'] >= RETRY_SECONDS:
+                due.append(symbol)
+        return due
+
+    def refresh(self, symbols, fetch, provider, now=None):
+        """Fetch due statements with ``fetch(symbol, endpoint)``; returns the symbols refreshed.
+
+        Errors from ``fetch`` (such as an exhausted API budget) stop the
+        pass. Each statement is recorded as it arrives, so nothing fetched is
+        lost: a symbol cut short keeps its remaining endpoints ``pending``,
+        stays due, and the next pass fetches only those.
+        """
+        now = self.clock() if now is None else now
+        refreshed = []
+        changed = False
+        with self._lock:
+            try:
+                for symbol in self.due(symbols, provider, now):
+                    entry = self.cache.entry(symbol)
+                    if entry is None or entry['provider'] != provider:
+                        entry = {'provider': provider, 'next_report': None, 'digests': {}}
+                    pending = list(entry.get('pending') or STATEMENT_FIELDS)
+                    while pending:
+                        endpoint = pending[0]
+                        digest = self.cache.put(fetch(symbol, endpoint))
+                        self.fetches += 1
+                        pending = pending[1:]
+                        entry = {**entry, 'fetched_at': now, 'pending': pending,
+                                 'digests': {**entry['digests'], endpoint: digest}}
+                        self.cache.record(symbol, entry)
+                        changed = True
+                    payloads = {endpoint: self.cache.get(digest) for endpoint, digest in entry['digests'].items()}
+                    expected = next_report_date([row[1] for row in _statement_rows(symbol, payloads)])
+                    del entry['pending']
+                    entry['next_report'] = expected.timestamp() if expected is not None else None
+                    refreshed.append(symbol)
+            finally:
+                if changed:
+                    self.cache.save()
+        return refreshed
+
+    def table(self, symbols=None):
+        """Quarterly statements of every cached symbol as one table (rebuilt only on change)"""
+        with self._lock:
+            manifest = self.cache.manifest
+            key = hashlib.sha256(_canonical(
+                {symbol: entry['digests'] for symbol, entry in manifest.items()}
+            )).hexdigest()
+            if key != self.table_key:
+                self._table = self._load_table(key, manifest)
+                self.table_key = key
+            table = self._table
+        if symbols is not None:
+            table = table[table['symbol'].isin(symbols)]
+        return table
+
+    def _load_table(self, key, manifest):
+        path = os.path.join(self.cache.root, 'tables', f"{key[:16]}.parquet")
+        try:
+            return pd.read_parquet(path)
+        except (OSError, ValueError, ImportError):
+            pass
+        table = _columnar([row for symbol, entry in sorted(manifest.items())
+                           for row in _statement_rows(symbol, {endpoint: self.cache.get(digest)
+                                                               for endpoint, digest in entry['digests'].items()})])
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            table.to_parquet(path)
+        except (OSError, ImportError):
+            pass
+        return table
+
+
+def trailing(table):
+    """Trailing-twelve-month revenue, net income and FCF per symbol and quarter"""
+    table = table.sort_values(['symbol', 'fiscal_date'])
+    flows = table[['revenue', 'net_income']].astype(np.float64).assign(
+        # Alpha Vantage reports capital expenditures as a positive outflow
+        fcf=table['operating_cash_flow'].astype(np.float64) - table['capex'].astype(np.float64).abs()
+    )
+    ttm = flows.groupby(table['symbol'], observed=True).rolling(4).sum().reset_index(level=0, drop=True)
+    return pd.concat([table[['symbol', 'fiscal_date', 'shares']], ttm], axis=1).dropna(subset=['revenue'])
+
+
+def fundamental_metrics(table, prices=None):
+    """Latest fundamentals per symbol: FCF margin, revenue growth, Price/FCF and quality grade.
+
+    ``prices`` (date x symbol closes, at least a year) adds the price,
+    its one-year change and Price/FCF.
+    """
+    ttm = trailing(table)
+    ttm['fcf_margin'] = ttm['fcf'] / ttm['revenue'].where(ttm['revenue'] != 0)
+    grouped = ttm.groupby('symbol', observed=True)
+    # Year over year: the TTM four quarters earlier
+    ttm['revenue_growth'] = ttm['revenue'] / grouped['revenue'].shift(4) - 1
+    ttm['margin_trend'] = ttm['fcf_margin'] - grouped['fcf_margin'].shift(4)
+    latest = ttm.groupby('symbol', observed=True).tail(1).set_index('symbol')
+    latest.index = latest.index.astype(str)
+    metrics = latest[['fiscal_date', 'fcf_margin', 'revenue_growth']].copy()
+    conversion = latest['fcf'] / latest['net_income'].where(latest['net_income'] > 0)
+    points = (
+        np.select([latest['fcf_margin'] >= 0.25, latest['fcf_margin'] >= 0.10], [2, 1], 0) +
+        np.select([latest['revenue_growth'] >= 0.20, latest['revenue_growth'] >= 0.05], [2, 1], 0) +
+        (conversion >= 0.9).to_numpy(dtype=int) +
+        (latest['margin_trend'] > 0).to_numpy(dtype=int)
+    )
+    metrics['quality'] = np.asarray(QUALITY_GRADES)[points]
+    if prices is not None:
+        prices = prices.reindex(columns=metrics.index)
+        year_ago = prices.index[-1] - pd.DateOffset(years=1)
+        metrics['price'] = prices.iloc[-1]
+        metrics['price_change'] = prices.iloc[-1] / prices.asof(year_ago) - 1
+        market_cap = metrics['price'] * latest['shares']
+        metrics['price_fcf'] = market_cap / latest['fcf'].where(latest['fcf'] > 0)
+    return metrics
+
+
+def synthetic_statements(symbol, endpoint, quarters=QUARTERS_KEPT, as_of=None):
+    """Alpha Vantage-shaped quarterly statements for ``symbol``; the same payload for the same quarter"""
+    as_of = pd.Timestamp.now().normalize() if as_of is None else pd.Timestamp(as_of)
+    # Only quarters already reported by ``as_of`` exist
+    last = pd.offsets.QuarterEnd().rollback(as_of - pd.Timedelta(days=REPORT_LAG_DAYS))
+    dates = pd.date_range(end=last, periods=quarters, freq='QE')
+    # Seeded per symbol and fiscal date, and compounded from a fixed quarter,
+    # so a quarter never changes once reported
+    seed = zlib.crc32(symbol.encode())
+    own = np.random.default_rng(seed)
+    revenue_base, growth, margin = own.lognormal(22, 1), own.normal(0.04, 0.05), own.normal(0.15, 0.15)
+    # Sized so market cap is a lognormal multiple of sales at the ~$60 mock prices
+    shares = 4 * revenue_base * own.lognormal(2.2, 0.6) / 60
+    reports = []
+    for date in dates:
+        noise = np.random.default_rng([seed, int(date.strftime('%Y%m%d'))])
+        quarter = (date.to_period('Q') - SYNTHETIC_BASE_QUARTER).n
+        revenue = revenue_base * (1 + growth) ** quarter * noise.lognormal(0, 0.03)
+        fcf = revenue * (margin + noise.normal(0, 0.03))
+        capex = revenue * abs(noise.normal(0.06, 0.02))
+        values = {
+            'totalRevenue': revenue,
+            'netIncome': fcf * noise.uniform(0.7, 1.2),
+            'operatingCashflow': fcf + capex,
+            'capitalExpenditures': capex,
+            'commonStockSharesOutstanding': shares
+        }
+        report = {'fiscalDateEnding': date.strftime('%Y-%m-%d'), 'reportedCurrency': 'USD'}
+        report.update({field: str(int(values[field])) for field in STATEMENT_FIELDS[endpoint]})
+        reports.append(report)
+    return {'symbol': symbol, 'quarterlyReports': reports[::-1]}
+
+
+# Process-wide store shared by the refresher and every Streamlit session
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fundamentals_store():
+    """Return the process-wide FundamentalsStore for FUNDAMENTALS_CACHE_DIR"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FundamentalsStore()
+        return _store
@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import (
+    Column, Float, Index, Integer, MetaData, String, Table, and_, create_engine,
+    event, func, literal_column, select
+)
+
+from risk_calculator import RISK_INPUT_COLUMNS
+
+HISTORY_DB_PATH = os.environ.get('HISTORY_DB_PATH', os.path.join('data', 'history.db'))
+# Raw rows (one per refresh) older than this are collapsed to the last row of each day
+HISTORY_RAW_DAYS = int(os.environ.get('HISTORY_RAW_DAYS', 7))
+# Daily rows older than this are deleted (0 = keep them)
+HISTORY_RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', 730))
+
+DAY_MS = 86_400_000
+_DAILY_CACHE_SIZE = 32
+
+metadata = MetaData()
+
+
+def _series_table(name, key, value_columns):
+    """Wide table of (ts, key, values...) indexed for (key, time window) scans"""
+    return Table(
+        name, metadata,
+        Column('ts', Integer, nullable=False),          # epoch milliseconds
+        Column(key, String, nullable=False),
+        *[Column(column, Float) for column in value_columns],
+        Index(f'ix_{name}_{key}_ts', key, 'ts')
+    )
+
+
+risk_scores = _series_table(
+    'risk_scores', 'symbol',
+    ['fundamentals', 'valuation', 'leverage', 'options', 'sentiment', 'overall']
+)
+risk_inputs = _series_table(
+    'risk_inputs', 'symbol',
+    [column for columns in RISK_INPUT_COLUMNS.values() for column in columns]
+)
+quotes = _series_table('quotes', 'symbol', ['price', 'change', 'volume', 'market_cap'])
+news_sentiment = _series_table('news_sentiment', 'query', ['sentiment', 'intensity', 'article_count'])
+
+TABLES = {table.name: table for table in (risk_scores, risk_inputs, quotes, news_sentiment)}
+
+
+def _to_epoch_ms(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(pd.Timestamp(value).timestamp() * 1000)
+
+
+class HistoryStore:
+    """Append-only SQLite (WAL mode) history of risk scores and market inputs"""
+
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.engine = create_engine(
+            f'sqlite:///{path}',
+            connect_args={'check_same_thread': False}
+        )
+        event.listen(self.engine, 'connect', self._configure_connection)
+        metadata.create_all(self.engine)
+        # Bumped by every write; daily() results are cached per revision
+        self.revision = 0
+        self._daily_cache = {}
+        self._cache_lock = threading.Lock()
+        self._compacted_day = None
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets renders read while the refresher appends
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    def append(self, table_name, frame, ts=None, key=None):
+        """Append rows of ``frame`` (indexed by symbol/query) at time ``ts``"""
+        table = TABLES[table_name]
+        if frame is None or len(frame) == 0:
+            return 0
+        key = key or table.columns.keys()[1]
+        value_columns = table.columns.keys()[2:]
+        ts = _to_epoch_ms(ts if ts is not None else time.time() * 1000)
+        values = frame.reindex(columns=value_columns).astype('float64')
+        values = values.astype(object).where(values.notna(), None)
+        rows = [
+            {'ts': ts, key: str(row_key), **record}
+            for row_key, record in zip(values.index, values.to_dict('records'))
+        ]
+        with self.engine.begin() as connection:
+            connection.execute(table.insert(), rows)
+        self._invalidate()
+        return len(rows)
+
+    def _invalidate(self):
+        with self._cache_lock:
+            self.revision += 1
+            self._daily_cache.clear()
+
+    def append_record(self, table_name, key, values, ts=None):
+        """Append a single {column: value} record"""
+        frame = pd.DataFrame([values], index=[key])
+        return self.append(table_name, frame, ts=ts)
+
+    def query(self, table_name, keys=None, start=None, end=None, columns=None):
+        """Return rows for ``keys`` within [start, end] ordered by time"""
+        table = TABLES[table_name]
+        key_column = table.columns[table.columns.keys()[1]]
+        selected = [table.c.ts, key_column]
+        selected += [table.c[column] for column in (columns or table.columns.keys()[2:])]
+        statement = select(*selected)
+        if keys is not None:
+            keys = [keys] if isinstance(keys, str) else list(keys)
+            statement = statement.where(key_column.in_(keys))
+        if start is not None:
+            statement = statement.where(table.c.ts >= _to_epoch_ms(start))
+        if end is not None:
+            statement = statement.where(table.c.ts <= _to_epoch_ms(end))
+        statement = statement.order_by(table.c.ts)
+        with self.engine.connect() as connection:
+            frame = pd.DataFrame(connection.execute(statement).fetchall(),
+                                 columns=[column.name for column in selected])
+        frame['ts'] = pd.to_datetime(frame['ts'], unit='ms')
+        value_columns = [column.name for column in selected[2:]]
+        frame[value_columns] = frame[value_columns].astype('float64')
+        return frame
+
+    def pivot(self, table_name, column, keys=None, start=None, end=None):
+        """One column over time, with one series per symbol"""
+        frame = self.query(table_name, keys=keys, start=start, end=end, columns=[column])
+        key = TABLES[table_name].columns.keys()[1]
+        return frame.pivot_table(index='ts', columns=key, values=column)
+
+    def daily(self, table_name, column, keys=None, start=None, end=None, how='last'):
+        """One row per UTC day and one column per symbol, aggregated in SQL.
+
+        ``how='last'`` keeps each day's last value (the close for prices),
+        ``how='mean'`` averages the day. Only days x symbols cross the
+        connection, not every refresh, and the result is cached until the
+        next write. Treat it as read-only.
+        """
+        cache_key = (table_name, column, None if keys is None else tuple(keys), _to_epoch_ms(start),
+                     _to_epoch_ms(end), how)
+        with self._cache_lock:
+            revision = self.revision
+            cached = self._daily_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        table = TABLES[table_name]
+        key_column = table.columns[table.columns.keys()[1]]
+        day = (table.c.ts // DAY_MS).label('day')
+        if how == 'last':
+            # SQLite fills bare columns next to max() from the row holding the maximum
+            statement = select(key_column, day, table.c[column], func.max(table.c.ts))
+        elif how == 'mean':
+            statement = select(key_column, day, func.avg(table.c[column]))
+        else:
+            raise ValueError(f"Unknown daily aggregate {how!r}")
+        if keys is not None:
+            statement = statement.where(key_column.in_([keys] if isinstance(keys, str) else list(keys)))
+        if start is not None:
+            statement = statement.where(table.c.ts >= _to_epoch_ms(start))
+        if end is not None:
+            statement = statement.where(table.c.ts <= _to_epoch_ms(end))
+        statement = statement.group_by(key_column, literal_column('day'))
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).fetchall()
+        frame = pd.DataFrame([row[:3] for row in rows], columns=[key_column.name, 'day', column])
+        frame[column] = frame[column].astype('float64')
+        frame['ts'] = pd.to_datetime(frame['day'].astype('int64') * DAY_MS, unit='ms')
+        result = frame.pivot_table(index='ts', columns=key_column.name, values=column).sort_index()
+        with self._cache_lock:
+            # A write since the query started makes this result stale; do not cache it
+            if self.revision == revision:
+                if len(self._daily_cache) >= _DAILY_CACHE_SIZE:
+                    self._daily_cache.pop(next(iter(self._daily_cache)))
+                self._daily_cache[cache_key] = result
+        return result
+
+    def compact(self, now=None, raw_days=HISTORY_RAW_DAYS, retention_days=HISTORY_RETENTION_DAYS):
+        """Downsample raw rows older than ``raw_days`` to one row per symbol and day, and drop
+        rows older than ``retention_days``; returns the number of rows deleted"""
+        now = _to_epoch_ms(now if now is not None else time.time() * 1000)
+        # Whole days only, so a day is never split between raw and daily rows
+        cutoff = (now - raw_days * DAY_MS) // DAY_MS * DAY_MS
+        deleted = 0
+        with self.engine.begin() as connection:
+            for table in TABLES.values():
+                key_column = table.columns[table.columns.keys()[1]]
+                if retention_days:
+                    expired = table.delete().where(table.c.ts < now - retention_days * DAY_MS)
+                    deleted += connection.execute(expired).rowcount
+                # The last row of each (symbol, day) stays, as the day's close
+                kept = (select(literal_column('rowid'), func.max(table.c.ts))
+                        .where(table.c.ts < cutoff)
+                        .group_by(key_column, table.c.ts // DAY_MS)
+                        .subquery())
+                stale = table.delete().where(and_(
+                    table.c.ts < cutoff,
+                    literal_column('rowid').not_in(select(kept.c.rowid))
+                ))
+                deleted += connection.execute(stale).rowcount
+        if deleted:
+            self._invalidate()
+        return deleted
+
+    def compact_daily(self, now=None):
+        """Run ``compact()`` at most once per UTC day"""
+        now = _to_epoch_ms(now if now is not None else time.time() * 1000)
+        if self._compacted_day == now // DAY_MS:
+            return 0
+        self._compacted_day = now // DAY_MS
+        return self.compact(now)
+
+    def record_snapshot(self, snapshot, sentiment_query=''):
+        """Persist every score and raw input in a refresher snapshot"""
+        ts = snapshot.created_at
+        risk = snapshot.get('risk')
+        if risk is not None:
+            scores = {**risk['components'], 'overall': risk['score']}
+            self.append_record('risk_scores', 'MARKET', scores, ts=ts)
+            flat = {column: value for family in risk['inputs'].values() for column, value in family.items()}
+            self.append_record('risk_inputs', 'MARKET', flat, ts=ts)
+        universe = snapshot.get('universe_risk')
+        if universe is not None:
+            self.append('risk_scores', universe['scores'], ts=ts)
+            self.append('risk_inputs', universe['inputs'], ts=ts)
+        quote_frame = snapshot.get('quotes')
+        if quote_frame is not None:
+            self.append('quotes', quote_frame[quote_frame['status'] == 'ok'], ts=ts)
+        sentiment = snapshot.get('news_sentiment')
+        if sentiment is not None:
+            self.append_record('news_sentiment', sentiment_query, sentiment, ts=ts)
+
+
+# Process-wide store shared by every Streamlit session
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """Return the process-wide HistoryStore"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        return _store
@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+HTTP_TIMEOUT = 10
+MAX_FETCH_WORKERS = 8
+
+_session = None
+_pool = None
+_lock = threading.Lock()
+
+
+def get_http_session():
+    """Pooled HTTP session shared by every provider call in this process"""
+    global _session
+    with _lock:
+        if _session is None:
+            # Deferred so pages that never call a provider don't pay for requests
+            import requests
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_FETCH_WORKERS)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def get_fetch_pool():
+    """Bounded thread pool for fanning out provider calls"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix='provider-fetch')
+        return _pool
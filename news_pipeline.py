@@ -0,0 +1,364 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from dedup_index import NearDuplicateIndex
+from phrase_detector import get_bubble_matcher
+
+NEWSDATA_URL = 'https://newsdata.io/api/1/news'
+
+# Keyword sentiment, the same word lists as main.js analyzeSentiment
+POSITIVE_WORDS = ('growth', 'surge', 'boom', 'strong', 'excellent', 'outstanding',
+                  'revolutionary', 'breakthrough', 'dominance')
+NEGATIVE_WORDS = ('concern', 'warning', 'bubble', 'risk', 'decline', 'fall', 'crash',
+                  'scarcity', 'shortage')
+
+# Topic -> phrases that tag an article with it (matched on lowercased text)
+TOPIC_KEYWORDS = {
+    'AI Revolution': ('ai revolution', 'artificial intelligence', 'generative ai', 'ai boom'),
+    'GPU Shortage': ('gpu shortage', 'chip shortage', 'gpu supply', 'shortage of gpus'),
+    'Data Center Boom': ('data center', 'datacenter', 'hyperscaler', 'ai infrastructure'),
+    'Valuation Concerns': ('valuation', 'overvalued', 'bubble', 'price-to-earnings'),
+}
+
+WINDOW_SECONDS = 24 * 60 * 60      # rolling window for topic and sentiment stats
+BUCKET_SECONDS = 60 * 60           # stats are kept in hourly buckets
+DEDUPE_KEYS = 50000                # recently seen article keys remembered for dedupe
+RECENT_ARTICLES = 20               # newest articles kept for the news feed
+INTENSITY_SCALE = 50               # articles per hour that count as full intensity
+NEWS_MAX_PAGES = 5                 # NewsData.io pages pulled per refresh at most
+
+# Offline mode replays NewsData.io articles from this JSON-lines file
+NEWS_REPLAY_PATH = os.environ.get('NEWS_REPLAY_PATH', os.path.join('data', 'news.jsonl'))
+
+_SPACE = re.compile(r'\s+')
+# A listed word plus the rest of its word, so each word counts at most once
+_POSITIVE = re.compile(r'(?:%s)\S*' % '|'.join(POSITIVE_WORDS))
+_NEGATIVE = re.compile(r'(?:%s)\S*' % '|'.join(NEGATIVE_WORDS))
+
+
+# --- sources ---------------------------------------------------------------
+
+def newsdata_pages(fetch_page, query, max_pages=None):
+    """Yield NewsData.io result pages, newest first, following ``nextPage``.
+
+    ``fetch_page(query, page)`` returns one decoded API response. Only one
+    page is held at a time; paging stops at the last page or ``max_pages``.
+    """
+    page = None
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        payload = fetch_page(query, page)
+        pages += 1
+        yield payload.get('results') or []
+        page = payload.get('nextPage')
+        if not page:
+            return
+
+
+class JsonlReplay:
+    """Replays articles from a JSON-lines file, one NewsData.io article per line.
+
+    Each call to ``articles()`` resumes after the last line read, so a file
+    that is appended to behaves like a live feed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.errors = 0
+
+    def articles(self):
+        with open(self.path, 'rb') as handle:
+            handle.seek(self.offset)
+            for line in handle:
+                if not line.endswith(b'\n'):
+                    break                       # partial line still being written
+                self.offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    self.errors += 1
+
+
+# --- stages ----------------------------------------------------------------
+
+def _timestamp(value, default):
+    """Epoch seconds from a NewsData.io pubDate ('2024-12-16 09:30:00', UTC)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return default
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return default
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def normalize(raw_articles, clock=time.time):
+    """Map raw articles to a flat record with cleaned text; drops untitled ones"""
+    for raw in raw_articles:
+        title = _SPACE.sub(' ', raw.get('title') or '').strip()
+        if not title:
+            continue
+        description = _SPACE.sub(' ', raw.get('description') or '').strip()
+        now = clock()
+        yield {
+            'id': article_key(raw),
+            'title': title,
+            'description': description,
+            'text': f"{title} {description}".lower(),
+            'source': raw.get('source_id') or 'unknown',
+            'url': raw.get('link'),
+            'published_at': min(_timestamp(raw.get('pubDate'), now), now),
+        }
+
+
+class RecentKeys:
+    """Bounded set of recently seen keys; the oldest are forgotten first"""
+
+    def __init__(self, max_keys=DEDUPE_KEYS):
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        """Remember ``key``; return False if it was already seen"""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+        return True
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def article_key(raw):
+    """Identity of a raw article: its id, else its link, else its title"""
+    return raw.get('article_id') or raw.get('link') or (raw.get('title') or '').strip().lower()
+
+
+def dedupe(raw_articles, seen):
+    """Drop articles already in ``seen`` before any work is spent on them"""
+    for raw in raw_articles:
+        if seen.add(article_key(raw)):
+            yield raw
+
+
+def drop_syndicated(articles, index):
+    """Drop near-duplicates of a recent story (wire copies), so each story counts once"""
+    for article in articles:
+        if index.add(article['id'], article['text'], article['published_at']) is None:
+            yield article
+
+
+def keyword_sentiment(text):
+    """Score lowercased text in [-1, 1] by counting positive and negative words"""
+    score = 0.1 * (len(_POSITIVE.findall(text)) - len(_NEGATIVE.findall(text)))
+    return max(-1.0, min(1.0, score))
+
+
+def score(articles):
+    """Attach sentiment, topic tags and bubble-phrase counts to each article"""
+    matcher = get_bubble_matcher()
+    for article in articles:
+        text = article['text']
+        article['sentiment'] = keyword_sentiment(text)
+        article['topics'] = [topic for topic, phrases in TOPIC_KEYWORDS.items()
+                             if any(phrase in text for phrase in phrases)]
+        article['phrases'] = matcher.count(text)
+        yield article
+
+
+# --- aggregation -----------------------------------------------------------
+
+class RollingStats:
+    """Article count and sentiment sum over a sliding window of time buckets"""
+
+    __slots__ = ('window', 'bucket', '_buckets', 'count', 'sentiment_sum')
+
+    def __init__(self, window=WINDOW_SECONDS, bucket=BUCKET_SECONDS):
+        self.window = window
+        self.bucket = bucket
+        self._buckets = {}              # bucket start -> [count, sentiment sum]
+        self.count = 0
+        self.sentiment_sum = 0.0
+
+    def add(self, ts, sentiment, now, count=1):
+        """Count ``count`` mentions at ``ts``; returns False if older than the window"""
+        self.expire(now)
+        if ts < now - self.window:
+            return False
+        entry = self._buckets.setdefault(ts - ts % self.bucket, [0, 0.0])
+        entry[0] += count
+        entry[1] += sentiment * count
+        self.count += count
+        self.sentiment_sum += sentiment * count
+        return True
+
+    def expire(self, now):
+        cutoff = now - self.window
+        if not self._buckets or min(self._buckets) + self.bucket > cutoff:
+            return
+        for start in [start for start in self._buckets if start + self.bucket <= cutoff]:
+            count, sentiment_sum = self._buckets.pop(start)
+            self.count -= count
+            self.sentiment_sum -= sentiment_sum
+
+    def count_since(self, since):
+        return sum(entry[0] for start, entry in self._buckets.items() if start + self.bucket > since)
+
+    @property
+    def mean(self):
+        return self.sentiment_sum / self.count if self.count else 0.0
+
+
+class NewsAggregator:
+    """Rolling overall, per-topic and per-bubble-phrase sentiment and mention counts.
+
+    Memory is bounded by the number of buckets in the window and the size of
+    the recent-article feed, not by how many articles have been consumed.
+    """
+
+    def __init__(self, window=WINDOW_SECONDS, bucket=BUCKET_SECONDS,
+                 recent=RECENT_ARTICLES, clock=time.time):
+        self.window = window
+        self.bucket = bucket
+        self.clock = clock
+        self.overall = RollingStats(window, bucket)
+        self.topics = {topic: RollingStats(window, bucket) for topic in TOPIC_KEYWORDS}
+        self.phrases = {}
+        self.recent = deque(maxlen=recent)
+        self.consumed = 0
+
+    def consume(self, articles):
+        """Fold scored articles into the rolling stats; returns how many counted"""
+        counted = 0
+        for article in articles:
+            now = self.clock()
+            ts = article['published_at']
+            if not self.overall.add(ts, article['sentiment'], now):
+                continue
+            for topic in article['topics']:
+                self.topics[topic].add(ts, article['sentiment'], now)
+            for phrase, count in article['phrases'].items():
+                if phrase not in self.phrases:
+                    self.phrases[phrase] = RollingStats(self.window, self.bucket)
+                self.phrases[phrase].add(ts, article['sentiment'], now, count)
+            if not self.recent or ts >= self.recent[0]['published_at']:
+                self.recent.append({key: article[key] for key in
+                                    ('title', 'source', 'url', 'published_at', 'sentiment')})
+            counted += 1
+        self.consumed += counted
+        return counted
+
+    def summary(self):
+        """Aggregate in the shape of DataProvider.get_news_sentiment"""
+        now = self.clock()
+        self.overall.expire(now)
+        last_hour = self.overall.count_since(now - 60 * 60)
+        return {
+            'sentiment': self.overall.mean,
+            'intensity': min(1.0, last_hour / INTENSITY_SCALE),
+            'article_count': self.overall.count
+        }
+
+    def topic_stats(self):
+        """Per-topic mentions and mean sentiment, most mentioned first"""
+        now = self.clock()
+        rows = []
+        for topic, stats in self.topics.items():
+            stats.expire(now)
+            rows.append({'topic': topic, 'mentions': stats.count, 'sentiment': stats.mean})
+        return sorted(rows, key=lambda row: row['mentions'], reverse=True)
+
+    def phrase_stats(self):
+        """Bubble phrases mentioned in the window with their category, most mentioned first"""
+        now = self.clock()
+        categories = get_bubble_matcher().categories
+        rows = []
+        for phrase, stats in self.phrases.items():
+            stats.expire(now)
+            if stats.count:
+                rows.append({'phrase': phrase, 'mentions': stats.count, 'type': categories[phrase]})
+        return sorted(rows, key=lambda row: row['mentions'], reverse=True)
+
+    def recent_articles(self):
+        """Newest articles first"""
+        return sorted(self.recent, key=lambda article: article['published_at'], reverse=True)
+
+
+class NewsPipeline:
+    """dedupe -> normalize -> drop syndicated -> score -> aggregate, one article at a time"""
+
+    def __init__(self, aggregator=None, seen=None, near_duplicates=None):
+        self.aggregator = aggregator or NewsAggregator()
+        self.seen = seen or RecentKeys()
+        self.near_duplicates = near_duplicates or NearDuplicateIndex(clock=self.aggregator.clock)
+        self._replays = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, raw_articles):
+        """Run raw articles through every stage; returns how many were counted"""
+        with self._lock:
+            articles = normalize(dedupe(raw_articles, self.seen), clock=self.aggregator.clock)
+            articles = drop_syndicated(articles, self.near_duplicates)
+            return self.aggregator.consume(score(articles))
+
+    def ingest_pages(self, pages):
+        """Ingest newest-first pages until one holds articles already seen"""
+        counted = 0
+        for results in pages:
+            caught_up = any(article_key(raw) in self.seen for raw in results)
+            counted += self.ingest(results)
+            if caught_up:
+                break                           # reached what the last pull ingested
+        return counted
+
+    def replay(self, path=NEWS_REPLAY_PATH):
+        """Ingest the lines appended to a JSON-lines file since the last call"""
+        with self._lock:
+            source = self._replays.setdefault(path, JsonlReplay(path))
+        return self.ingest(source.articles())
+
+    def summary(self):
+        with self._lock:
+            return self.aggregator.summary()
+
+    def feed(self):
+        """Topic stats and recent articles for the sentiment page"""
+        with self._lock:
+            return {
+                **self.aggregator.summary(),
+                'topics': self.aggregator.topic_stats(),
+                'phrases': self.aggregator.phrase_stats(),
+                'recent': self.aggregator.recent_articles(),
+                'syndicated': self.near_duplicates.duplicates
+            }
+
+
+# Process-wide pipelines, one per search query
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_news_pipeline(query):
+    """Return the process-wide NewsPipeline for ``query``"""
+    with _pipelines_lock:
+        if query not in _pipelines:
+            _pipelines[query] = NewsPipeline()
+        return _pipelines[query]
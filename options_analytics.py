@@ -0,0 +1,260 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+# Local options-chain snapshot (CSV or Parquet); see load_chain for the columns
+OPTIONS_CHAIN_PATH = os.environ.get('OPTIONS_CHAIN_PATH', os.path.join('data', 'options_chain.parquet'))
+RISK_FREE_RATE = float(os.environ.get('RISK_FREE_RATE', 0.045))
+
+# |put delta| buckets of the volatility skew curve, 10Δ (far OTM puts) to 90Δ
+SKEW_DELTAS = [0.10, 0.25, 0.40, 0.50, 0.60, 0.75, 0.90]
+TARGET_DAYS = 30               # expiry used for IV level and skew
+CONTRACT_MULTIPLIER = 100
+
+IV_LOWER, IV_UPPER = 1e-4, 5.0
+IV_TOLERANCE = 1e-6            # in volatility, not price
+IV_MAX_ITERATIONS = 60
+
+CHAIN_COLUMNS = ['expiry', 'strike', 'option_type', 'bid', 'ask', 'volume', 'open_interest']
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def _d1(spot, strike, years, sigma, rate, dividend):
+    return (np.log(spot / strike) + (rate - dividend + 0.5 * sigma * sigma) * years) / (sigma * np.sqrt(years))
+
+
+def black_scholes(spot, strike, years, sigma, is_call, rate=0.0, dividend=0.0):
+    """Vectorized Black-Scholes (price, vega) for calls and puts"""
+    d1 = _d1(spot, strike, years, sigma, rate, dividend)
+    d2 = d1 - sigma * np.sqrt(years)
+    spot_discount = spot * np.exp(-dividend * years)
+    strike_discount = strike * np.exp(-rate * years)
+    call = spot_discount * ndtr(d1) - strike_discount * ndtr(d2)
+    put = call - spot_discount + strike_discount
+    vega = spot_discount * _norm_pdf(d1) * np.sqrt(years)
+    return np.where(is_call, call, put), vega
+
+
+def implied_volatility(price, spot, strike, years, is_call, rate=0.0, dividend=0.0,
+                       tolerance=IV_TOLERANCE, max_iterations=IV_MAX_ITERATIONS):
+    """Batch implied volatility by safeguarded Newton iteration.
+
+    Every option keeps a [lower, upper] bracket around its root. A Newton
+    step that would leave the bracket (or has near-zero vega) is replaced by
+    bisection, as in Brent's method, so deep ITM/OTM quotes still converge.
+    Only unconverged options are iterated. Prices outside the no-arbitrage
+    bounds give NaN.
+    """
+    price, spot, strike, years, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float), np.asarray(years, dtype=float), np.asarray(is_call, dtype=bool)
+    )
+    result = np.full(price.shape, np.nan)
+    spot_discount = spot * np.exp(-dividend * years)
+    strike_discount = strike * np.exp(-rate * years)
+    intrinsic = np.where(is_call, np.maximum(spot_discount - strike_discount, 0),
+                         np.maximum(strike_discount - spot_discount, 0))
+    upper_bound = np.where(is_call, spot_discount, strike_discount)
+    active = np.flatnonzero((years > 0) & (price > intrinsic) & (price < upper_bound))
+    if not len(active):
+        return result
+
+    p, s, k, t, c = price[active], spot[active], strike[active], years[active], is_call[active]
+    lower = np.full(len(active), IV_LOWER)
+    upper = np.full(len(active), IV_UPPER)
+    # Brenner-Subrahmanyam starting point
+    sigma = np.clip(np.sqrt(2 * np.pi / t) * p / s, 0.05, 1.0)
+    for _ in range(max_iterations):
+        value, vega = black_scholes(s, k, t, sigma, c, rate, dividend)
+        diff = value - p
+        # Converged once the next Newton step or the bracket is below tolerance
+        converged = (np.abs(diff) < tolerance * vega) | (upper - lower < tolerance)
+        if converged.any():
+            result[active[converged]] = sigma[converged]
+            keep = ~converged
+            active, p, s, k, t, c = active[keep], p[keep], s[keep], k[keep], t[keep], c[keep]
+            sigma, lower, upper, diff, vega = sigma[keep], lower[keep], upper[keep], diff[keep], vega[keep]
+            if not len(active):
+                break
+        # Price rises with volatility, so the sign of diff moves one side of the bracket
+        upper = np.where(diff > 0, sigma, upper)
+        lower = np.where(diff < 0, sigma, lower)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = sigma - diff / vega
+        inside = (vega > 1e-12) & (newton > lower) & (newton < upper)
+        sigma = np.where(inside, newton, 0.5 * (lower + upper))
+    else:
+        # Out of iterations: accept what is left if the bracket is narrow
+        tight = (upper - lower) < 1e-4
+        result[active[tight]] = sigma[tight]
+    return result
+
+
+def load_chain(path=OPTIONS_CHAIN_PATH):
+    """Read an options-chain snapshot from CSV or Parquet.
+
+    Required columns: expiry, strike, option_type ('C'/'P' or 'call'/'put'),
+    bid, ask, volume, open_interest. Optional: underlying_price and
+    quote_date (otherwise pass spot/as_of to analyze_chain).
+    """
+    if path.endswith('.parquet'):
+        chain = pd.read_parquet(path)
+    else:
+        chain = pd.read_csv(path)
+    missing = [column for column in CHAIN_COLUMNS if column not in chain.columns]
+    if missing:
+        raise ValueError(f"Options chain {path} is missing columns: {', '.join(missing)}")
+    return chain
+
+
+def _skew_curve(iv, put_delta):
+    """IV at the SKEW_DELTAS |put delta| points of one expiry"""
+    order = np.argsort(put_delta)
+    delta, vol = put_delta[order], iv[order]
+    valid = ~np.isnan(vol)
+    if valid.sum() < 2:
+        return [float('nan')] * len(SKEW_DELTAS)
+    return np.interp(SKEW_DELTAS, delta[valid], vol[valid]).tolist()
+
+
+def analyze_chain(chain, spot=None, as_of=None, rate=RISK_FREE_RATE):
+    """IV level, 10Δ–90Δ skew, put/call ratios and dealer gamma exposure for a chain"""
+    spot = float(chain['underlying_price'].iloc[0]) if spot is None else float(spot)
+    if as_of is None:
+        as_of = chain['quote_date'].iloc[0] if 'quote_date' in chain else pd.Timestamp.now()
+    as_of = pd.Timestamp(as_of).normalize()
+
+    expiry = pd.to_datetime(chain['expiry']).to_numpy(dtype='datetime64[ns]')
+    days = (expiry - as_of.to_datetime64()) / np.timedelta64(1, 'D')
+    years = days / 365.0
+    strike = chain['strike'].to_numpy(dtype=float)
+    is_call = chain['option_type'].astype(str).str[0].str.upper().to_numpy() == 'C'
+    bid = chain['bid'].to_numpy(dtype=float)
+    ask = chain['ask'].to_numpy(dtype=float)
+    mid = np.where((bid > 0) & (ask > 0), (bid + ask) / 2, np.nan)
+    volume = np.nan_to_num(chain['volume'].to_numpy(dtype=float))
+    open_interest = np.nan_to_num(chain['open_interest'].to_numpy(dtype=float))
+
+    iv = implied_volatility(mid, spot, strike, years, is_call, rate)
+    solved = ~np.isnan(iv)
+    safe_iv = np.where(solved, iv, 1.0)
+    safe_years = np.maximum(years, 1e-6)
+    d1 = _d1(spot, strike, safe_years, safe_iv, rate, 0.0)
+    call_delta = ndtr(d1)
+    gamma = np.where(solved, _norm_pdf(d1) / (spot * safe_iv * np.sqrt(safe_years)), 0.0)
+
+    # Dealers are assumed long customer calls and short customer puts:
+    # dollar gamma per 1% move, calls positive and puts negative
+    dollar_gamma = gamma * open_interest * CONTRACT_MULTIPLIER * spot * spot * 0.01
+    gamma_exposure = float(np.sum(np.where(is_call, dollar_gamma, -dollar_gamma)))
+
+    # Skew and IV level from out-of-the-money quotes of the expiry nearest TARGET_DAYS
+    live = years > 0
+    expiries = np.unique(days[live])
+    if len(expiries) == 0:
+        raise ValueError("Options chain has no unexpired contracts")
+    target = expiries[np.argmin(np.abs(expiries - TARGET_DAYS))]
+    otm = (days == target) & np.where(is_call, strike >= spot, strike < spot)
+    curve = _skew_curve(iv[otm], 1.0 - call_delta[otm])
+    atm = curve[SKEW_DELTAS.index(0.50)]
+
+    call_volume = volume[is_call].sum()
+    call_open_interest = open_interest[is_call].sum()
+    return {
+        'spot': spot,
+        'as_of': as_of,
+        'expiry_days': float(target),
+        'iv_level': atm,
+        'skew': curve[0] - curve[-1],
+        'skew_curve': dict(zip([f"{round(delta * 100)}Δ" for delta in SKEW_DELTAS], curve)),
+        'put_call_ratio': float(volume[~is_call].sum() / call_volume) if call_volume else float('nan'),
+        'put_call_oi_ratio': float(open_interest[~is_call].sum() / call_open_interest) if call_open_interest else float('nan'),
+        'gamma_exposure': gamma_exposure,
+        'contracts': int(len(chain)),
+        'solved': int(solved.sum())
+    }
+
+
+def options_risk_inputs(analytics):
+    """The 'options' risk family inputs for RiskCalculator.calculate_options_euphoria"""
+    return {
+        'iv_level': analytics['iv_level'],
+        'skew': analytics['skew'],
+        'put_call_ratio': analytics['put_call_ratio']
+    }
+
+
+def synthetic_chain(spot=5000.0, as_of=None, expiries=40, strikes=250, seed=None):
+    """A skewed, SPX-like chain priced from a known volatility surface (for demos and benchmarks)"""
+    rng = np.random.default_rng(seed)
+    as_of = pd.Timestamp.now().normalize() if as_of is None else pd.Timestamp(as_of)
+    days = np.unique(np.concatenate([np.arange(1, 8), np.geomspace(7, 3 * 365, expiries).round()]))[:expiries]
+    moneyness = np.linspace(-0.35, 0.25, strikes)
+    day_grid, money_grid = np.meshgrid(days, moneyness, indexing='ij')
+    years = np.repeat(day_grid.ravel() / 365.0, 2)
+    strike = np.repeat(np.round(spot * np.exp(money_grid.ravel()) / 5) * 5, 2)
+    is_call = np.tile([True, False], len(years) // 2)
+    # Downward skew that flattens with maturity, on a ~16% base
+    base = 0.16 + rng.normal(0, 0.01)
+    log_moneyness = np.log(strike / spot)
+    sigma = np.clip(base - 0.35 * log_moneyness / np.sqrt(np.maximum(years, 1 / 365) * 4)
+                    + 0.5 * log_moneyness ** 2, 0.06, 1.5)
+    price, _ = black_scholes(spot, strike, years, sigma, is_call, RISK_FREE_RATE)
+    spread = np.maximum(0.05, price * 0.02)
+    bid = np.round(np.maximum(price - spread / 2, 0), 2)
+    ask = np.round(price + spread / 2, 2)
+    distance = np.abs(log_moneyness)
+    activity = np.exp(-distance * 12) * np.where(is_call, 1.0, 1.3)
+    return pd.DataFrame({
+        'quote_date': as_of,
+        'underlying_price': spot,
+        'expiry': as_of + pd.to_timedelta(np.round(years * 365), unit='D'),
+        'strike': strike,
+        'option_type': np.where(is_call, 'C', 'P'),
+        'bid': bid,
+        'ask': ask,
+        'volume': rng.poisson(200 * activity),
+        'open_interest': rng.poisson(2000 * activity)
+    })
+
+
+class ChainSnapshotCache:
+    """Re-analyzes the chain file only when it changes on disk"""
+
+    def __init__(self, path=OPTIONS_CHAIN_PATH):
+        self.path = path
+        self._mtime = None
+        self._analytics = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Analytics for the current file, or None when there is no snapshot"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return None
+            if mtime != self._mtime:
+                self._analytics = analyze_chain(load_chain(self.path))
+                self._mtime = mtime
+            return self._analytics
+
+
+# Process-wide snapshot cache shared by every Streamlit session
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_chain_snapshot():
+    """Return the process-wide ChainSnapshotCache for OPTIONS_CHAIN_PATH"""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = ChainSnapshotCache()
+        return _snapshot
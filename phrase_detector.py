@@ -0,0 +1,150 @@
+import re
+import threading
+from collections import Counter
+
+# Canonical phrase -> (category, variants). Variants count toward the canonical phrase.
+BUBBLE_PHRASES = {
+    'This Time is Different': ('Classic indicator', [
+        "this time it's different", 'this time it is different', 'this cycle is different',
+        'it is different this time', "it's different this time"]),
+    'New Paradigm': ('Revolutionary claims', [
+        'paradigm shift', 'new era', 'new economy', 'rewriting the rules',
+        'old rules no longer apply', 'changes everything']),
+    "Can't Miss Opportunity": ('FOMO language', [
+        'cannot miss', "can't miss", "don't miss out", 'fear of missing out', 'fomo',
+        'get in now', 'before it is too late', "before it's too late", 'last chance to buy',
+        'buy the dip']),
+    'Once in a Lifetime': ('Unique framing', [
+        'once in a generation', 'generational opportunity', 'generational wealth',
+        'opportunity of a lifetime', 'never seen anything like']),
+    'Priced for Perfection': ('Valuation excess', [
+        'sky high valuations', 'sky-high valuations', 'stretched valuations',
+        'valuations are irrelevant', 'valuation does not matter', "valuation doesn't matter",
+        'eye-watering valuation', 'nosebleed valuations', 'trillion dollar valuation']),
+    'To the Moon': ('Euphoria', [
+        'only goes up', 'can only go up', 'stocks only go up', 'parabolic', 'melt-up',
+        'melt up', 'unstoppable rally', 'infinite demand', 'insatiable demand']),
+    'Picks and Shovels': ('Narrative crowding', [
+        'selling shovels', 'arms dealer of ai', 'every company is an ai company',
+        'ai washing', 'ai-washing', 'rebranded as ai']),
+    'Irrational Exuberance': ('Bubble warnings', [
+        'dot-com bubble', 'dotcom bubble', 'tulip mania', 'speculative mania',
+        'bubble territory', 'echoes of 1999', 'like 1999']),
+}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase alphanumeric words; case, punctuation and spacing are ignored"""
+    return _TOKEN.findall(text.lower())
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over words: every phrase is found in one pass.
+
+    Phrases and texts are tokenized the same way, so matches ignore case and
+    punctuation and always fall on word boundaries. Each state is a dict of
+    word -> next state; failure links are resolved into the output lists at
+    compile time.
+    """
+
+    def __init__(self, lexicon=None):
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [()]
+        self.phrases = []              # phrase id -> canonical phrase
+        self.categories = {}           # canonical phrase -> category
+        self._compiled = False
+        for phrase, (category, variants) in (lexicon or {}).items():
+            self.add(phrase, category, variants)
+
+    def add(self, phrase, category, variants=()):
+        """Add a canonical phrase and its variants (call before matching)"""
+        self.categories[phrase] = category
+        phrase_id = len(self.phrases)
+        self.phrases.append(phrase)
+        for text in [phrase, *variants]:
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                state = next_state
+            output = (phrase_id, len(tokens))
+            if output not in self._outputs[state]:
+                self._outputs[state] += (output,)
+        self._compiled = False
+
+    def compile(self):
+        """Build failure links breadth-first and merge outputs along them"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        for state in queue:
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                # Parents are processed first, so the fail state's outputs are complete
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+        self._compiled = True
+        return self
+
+    def matches(self, tokens):
+        """Yield (phrase id, start, end) token spans for every match, in order of end"""
+        if not self._compiled:
+            self.compile()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for end, token in enumerate(tokens, 1):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for phrase_id, length in outputs[state]:
+                yield phrase_id, end - length, end
+
+    def count(self, text):
+        """Counter of canonical phrase -> occurrences in ``text``.
+
+        Overlapping matches of one phrase (e.g. a variant inside the canonical
+        wording) count once.
+        """
+        counts = Counter()
+        last_end = {}
+        for phrase_id, start, end in self.matches(tokenize(text)):
+            if start < last_end.get(phrase_id, 0):
+                continue
+            last_end[phrase_id] = end
+            counts[self.phrases[phrase_id]] += 1
+        return counts
+
+    def count_categories(self, counts):
+        """Fold phrase counts into category counts"""
+        totals = Counter()
+        for phrase, count in counts.items():
+            totals[self.categories[phrase]] += count
+        return totals
+
+
+# Process-wide matcher for the bubble lexicon; compiled once, read-only after
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_bubble_matcher():
+    """Return the compiled PhraseMatcher for BUBBLE_PHRASES"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = PhraseMatcher(BUBBLE_PHRASES).compile()
+        return _matcher
@@ -0,0 +1,191 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Local daily close history: one column per symbol, dates in the first column
+PRICE_HISTORY_PATH = os.environ.get('PRICE_HISTORY_PATH', os.path.join('data', 'prices.parquet'))
+
+TRADING_DAYS = 252
+EWMA_LAMBDA = 0.94             # RiskMetrics daily decay
+STRESS_HORIZON = TRADING_DAYS  # Monte Carlo drawdown horizon in days
+STRESS_PATHS = 5000
+STRESS_PERCENTILE = 5          # report the drawdown exceeded on 5% of paths
+
+# Leveraged ETF -> (underlying, daily leverage)
+LEVERAGED_ETFS = {
+    'SOXL': ('SOXX', 3),
+    'TECL': ('XLK', 3),
+    'TQQQ': ('QQQ', 3),
+    'SOXS': ('SOXX', -3),
+    'SQQQ': ('QQQ', -3),
+}
+
+
+def leveraged_decay(leverage, daily_vol, days=TRADING_DAYS):
+    """Expected return drag of a daily-reset leveraged ETF versus leverage x the underlying.
+
+    With daily rebalancing the log return is L*r - (L^2 - L) * sigma^2 / 2
+    per day, so the volatility drag compounds over ``days``.
+    """
+    return float(np.expm1(-(leverage * leverage - leverage) * daily_vol * daily_vol / 2 * days))
+
+
+def leveraged_returns(underlying_returns, leverage, expense_ratio=0.0095):
+    """Daily-reset leveraged ETF returns simulated from its underlying"""
+    return leverage * np.asarray(underlying_returns) - expense_ratio / TRADING_DAYS
+
+
+def load_price_history(path=PRICE_HISTORY_PATH, symbols=None):
+    """Read a (date x symbol) close-price table from Parquet or CSV"""
+    if path.endswith('.parquet'):
+        prices = pd.read_parquet(path)
+    else:
+        prices = pd.read_csv(path, index_col=0)
+    prices.index = pd.to_datetime(prices.index)
+    if symbols is not None:
+        missing = [symbol for symbol in symbols if symbol not in prices.columns]
+        if missing:
+            raise ValueError(f"Price history {path} has no column for: {', '.join(missing)}")
+        prices = prices[list(symbols)]
+    return prices.sort_index()
+
+
+def max_drawdown(returns, axis=-1):
+    """Largest peak-to-trough loss of compounded ``returns`` (negative number)"""
+    wealth = np.cumprod(1 + np.asarray(returns), axis=axis)
+    peaks = np.maximum.accumulate(wealth, axis=axis)
+    # Start from a peak of 1 so a loss on day one counts
+    peaks = np.maximum(peaks, 1.0)
+    return (wealth / peaks - 1).min(axis=axis)
+
+
+class ExposureEngine:
+    """Portfolio betas, covariance, diversification and drawdown stress.
+
+    The covariance is an exponentially weighted (RiskMetrics) estimate over
+    daily returns. ``fit`` seeds it from the full history in one matrix
+    product; ``update`` folds in each new bar in O(n^2), without going back
+    to the history. Benchmarks are carried in the same matrix, so every beta
+    is one column of the covariance.
+    """
+
+    def __init__(self, weights, benchmarks=('SPY',), ewma_lambda=EWMA_LAMBDA):
+        self.weights = pd.Series(weights, dtype=float)
+        self.benchmarks = list(benchmarks)
+        self.ewma_lambda = ewma_lambda
+        self.symbols = list(dict.fromkeys(list(self.weights.index) + self.benchmarks))
+        self.covariance = None
+        self.last_date = None
+        self.bars = 0
+        self._history = None        # portfolio daily returns, for historical stress
+
+    def fit(self, prices):
+        """Seed the EWMA covariance from a (date x symbol) daily price history"""
+        returns = prices[self.symbols].sort_index().pct_change().iloc[1:]
+        returns = returns.fillna(0.0)
+        values = returns.to_numpy(dtype=float)
+        # w_t = (1 - lambda) * lambda^(T-1-t), normalized over the sample
+        ages = np.arange(len(values) - 1, -1, -1)
+        weights = (1 - self.ewma_lambda) * self.ewma_lambda ** ages
+        weights /= weights.sum()
+        self.covariance = (values * weights[:, None]).T @ values
+        self.last_date = returns.index[-1]
+        self.bars = len(values)
+        self._history = values[:, :len(self.weights)] @ self.weights.to_numpy()
+        return self
+
+    def update(self, prices):
+        """Fold bars newer than the last one seen into the covariance; returns how many"""
+        prices = prices[self.symbols].sort_index()
+        new = prices.index > self.last_date
+        if not new.any():
+            return 0
+        # Include the last seen bar so the first new return has a base
+        window = prices.loc[prices.index >= self.last_date]
+        returns = window.pct_change().iloc[1:].fillna(0.0).to_numpy(dtype=float)
+        for row in returns:
+            self.covariance = self.ewma_lambda * self.covariance + (1 - self.ewma_lambda) * np.outer(row, row)
+        self.last_date = window.index[-1]
+        self.bars += len(returns)
+        self._history = np.concatenate([self._history, returns[:, :len(self.weights)] @ self.weights.to_numpy()])
+        return len(returns)
+
+    def _index(self, symbol):
+        return self.symbols.index(symbol)
+
+    def betas(self, benchmark=None):
+        """Beta of every holding to ``benchmark`` (default: the first benchmark)"""
+        column = self._index(benchmark or self.benchmarks[0])
+        n = len(self.weights)
+        return pd.Series(self.covariance[:n, column] / self.covariance[column, column],
+                         index=self.weights.index)
+
+    def volatilities(self):
+        """Daily volatility of each holding"""
+        n = len(self.weights)
+        return pd.Series(np.sqrt(np.diag(self.covariance)[:n]), index=self.weights.index)
+
+    def portfolio_volatility(self):
+        n = len(self.weights)
+        w = self.weights.to_numpy()
+        return float(np.sqrt(w @ self.covariance[:n, :n] @ w))
+
+    def diversification_ratio(self):
+        """Weighted average holding volatility over portfolio volatility (1 = no diversification)"""
+        return float(self.weights.to_numpy() @ self.volatilities().to_numpy() / self.portfolio_volatility())
+
+    def stress(self, horizon=STRESS_HORIZON, paths=STRESS_PATHS, percentile=STRESS_PERCENTILE, seed=None):
+        """Historical and Monte Carlo maximum drawdown of the portfolio.
+
+        Holdings are rebalanced daily, so the portfolio's daily return is
+        linear in the asset returns and the Monte Carlo can draw it directly
+        from N(0, w'Σw) instead of simulating every asset.
+        """
+        rng = np.random.default_rng(seed)
+        draws = rng.standard_normal((paths, horizon)) * self.portfolio_volatility()
+        simulated = max_drawdown(draws, axis=1)
+        historical = max_drawdown(self._history)
+        return {
+            'historical_max_drawdown': float(historical),
+            'monte_carlo_drawdown': float(np.percentile(simulated, percentile)),
+            'monte_carlo_median_drawdown': float(np.median(simulated))
+        }
+
+    def leveraged_decay(self):
+        """Annual volatility drag of each leveraged ETF held, from its underlying's volatility"""
+        drag = {}
+        for symbol in self.weights.index:
+            if symbol not in LEVERAGED_ETFS:
+                continue
+            underlying, leverage = LEVERAGED_ETFS[symbol]
+            if underlying in self.symbols:
+                daily_vol = np.sqrt(self.covariance[self._index(underlying), self._index(underlying)])
+            else:
+                daily_vol = np.sqrt(self.covariance[self._index(symbol), self._index(symbol)]) / abs(leverage)
+            drag[symbol] = leveraged_decay(leverage, daily_vol)
+        return drag
+
+    def summary(self, seed=None):
+        """Everything the exposure page shows, as plain values"""
+        betas = self.betas()
+        weights = self.weights
+        positive = float((weights * betas)[betas > 0].sum())
+        hedged = float((weights * betas)[betas < 0].abs().sum())
+        leverage = pd.Series({symbol: abs(LEVERAGED_ETFS[symbol][1]) if symbol in LEVERAGED_ETFS else 1
+                              for symbol in weights.index})
+        shares = weights / weights.sum()
+        return {
+            'as_of': self.last_date,
+            'weights': weights.to_dict(),
+            'betas': betas.to_dict(),
+            'benchmark_betas': {benchmark: self.betas(benchmark).to_dict() for benchmark in self.benchmarks},
+            'portfolio_beta': float(weights @ betas),
+            'annual_volatility': float(self.portfolio_volatility() * np.sqrt(TRADING_DAYS)),
+            'diversification_ratio': self.diversification_ratio(),
+            'effective_leverage': float((weights * leverage).sum() / weights.sum()),
+            'effective_positions': float(1 / (shares ** 2).sum()),
+            'hedge_ratio': hedged / positive if positive else 0.0,
+            'leveraged_decay': self.leveraged_decay(),
+            **self.stress(seed=seed)
+        }
@@ -0,0 +1,251 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+# Free-tier limits from API_CONFIGURATION_GUIDE.md
+PROVIDER_LIMITS = {
+    'alpha_vantage': {'per_minute': 5, 'per_day': 500},
+    'newsdata': {'per_second': 1, 'per_day': 200},
+}
+
+# Lower value runs first
+PRIORITY_FOREGROUND = 0   # symbol currently on screen
+PRIORITY_BACKGROUND = 10  # watchlist / holdings refresh
+# Share of each rate window background calls may spend; the rest is kept for foreground calls
+BACKGROUND_SHARE = 0.6
+
+_WINDOWS = {
+    'per_second': 1,
+    'per_minute': 60,
+    'per_day': 24 * 60 * 60,
+}
+
+
+class BudgetExhausted(Exception):
+    """Raised when a provider has no budget left for an immediate call"""
+
+    def __init__(self, provider, retry_after):
+        super().__init__(f"{provider} rate limit reached, retry in {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket holding ``capacity`` tokens refilled over ``window`` seconds"""
+
+    def __init__(self, capacity, window, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self):
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens=1):
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def seconds_until(self, tokens=1):
+        """Seconds until ``tokens`` can be acquired"""
+        self._refill()
+        missing = tokens - self._tokens
+        return max(0.0, missing / self.rate)
+
+
+class ProviderBudget:
+    """All rate windows (per second/minute/day) for a single provider"""
+
+    def __init__(self, name, limits, clock=time.monotonic):
+        self.name = name
+        self.buckets = {
+            window: TokenBucket(limit, _WINDOWS[window], clock)
+            for window, limit in limits.items()
+        }
+
+    def try_acquire(self):
+        # Only spend tokens when every window has one available
+        if any(bucket.available() < 1 for bucket in self.buckets.values()):
+            return False
+        for bucket in self.buckets.values():
+            bucket.try_acquire()
+        return True
+
+    def seconds_until_available(self):
+        return max(bucket.seconds_until() for bucket in self.buckets.values())
+
+    def usage(self):
+        return {
+            window: {
+                'limit': bucket.capacity,
+                'used': round(bucket.capacity - bucket.available(), 2),
+            }
+            for window, bucket in self.buckets.items()
+        }
+
+
+class RequestScheduler:
+    """Per-provider rate limiting with a priority queue for deferred calls.
+
+    ``execute`` runs a call immediately when the provider has budget and no
+    higher-priority work is waiting; otherwise it queues the call and raises
+    ``BudgetExhausted`` so the caller can fall back to a cached value instead
+    of blocking. Queued calls are drained by a daemon thread as budget refills
+    and their results are handed to ``on_result``.
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic, background_share=BACKGROUND_SHARE):
+        limits = PROVIDER_LIMITS if limits is None else limits
+        self._clock = clock
+        self.budgets = {name: ProviderBudget(name, l, clock) for name, l in limits.items()}
+        # Background calls also need a token from these smaller buckets, so they can never
+        # take more than their share of a window however long the queue gets
+        self.background_budgets = {
+            name: ProviderBudget(name, {window: max(1, math.floor(limit * background_share))
+                                        for window, limit in l.items()}, clock)
+            for name, l in limits.items()
+        }
+        self._queues = {name: [] for name in self.budgets}
+        self._queued_keys = set()
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._counters = {
+            name: {'executed': 0, 'deferred': 0, 'failed': 0}
+            for name in self.budgets
+        }
+
+    def execute(self, provider, key, fetch, priority=PRIORITY_FOREGROUND, on_result=None, defer=True):
+        """Run ``fetch()`` now if budget allows, else queue it and raise BudgetExhausted.
+
+        With ``defer=False`` a throttled call is dropped instead of queued.
+        """
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return fetch()
+        with self._cond:
+            queue = self._queues[provider]
+            blocked = queue and queue[0][0] < priority
+            if blocked or not self._try_acquire(provider, priority):
+                if defer:
+                    self._enqueue(provider, key, fetch, priority, on_result)
+                raise BudgetExhausted(provider, self._seconds_until_available(provider, priority))
+            self._counters[provider]['executed'] += 1
+        return fetch()
+
+    def submit(self, provider, key, fetch, priority=PRIORITY_BACKGROUND, on_result=None):
+        """Queue ``fetch()`` to run in the background when budget allows"""
+        if provider not in self.budgets:
+            value = fetch()
+            if on_result is not None:
+                on_result(value)
+            return
+        with self._cond:
+            self._enqueue(provider, key, fetch, priority, on_result)
+
+    def metrics(self):
+        """Return budget usage and queue counters per provider"""
+        with self._cond:
+            return {
+                name: {
+                    'usage': budget.usage(),
+                    'queued': len(self._queues[name]),
+                    **self._counters[name],
+                }
+                for name, budget in self.budgets.items()
+            }
+
+    def _try_acquire(self, provider, priority):
+        # Caller holds the lock; spends a token only when every bucket the call needs has one
+        if priority < PRIORITY_BACKGROUND:
+            return self.budgets[provider].try_acquire()
+        budget, share = self.budgets[provider], self.background_budgets[provider]
+        if budget.seconds_until_available() > 0 or share.seconds_until_available() > 0:
+            return False
+        return budget.try_acquire() and share.try_acquire()
+
+    def _seconds_until_available(self, provider, priority):
+        delay = self.budgets[provider].seconds_until_available()
+        if priority >= PRIORITY_BACKGROUND:
+            delay = max(delay, self.background_budgets[provider].seconds_until_available())
+        return delay
+
+    def _enqueue(self, provider, key, fetch, priority, on_result):
+        # Caller holds the lock; a key already waiting is not queued twice
+        if (provider, key) in self._queued_keys:
+            return
+        self._queued_keys.add((provider, key))
+        heapq.heappush(self._queues[provider],
+                       (priority, next(self._sequence), key, fetch, on_result))
+        self._counters[provider]['deferred'] += 1
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._drain, name='request-scheduler', daemon=True)
+            self._worker.start()
+        self._cond.notify()
+
+    def _next_ready(self):
+        # Caller holds the lock. Returns (provider, item) or (None, wait seconds)
+        best = None
+        wait = None
+        for provider, queue in self._queues.items():
+            if not queue:
+                continue
+            delay = self._seconds_until_available(provider, queue[0][0])
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            if best is None or queue[0][0] < self._queues[best][0][0]:
+                best = provider
+        if best is None:
+            return None, wait
+        self._try_acquire(best, self._queues[best][0][0])
+        item = heapq.heappop(self._queues[best])
+        self._queued_keys.discard((best, item[2]))
+        self._counters[best]['executed'] += 1
+        return best, item
+
+    def _drain(self):
+        while True:
+            with self._cond:
+                provider, item = self._next_ready()
+                while provider is None:
+                    if item is None and not any(self._queues.values()):
+                        self._cond.wait()
+                    else:
+                        self._cond.wait(timeout=item)
+                    provider, item = self._next_ready()
+            _, _, _, fetch, on_result = item
+            try:
+                value = fetch()
+            except Exception:
+                with self._cond:
+                    self._counters[provider]['failed'] += 1
+                continue
+            if on_result is not None and value is not None:
+                on_result(value)
+
+
+# Process-wide scheduler shared by every Streamlit session
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide RequestScheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
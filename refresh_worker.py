@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+
+from telemetry import get_registry
+
+# Milliseconds between refresh cycles, as in API_CONFIGURATION_GUIDE.md
+REFRESH_INTERVAL_MS = int(os.environ.get('REFRESH_INTERVAL', 30000))
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable result of one refresh cycle"""
+    version: int
+    created_at: datetime
+    data: MappingProxyType
+    errors: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    def get(self, name, default=None):
+        return self.data.get(name, default)
+
+
+class SnapshotStore:
+    """Holds the latest Snapshot; readers never take a lock"""
+
+    def __init__(self):
+        self._latest = None
+        self._publish_lock = threading.Lock()
+
+    def latest(self):
+        # Reading a single attribute is atomic, so renders never block on publish
+        return self._latest
+
+    def publish(self, data, errors=None):
+        """Publish a new snapshot and return it"""
+        with self._publish_lock:
+            version = self._latest.version + 1 if self._latest else 1
+            snapshot = Snapshot(
+                version=version,
+                created_at=datetime.now(),
+                data=MappingProxyType(dict(data)),
+                errors=MappingProxyType(dict(errors or {}))
+            )
+            self._latest = snapshot
+            return snapshot
+
+    def put(self, snapshot):
+        """Install a snapshot published elsewhere, keeping its version; returns False if not newer"""
+        with self._publish_lock:
+            if self._latest is not None and snapshot.version <= self._latest.version:
+                return False
+            self._latest = snapshot
+            return True
+
+
+class BackgroundRefresher:
+    """Daemon thread that runs refresh tasks on a schedule and publishes snapshots.
+
+    ``tasks`` maps a snapshot key to a zero-argument callable. A task that
+    fails keeps its previous value in the next snapshot and records the error.
+    ``setup(refresher)``, if given, runs on the worker thread before the first
+    cycle, so expensive task construction stays off the caller's thread.
+    """
+
+    def __init__(self, tasks=None, interval_ms=REFRESH_INTERVAL_MS, store=None, setup=None):
+        self.tasks = dict(tasks or {})
+        self.setup = setup
+        self.setup_error = None
+        self.interval = interval_ms / 1000.0
+        self.store = store or SnapshotStore()
+        self.cycles = 0
+        self.last_duration = None
+        self.listeners = []
+        self.listener_errors = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.is_running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='background-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def add_listener(self, callback):
+        """Call ``callback(snapshot)`` on the worker thread after every publish"""
+        self.listeners.append(callback)
+        return callback
+
+    def refresh_now(self):
+        """Ask the worker to start the next cycle immediately"""
+        self._wake.set()
+
+    def latest(self):
+        return self.store.latest()
+
+    def run_once(self):
+        """Run every task once and publish the result"""
+        started = time.perf_counter()
+        previous = self.store.latest()
+        data = dict(previous.data) if previous else {}
+        errors = {}
+        registry = get_registry()
+        for name, task in self.tasks.items():
+            try:
+                with registry.span('task', name):
+                    data[name] = task()
+            except Exception as error:
+                errors[name] = str(error)
+        snapshot = self.store.publish(data, errors)
+        self.cycles += 1
+        self.last_duration = time.perf_counter() - started
+        registry.observe('refresh', 'cycle', self.last_duration)
+        self._notify(snapshot)
+        return snapshot
+
+    def _notify(self, snapshot):
+        for callback in self.listeners:
+            try:
+                callback(snapshot)
+            except Exception:
+                self.listener_errors += 1
+
+    def _run(self):
+        if self.setup is not None:
+            try:
+                self.setup(self)
+            except Exception as error:
+                self.setup_error = error
+                return
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+# Directory of recorded fixtures; when set, DataProvider replays it instead of mock data
+REPLAY_FIXTURES_PATH = os.environ.get('REPLAY_FIXTURES_PATH', '')
+REPLAY_LATENCY_MS = float(os.environ.get('REPLAY_LATENCY_MS', 0))
+REPLAY_JITTER_MS = float(os.environ.get('REPLAY_JITTER_MS', 0))
+REPLAY_ERROR_RATE = float(os.environ.get('REPLAY_ERROR_RATE', 0))
+REPLAY_SEED = int(os.environ.get('REPLAY_SEED', 0))
+
+# Fixture kind -> file name inside the fixtures directory
+FIXTURE_FILES = {
+    'quotes': 'quotes.json',
+    'news': 'news.jsonl',
+    'options': 'options_chain.parquet',
+    'prices': 'prices.parquet',
+    'statements': 'statements.json',
+    'universe': 'universe_inputs.parquet'
+}
+PUBDATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class ReplayError(Exception):
+    """A simulated provider failure"""
+
+    def __init__(self, kind, key):
+        super().__init__(f"Simulated {kind} failure for {key!r}")
+        self.kind = kind
+        self.key = key
+
+
+def _unit(*parts):
+    """Deterministic value in [0, 1) for ``parts``, independent of call order across threads"""
+    return zlib.crc32(':'.join(map(str, parts)).encode()) / 2 ** 32
+
+
+def write_fixtures(path, quotes=None, articles=None, chain=None, prices=None, statements=None,
+                   universe_inputs=None):
+    """Write recorded provider responses in the layout FixtureSet reads; omitted kinds are left alone.
+
+    ``quotes`` is {symbol: quote}, ``articles`` NewsData.io article dicts,
+    ``chain`` an options chain with quote_date and underlying_price,
+    ``prices`` a (date x symbol) close table, ``statements`` {symbol:
+    {endpoint: payload}} and ``universe_inputs`` one row of risk inputs per
+    symbol.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    def target(kind):
+        return os.path.join(path, FIXTURE_FILES[kind])
+
+    if quotes is not None:
+        with open(target('quotes'), 'w') as handle:
+            json.dump(quotes, handle, sort_keys=True, indent=1, default=float)
+    if articles is not None:
+        with open(target('news'), 'w') as handle:
+            for article in articles:
+                handle.write(json.dumps(article, sort_keys=True) + '\n')
+    if chain is not None:
+        chain.to_parquet(target('options'), index=False)
+    if prices is not None:
+        prices.to_parquet(target('prices'))
+    if statements is not None:
+        with open(target('statements'), 'w') as handle:
+            json.dump(statements, handle, sort_keys=True, separators=(',', ':'))
+    if universe_inputs is not None:
+        universe_inputs.to_parquet(target('universe'))
+
+
+class FixtureSet:
+    """Serves recorded provider responses from a fixtures directory.
+
+    Every call can wait a simulated latency (``latency_ms`` plus up to
+    ``jitter_ms``) and fail with ReplayError at ``error_rate``. Both are
+    drawn from ``seed``, the fixture kind, the key and how many times that
+    key was requested, so a run replays the same delays and failures
+    whatever order threads ask in. Files are read once and kept in memory.
+    """
+
+    def __init__(self, path, latency_ms=REPLAY_LATENCY_MS, jitter_ms=REPLAY_JITTER_MS,
+                 error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED, sleep=time.sleep):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self.sleep = sleep
+        self.calls = {}
+        self.errors = {}
+        self._attempts = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def _load(self, kind):
+        with self._lock:
+            if kind not in self._loaded:
+                path = os.path.join(self.path, FIXTURE_FILES[kind])
+                if kind in ('quotes', 'statements'):
+                    with open(path) as handle:
+                        self._loaded[kind] = json.load(handle)
+                elif kind == 'news':
+                    with open(path) as handle:
+                        self._loaded[kind] = [json.loads(line) for line in handle if line.strip()]
+                else:
+                    self._loaded[kind] = pd.read_parquet(path)
+            return self._loaded[kind]
+
+    def _call(self, kind, key):
+        """Count the call, then apply its simulated latency and failure"""
+        with self._lock:
+            attempt = self._attempts.get((kind, key), 0)
+            self._attempts[(kind, key)] = attempt + 1
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+        delay = self.latency_ms + self.jitter_ms * _unit(self.seed, 'latency', kind, key, attempt)
+        if delay > 0:
+            self.sleep(delay / 1000)
+        if self.error_rate and _unit(self.seed, 'error', kind, key, attempt) < self.error_rate:
+            with self._lock:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            raise ReplayError(kind, key)
+
+    def quote(self, symbol):
+        self._call('quotes', symbol)
+        quote = self._load('quotes').get(symbol)
+        if quote is None:
+            raise KeyError(f"No recorded quote for {symbol}")
+        return dict(quote)
+
+    def news_articles(self, query):
+        """Recorded articles, shifted in time so the newest was published just now"""
+        self._call('news', query)
+        articles = self._load('news')
+        published = [datetime.strptime(article['pubDate'], PUBDATE_FORMAT) for article in articles]
+        if not published:
+            return []
+        shift = datetime.now(timezone.utc).replace(tzinfo=None) - max(published)
+        # Whole seconds keep the shifted pubDates (and so the article keys) stable within a second
+        shift = timedelta(seconds=int(shift.total_seconds()))
+        return [dict(article, pubDate=(when + shift).strftime(PUBDATE_FORMAT))
+                for article, when in zip(articles, published)]
+
+    def options_chain(self):
+        self._call('options', 'chain')
+        return self._load('options').copy()
+
+    def price_history(self, symbols):
+        self._call('prices', ','.join(symbols))
+        prices = self._load('prices')
+        missing = [symbol for symbol in symbols if symbol not in prices.columns]
+        if missing:
+            raise KeyError(f"No recorded prices for: {', '.join(missing)}")
+        return prices[list(symbols)].copy()
+
+    def statement(self, symbol, endpoint):
+        self._call('statements', (symbol, endpoint))
+        payload = self._load('statements').get(symbol, {}).get(endpoint)
+        if payload is None:
+            raise KeyError(f"No recorded {endpoint} for {symbol}")
+        return payload
+
+    def universe_inputs(self, symbols):
+        self._call('universe', len(symbols))
+        return self._load('universe').reindex(pd.Index(symbols, name='symbol'))
+
+    def stats(self):
+        with self._lock:
+            return {'calls': dict(self.calls), 'errors': dict(self.errors)}
+
+
+# Process-wide fixture set for REPLAY_FIXTURES_PATH, shared by every session
+_fixtures = None
+_fixtures_lock = threading.Lock()
+
+
+def get_fixture_set():
+    """Return the process-wide FixtureSet, or None when REPLAY_FIXTURES_PATH is unset"""
+    global _fixtures
+    if not REPLAY_FIXTURES_PATH:
+        return None
+    with _fixtures_lock:
+        if _fixtures is None:
+            _fixtures = FixtureSet(REPLAY_FIXTURES_PATH)
+        return _fixtures
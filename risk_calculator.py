@@ -0,0 +1,345 @@
+import numpy as np
+import pandas as pd
+
+from telemetry import timed
+
+RISK_WEIGHTS = {
+    'fundamentals': 0.30,
+    'valuation': 0.25,
+    'leverage': 0.20,
+    'options': 0.15,
+    'sentiment': 0.10
+}
+
+# Mock inputs for the five risk families until live feeds are wired in
+MOCK_RISK_INPUTS = {
+    'fundamentals': {'fcf_margin': -0.02, 'revenue_growth': 0.15, 'price_change': 0.25},
+    'valuation': {'pe_ratio': 65, 'price_to_sales': 25, 'market_cap_growth': 2.5},
+    'leverage': {'credit_spreads': 2.5, 'breadth': 0.25, 'leverage_ratio': 4},
+    'options': {'iv_level': 0.18, 'skew': 0.12, 'put_call_ratio': 0.7},
+    'sentiment': {'news_sentiment': 0.85, 'social_sentiment': 0.92, 'narrative_intensity': 0.75}
+}
+
+# Input columns for each risk family, as read by the scalar calculate_* methods
+RISK_INPUT_COLUMNS = {
+    'fundamentals': ['fcf_margin', 'revenue_growth', 'price_change'],
+    'valuation': ['pe_ratio', 'price_to_sales'],
+    'leverage': ['credit_spreads', 'breadth'],
+    'options': ['iv_level', 'skew'],
+    'sentiment': ['news_sentiment', 'social_sentiment']
+}
+
+SCORED_COLUMNS = [column for columns in RISK_INPUT_COLUMNS.values() for column in columns]
+# Each family's columns are contiguous in SCORED_COLUMNS
+FAMILY_SLICES = {
+    family: slice(SCORED_COLUMNS.index(columns[0]), SCORED_COLUMNS.index(columns[0]) + len(columns))
+    for family, columns in RISK_INPUT_COLUMNS.items()
+}
+
+# Scalar method that scores each risk family
+FAMILY_METHODS = {
+    'fundamentals': 'calculate_fundamental_divergence',
+    'valuation': 'calculate_valuation_stretch',
+    'leverage': 'calculate_leverage_stress',
+    'options': 'calculate_options_euphoria',
+    'sentiment': 'calculate_sentiment_crowding'
+}
+
+
+# Trigger level of each input in the scalar calculate_* methods
+RISK_THRESHOLDS = {
+    'fcf_margin': 0,
+    'revenue_growth': 0.1,
+    'price_change': 0.2,
+    'pe_ratio': 50,
+    'price_to_sales': 20,
+    'credit_spreads': 2,
+    'breadth': 0.3,
+    'iv_level': 0.2,
+    'skew': 0.1,
+    'news_sentiment': 0.8,
+    'social_sentiment': 0.9
+}
+
+
+def _points(condition, value):
+    return np.where(condition, value, 0)
+
+
+def vector_scorers(thresholds=RISK_THRESHOLDS):
+    """Vectorized equivalents of the scalar calculate_* methods at the given trigger levels.
+    
+    Each scorer takes ``col(name)``, which returns the input column as a
+    float array.
+    """
+    t = thresholds
+    return {
+        'fundamentals': lambda col: np.minimum(
+            _points(col('fcf_margin') < t['fcf_margin'], 30) +
+            _points((col('revenue_growth') < t['revenue_growth']) & (col('price_change') > t['price_change']), 25),
+            100),
+        'valuation': lambda col: np.minimum(
+            _points(col('pe_ratio') > t['pe_ratio'], 30) +
+            _points(col('price_to_sales') > t['price_to_sales'], 25), 100),
+        'leverage': lambda col: np.minimum(
+            _points(col('credit_spreads') > t['credit_spreads'], 30) +
+            _points(col('breadth') < t['breadth'], 25), 100),
+        'options': lambda col: np.minimum(
+            _points(col('iv_level') < t['iv_level'], 30) +
+            _points(col('skew') > t['skew'], 25), 100),
+        'sentiment': lambda col: np.minimum(
+            _points(col('news_sentiment') > t['news_sentiment'], 20) +
+            _points(col('social_sentiment') > t['social_sentiment'], 20), 100)
+    }
+
+
+VECTOR_SCORERS = vector_scorers()
+
+
+def _vector_composite(scores, weights=RISK_WEIGHTS):
+    # Same summation order as calculate_overall_risk_score so float rounding matches;
+    # weights may be arrays, scoring every row under several weightings at once
+    overall = (
+        scores['fundamentals'] * weights['fundamentals'] +
+        scores['valuation'] * weights['valuation'] +
+        scores['leverage'] * weights['leverage'] +
+        scores['options'] * weights['options'] +
+        scores['sentiment'] * weights['sentiment']
+    )
+    return np.minimum(100, np.trunc(overall)).astype(np.int64)
+
+
+MS_PER_YEAR = 365.25 * 24 * 3600 * 1000
+
+
+def realized_volatility(prices, ts):
+    """Annualised volatility of log returns between bars at epoch-millisecond times ``ts``.
+
+    Takes the price and ts fields of a BarStore window as they are; bars
+    may be unevenly spaced. NaN with fewer than three bars.
+    """
+    if len(prices) < 3:
+        return float('nan')
+    returns = np.diff(np.log(prices))
+    elapsed = (ts[-1] - ts[0]) / MS_PER_YEAR
+    return float(np.sqrt(np.dot(returns, returns) / elapsed)) if elapsed > 0 else float('nan')
+
+# Risk Calculator Class
+class RiskCalculator:
+    def __init__(self):
+        # Per-ticker inputs and weighted terms for incremental scoring
+        self._ticker_state = {}
+        self._universe_state = None
+        self.recompute_stats = {'computed': 0, 'skipped': 0}
+        
+    def calculate_fundamental_divergence(self, fundamentals):
+        """Calculate fundamental divergence score.
+        
+        ``fundamentals`` may also be a DataFrame with one row per ticker,
+        which returns every ticker's score as a Series.
+        """
+        if isinstance(fundamentals, pd.DataFrame):
+            zeros = np.zeros(len(fundamentals))
+            
+            def col(name):
+                # A missing column counts as 0 and a missing value (NaN) never triggers, as in the scalar path
+                if name not in fundamentals:
+                    return zeros
+                return fundamentals[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            
+            return pd.Series(VECTOR_SCORERS['fundamentals'](col), index=fundamentals.index, name='fundamentals')
+        score = 0
+        if fundamentals.get('fcf_margin', 0) < 0:
+            score += 30
+        if fundamentals.get('revenue_growth', 0) < 0.1 and fundamentals.get('price_change', 0) > 0.2:
+            score += 25
+        return min(score, 100)
+    
+    def calculate_valuation_stretch(self, metrics):
+        """Calculate valuation stretch score"""
+        score = 0
+        if metrics.get('pe_ratio', 0) > 50:
+            score += 30
+        if metrics.get('price_to_sales', 0) > 20:
+            score += 25
+        return min(score, 100)
+    
+    def calculate_leverage_stress(self, market_data):
+        """Calculate leverage stress score"""
+        score = 0
+        if market_data.get('credit_spreads', 0) > 2:
+            score += 30
+        if market_data.get('breadth', 0) < 0.3:
+            score += 25
+        return min(score, 100)
+    
+    def calculate_options_euphoria(self, options_data):
+        """Calculate options euphoria score"""
+        score = 0
+        if options_data.get('iv_level', 0) < 0.2:
+            score += 30
+        if options_data.get('skew', 0) > 0.1:
+            score += 25
+        return min(score, 100)
+    
+    def calculate_sentiment_crowding(self, sentiment_data):
+        """Calculate sentiment crowding score"""
+        score = 0
+        if sentiment_data.get('news_sentiment', 0) > 0.8:
+            score += 20
+        if sentiment_data.get('social_sentiment', 0) > 0.9:
+            score += 20
+        return min(score, 100)
+    
+    @timed('risk')
+    def calculate_overall_risk_score(self, inputs=None):
+        """Calculate overall risk score"""
+        weights = RISK_WEIGHTS
+        
+        inputs = MOCK_RISK_INPUTS if inputs is None else inputs
+        fundamentals = inputs['fundamentals']
+        valuation = inputs['valuation']
+        leverage = inputs['leverage']
+        options = inputs['options']
+        sentiment = inputs['sentiment']
+        
+        fundamental_score = self.calculate_fundamental_divergence(fundamentals)
+        valuation_score = self.calculate_valuation_stretch(valuation)
+        leverage_score = self.calculate_leverage_stress(leverage)
+        options_score = self.calculate_options_euphoria(options)
+        sentiment_score = self.calculate_sentiment_crowding(sentiment)
+        
+        overall_score = (
+            fundamental_score * weights['fundamentals'] +
+            valuation_score * weights['valuation'] +
+            leverage_score * weights['leverage'] +
+            options_score * weights['options'] +
+            sentiment_score * weights['sentiment']
+        )
+        
+        return min(100, int(overall_score))
+    
+    @timed('risk')
+    def score_universe(self, inputs, index=None):
+        """Score N tickers at once.
+        
+        ``inputs`` is a DataFrame (one row per ticker) or a mapping of column
+        name to array, using the column names in RISK_INPUT_COLUMNS. Missing
+        columns count as 0, as in the scalar methods. Returns a DataFrame with
+        the five sub-scores and the weighted ``overall`` score, which matches
+        calculate_overall_risk_score exactly for the same inputs.
+        """
+        # Only scored columns are converted; symbols, dates and other extras are ignored
+        if isinstance(inputs, pd.DataFrame):
+            index = inputs.index if index is None else index
+            columns = {name: inputs[name].to_numpy(dtype=np.float64) for name in SCORED_COLUMNS if name in inputs}
+            n = len(inputs)
+        else:
+            columns = {name: np.asarray(inputs[name], dtype=np.float64) for name in SCORED_COLUMNS if name in inputs}
+            n = len(index) if index is not None else len(next(iter(inputs.values())))
+        zeros = np.zeros(n)
+        
+        def col(name):
+            return columns.get(name, zeros)
+        
+        scores = {family: scorer(col) for family, scorer in VECTOR_SCORERS.items()}
+        scores['overall'] = _vector_composite(scores)
+        return pd.DataFrame(scores, index=index)
+    
+    @timed('risk')
+    def calculate_risk_score_incremental(self, symbol, inputs):
+        """Score one ticker, recomputing only the families whose inputs changed.
+        
+        ``inputs`` has the same shape as for calculate_overall_risk_score but
+        may omit families, which then keep their previous inputs. The result
+        equals calculate_overall_risk_score on the merged inputs.
+        """
+        state = self._ticker_state.setdefault(symbol, {'inputs': {}, 'scores': {}, 'terms': {}})
+        for family, method in FAMILY_METHODS.items():
+            values = inputs.get(family)
+            if family in state['terms'] and (values is None or values == state['inputs'][family]):
+                self.recompute_stats['skipped'] += 1
+                continue
+            if values is None:
+                raise KeyError(f"No {family} inputs recorded for {symbol}")
+            state['inputs'][family] = dict(values)
+            state['scores'][family] = getattr(self, method)(values)
+            state['terms'][family] = state['scores'][family] * RISK_WEIGHTS[family]
+            self.recompute_stats['computed'] += 1
+        
+        terms = state['terms']
+        # Re-add the cached weighted terms in the scalar method's order
+        overall_score = (
+            terms['fundamentals'] +
+            terms['valuation'] +
+            terms['leverage'] +
+            terms['options'] +
+            terms['sentiment']
+        )
+        return min(100, int(overall_score))
+    
+    @timed('risk')
+    def score_universe_incremental(self, inputs):
+        """Like score_universe, but only rescore families whose columns changed per ticker.
+        
+        The inputs are aligned to one float array and compared with the
+        previous call's in a single pass. Rows are rescored per family only
+        where that family's inputs moved; when most rows moved, everything
+        is rescored at once, which is cheaper than picking rows out.
+        """
+        frame = inputs if isinstance(inputs, pd.DataFrame) else pd.DataFrame(inputs)
+        values = frame.reindex(columns=SCORED_COLUMNS, fill_value=0).to_numpy(dtype=np.float64)
+        previous = self._universe_state
+        # Most rows moved (or no previous call): rescoring everything beats picking rows out
+        rescore_all = previous is None
+        if previous is not None:
+            before, old_scores = previous['values'], previous['families']
+            if not previous['index'].equals(frame.index):
+                # New tickers get an all-NaN row, which never matches
+                rows = previous['index'].get_indexer(frame.index)
+                known = (rows >= 0)[:, None]
+                before = np.where(known, before[np.maximum(rows, 0)], np.nan)
+                old_scores = np.where(known, old_scores[np.maximum(rows, 0)], 0)
+            moved = (values != before) & ~(np.isnan(values) & np.isnan(before))
+            rows_moved = moved.any(axis=1)
+            if before is previous['values'] and not rows_moved.any():
+                self.recompute_stats['skipped'] += len(frame) * len(VECTOR_SCORERS)
+                return previous['result']
+            rescore_all = rows_moved.mean() > 0.5
+        families = np.empty((len(frame), len(VECTOR_SCORERS)), dtype=np.int64)
+        for position, (family, scorer) in enumerate(VECTOR_SCORERS.items()):
+            if rescore_all:
+                families[:, position] = scorer(lambda name: values[:, SCORED_COLUMNS.index(name)])
+                computed = len(frame)
+            else:
+                changed = moved[:, FAMILY_SLICES[family]].any(axis=1)
+                families[:, position] = old_scores[:, position]
+                computed = int(changed.sum())
+                if computed:
+                    subset = values[changed]
+                    families[changed, position] = scorer(lambda name: subset[:, SCORED_COLUMNS.index(name)])
+            self.recompute_stats['computed'] += computed
+            self.recompute_stats['skipped'] += len(frame) - computed
+        overall = _vector_composite({family: families[:, position] for position, family in enumerate(VECTOR_SCORERS)})
+        # One 2-D block builds the frame far faster than a dict of columns
+        result = pd.DataFrame(np.column_stack([families, overall]), index=frame.index,
+                              columns=[*VECTOR_SCORERS, 'overall'])
+        self._universe_state = {'index': frame.index, 'values': values, 'families': families, 'result': result}
+        return result
+    
+    def component_scores(self, symbol):
+        """Last sub-scores computed by calculate_risk_score_incremental for ``symbol``"""
+        return dict(self._ticker_state[symbol]['scores'])
+    
+    def skipped_ratio(self):
+        """Share of component computations skipped because inputs were unchanged"""
+        total = self.recompute_stats['computed'] + self.recompute_stats['skipped']
+        return self.recompute_stats['skipped'] / total if total else 0.0
+    
+    def inputs_to_frame(self, inputs_by_symbol):
+        """Flatten {symbol: {family: {column: value}}} into a score_universe frame"""
+        rows = {
+            symbol: {name: value for family in inputs.values() for name, value in family.items()}
+            for symbol, inputs in inputs_by_symbol.items()
+        }
+        return pd.DataFrame.from_dict(rows, orient='index')
@@ -0,0 +1,328 @@
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+import zlib
+
+from refresh_worker import REFRESH_INTERVAL_MS, BackgroundRefresher, Snapshot
+
+# redis://host:6379/0 to share one refresher across replicas; memory:// for an in-process stand-in
+REDIS_URL = os.environ.get('REDIS_URL', '')
+SHARED_TIER_PREFIX = os.environ.get('SHARED_TIER_PREFIX', 'ai-bubble')
+# The lease outlives a stalled holder by this long before another replica takes over
+LEASE_TTL_MS = int(os.environ.get('LEASE_TTL_MS', 60000))
+# How often followers check for a new snapshot or a free lease
+SHARED_POLL_MS = int(os.environ.get('SHARED_POLL_MS', 1000))
+SNAPSHOT_COMPRESSION = 6
+
+# Lease and publish are compare-and-set on the lease owner, so a replica that
+# lost its lease (stalled past the TTL, partitioned) can never overwrite the
+# new holder's snapshots.
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+PUBLISH_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[2], ARGV[2])
+redis.call('set', KEYS[3], ARGV[3])
+return 1
+"""
+
+
+def encode_snapshot(snapshot):
+    """Compact bytes for a Snapshot: pickled plain containers, zlib-compressed.
+
+    Only for a Redis reachable by the replicas alone: whoever can write
+    the key can make readers unpickle arbitrary objects.
+    """
+    payload = {
+        'version': snapshot.version,
+        'created_at': snapshot.created_at,
+        'data': dict(snapshot.data),
+        'errors': dict(snapshot.errors)
+    }
+    return zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), SNAPSHOT_COMPRESSION)
+
+
+def decode_snapshot(blob):
+    from types import MappingProxyType
+
+    payload = pickle.loads(zlib.decompress(blob))
+    return Snapshot(
+        version=payload['version'],
+        created_at=payload['created_at'],
+        data=MappingProxyType(payload['data']),
+        errors=MappingProxyType(payload['errors'])
+    )
+
+
+def _bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class InMemoryRedis:
+    """Thread-safe stand-in for the few Redis commands the shared tier uses.
+
+    Implements GET, SET (NX, PX), DEL, PTTL, PING and EVAL of the lease
+    and publish scripts above, with key expiry on ``clock``. Replicas
+    simulated as threads of one process can share one instance.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._values = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+        self._scripts = {
+            RENEW_SCRIPT: self._renew,
+            RELEASE_SCRIPT: self._release,
+            PUBLISH_SCRIPT: self._publish
+        }
+
+    def _live(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and self.clock() >= expires:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._values
+
+    def ping(self):
+        return True
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name) if self._live(name) else None
+
+    def set(self, name, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._live(name):
+                return None
+            self._values[name] = _bytes(value)
+            self._expires.pop(name, None)
+            if px is not None:
+                self._expires[name] = self.clock() + px / 1000
+            return True
+
+    def delete(self, *names):
+        with self._lock:
+            removed = sum(self._live(name) for name in names)
+            for name in names:
+                self._values.pop(name, None)
+                self._expires.pop(name, None)
+            return removed
+
+    def pttl(self, name):
+        with self._lock:
+            if not self._live(name):
+                return -2
+            expires = self._expires.get(name)
+            return -1 if expires is None else int((expires - self.clock()) * 1000)
+
+    def eval(self, script, numkeys, *keys_and_args):
+        keys, args = keys_and_args[:numkeys], [_bytes(arg) for arg in keys_and_args[numkeys:]]
+        with self._lock:
+            return self._scripts[script](keys, args)
+
+    def _renew(self, keys, args):
+        if self.get(keys[0]) != args[0]:
+            return 0
+        self._expires[keys[0]] = self.clock() + int(args[1]) / 1000
+        return 1
+
+    def _release(self, keys, args):
+        return self.delete(keys[0]) if self.get(keys[0]) == args[0] else 0
+
+    def _publish(self, keys, args):
+        if self.get(keys[0]) != args[0]:
+            return 0
+        self.set(keys[1], args[1])
+        self.set(keys[2], args[2])
+        return 1
+
+
+class Lease:
+    """A Redis key held by one owner until it stops renewing it"""
+
+    def __init__(self, client, key, owner, ttl_ms=LEASE_TTL_MS):
+        self.client = client
+        self.key = key
+        self.owner = owner
+        self.ttl_ms = ttl_ms
+        self.held = False
+
+    def acquire(self):
+        self.held = bool(self.client.set(self.key, self.owner, nx=True, px=self.ttl_ms))
+        return self.held
+
+    def renew(self):
+        """Extend the lease; returns False (and drops it) if another owner holds it now"""
+        self.held = bool(self.client.eval(RENEW_SCRIPT, 1, self.key, self.owner, self.ttl_ms))
+        return self.held
+
+    def release(self):
+        if self.held:
+            self.client.eval(RELEASE_SCRIPT, 1, self.key, self.owner)
+            self.held = False
+
+    def holder(self):
+        owner = self.client.get(self.key)
+        return owner.decode() if owner is not None else None
+
+
+class SharedRefresher(BackgroundRefresher):
+    """A BackgroundRefresher whose tasks run on one replica at a time.
+
+    The replica holding the lease runs the refresh tasks and writes each
+    snapshot to Redis. Every other replica polls Redis every
+    SHARED_POLL_MS, installs new snapshots in its own store and notifies
+    its listeners, so provider quota is spent once however many replicas
+    serve viewers. Followers take the lease over once the holder stops
+    renewing it (LEASE_TTL_MS after it died or stalled).
+    """
+
+    def __init__(self, client, tasks=None, interval_ms=REFRESH_INTERVAL_MS, store=None, setup=None,
+                 prefix=SHARED_TIER_PREFIX, ttl_ms=LEASE_TTL_MS, poll_ms=SHARED_POLL_MS, owner=None):
+        super().__init__(tasks, interval_ms=interval_ms, store=store, setup=setup)
+        self.client = client
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease = Lease(client, f'{prefix}:lease', self.owner, ttl_ms)
+        self.snapshot_key = f'{prefix}:snapshot'
+        self.version_key = f'{prefix}:version'
+        self.poll = poll_ms / 1000.0
+        self.pushes = 0
+        self.pulls = 0
+        self.takeovers = 0
+        self.tier_errors = 0
+        self.last_tier_error = None
+        self.snapshot_bytes = 0
+
+    @property
+    def role(self):
+        return 'leader' if self.lease.held else 'follower'
+
+    def _notify(self, snapshot):
+        # Only the leader gets here from run_once; followers' snapshots come in through pull()
+        if self.lease.held:
+            try:
+                self.push(snapshot)
+            except Exception as error:
+                self.tier_errors += 1
+                self.last_tier_error = str(error)
+        super()._notify(snapshot)
+
+    def push(self, snapshot):
+        """Write ``snapshot`` to Redis if this replica still holds the lease"""
+        blob = encode_snapshot(snapshot)
+        if self.client.eval(PUBLISH_SCRIPT, 3, self.lease.key, self.snapshot_key, self.version_key,
+                            self.owner, blob, snapshot.version):
+            self.pushes += 1
+            self.snapshot_bytes = len(blob)
+        else:
+            # Lost the lease during this cycle: the new holder's data wins
+            self.lease.held = False
+
+    def pull(self):
+        """Install the shared snapshot if it is newer than ours; returns it or None"""
+        version = self.client.get(self.version_key)
+        latest = self.store.latest()
+        if version is None or (latest is not None and int(version) <= latest.version):
+            return None
+        blob = self.client.get(self.snapshot_key)
+        if blob is None:
+            return None
+        snapshot = decode_snapshot(blob)
+        if not self.store.put(snapshot):
+            return None
+        self.pulls += 1
+        self.snapshot_bytes = len(blob)
+        super()._notify(snapshot)
+        return snapshot
+
+    def start(self):
+        if not self.is_running:
+            super().start()
+            threading.Thread(target=self._keep_lease, name='lease-keeper', daemon=True).start()
+        return self
+
+    def _keep_lease(self):
+        # Renews during long refresh cycles too, so a slow cycle never lets the lease lapse
+        while not self._stop.wait(self.lease.ttl_ms / 3000):
+            if self.lease.held:
+                try:
+                    self.lease.renew()
+                except Exception as error:
+                    self.tier_errors += 1
+                    self.last_tier_error = str(error)
+
+    def _lead(self):
+        """Keep or take the lease; True while this replica should run the tasks"""
+        if self.lease.held:
+            return self.lease.renew()
+        if self.lease.acquire():
+            self.takeovers += 1
+            # Continue from the last shared snapshot so versions keep increasing
+            self.pull()
+            return True
+        return False
+
+    def _run(self):
+        if self.setup is not None:
+            try:
+                self.setup(self)
+            except Exception as error:
+                self.setup_error = error
+                return
+        while not self._stop.is_set():
+            try:
+                leading = self._lead()
+                if leading:
+                    self.run_once()
+                else:
+                    self.pull()
+            except Exception as error:
+                # Redis unreachable: serve the last snapshot and try again next round
+                leading = False
+                self.lease.held = False
+                self.tier_errors += 1
+                self.last_tier_error = str(error)
+            self._wake.wait(self.interval if leading else self.poll)
+            self._wake.clear()
+
+    def stop(self, timeout=None, release=True):
+        """Stop refreshing; ``release=False`` leaves the lease to expire, as a crashed replica would"""
+        super().stop(timeout)
+        if release:
+            try:
+                self.lease.release()
+            except Exception:
+                pass
+
+
+# Process-wide stand-ins for memory:// URLs, so simulated replicas in one process share one
+_memory_servers = {}
+_memory_lock = threading.Lock()
+
+
+def connect(url=REDIS_URL):
+    """Redis client for ``url``; memory://name returns a process-wide InMemoryRedis"""
+    if url.startswith('memory://'):
+        with _memory_lock:
+            return _memory_servers.setdefault(url, InMemoryRedis())
+    import redis
+
+    return redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
@@ -1,13 +1,34 @@
 import streamlit as st
+# pandas stays eager: plotly probes sys.modules for it, so importing it lazily
+# on one session thread while another builds a figure would race
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import requests
-import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import os
 import time
+import uuid
+
+# Other heavy dependencies (plotly.express, requests, sqlalchemy, the risk
+# engine) are imported by the pages and background tasks that use them, so a
+# cold worker paints the Executive Summary without loading them on the script
+# thread; the refresher the first run starts loads sqlalchemy and the risk
+# engine on its own thread meanwhile (benchmarks/startup.py reports both).
+from data_cache import get_quote_cache
+from rate_limiter import (
+    PRIORITY_BACKGROUND, PRIORITY_FOREGROUND, BudgetExhausted, get_scheduler
+)
+from refresh_worker import REFRESH_INTERVAL_MS, BackgroundRefresher
+from alert_rules import ALERT_THRESHOLD
+from dashboard_state import REGIME_BOUNDS, DashboardStateService
+from figure_cache import get_figure_cache
+from replay_provider import get_fixture_set, write_fixtures
+from shared_tier import REDIS_URL
+from http_client import HTTP_TIMEOUT, get_fetch_pool, get_http_session
+from news_pipeline import (
+    NEWS_MAX_PAGES, NEWS_REPLAY_PATH, NEWSDATA_URL, get_news_pipeline, newsdata_pages
+)
+from telemetry import METRICS_JSONL_PATH, METRICS_PORT, get_registry, profiled, serve_metrics, span, timed
 
 # Page configuration
 st.set_page_config(
@@ -93,141 +114,628 @@ if 'risk_score' not in st.session_state:
 if 'last_update' not in st.session_state:
     st.session_state.last_update = datetime.now()
 
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+
+WATCHLIST = ['NVDA', 'MSFT', 'AMD', 'SOXL']
+HOLDINGS = ['NVDA', 'SOXX', 'SOXL', 'TECL']
+# Portfolio weights of HOLDINGS; the rest of the portfolio is cash
+PORTFOLIO_WEIGHTS = {'NVDA': 0.085, 'SOXX': 0.123, 'SOXL': 0.157, 'TECL': 0.112}
+# Beta benchmarks: the S&P 500 and the AI/semiconductor complex
+EXPOSURE_BENCHMARKS = ['SPY', 'SOXX']
+PRICE_HISTORY_YEARS = 10
+# Processes for the risk-score Monte Carlo; 0 runs it on the refresher thread
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', 0))
+LIVE_ALERTS_SHOWN = 6
+DIVERGENCE_WARNINGS_SHOWN = 5
+HEATMAP_COLUMNS = 4
+HEATMAP_SIZES = [12, 24, 48, 96]
+# Hours of bars in the Executive Summary's intraday chart
+INTRADAY_HOURS = 6
+# Gauge step colors, one per risk regime
+REGIME_FILLS = ["#4ecdc4", "#ffb800", "#ff6b6b", "#8b0000"]
+SENTIMENT_QUERY = 'AI bubble'
+
+NASDAQ_100 = [
+    'AAPL', 'ABNB', 'ADBE', 'ADI', 'ADP', 'ADSK', 'AEP', 'AMAT', 'AMD', 'AMGN',
+    'AMZN', 'ANSS', 'ARM', 'ASML', 'AVGO', 'AZN', 'BIIB', 'BKNG', 'BKR', 'CCEP',
+    'CDNS', 'CDW', 'CEG', 'CHTR', 'CMCSA', 'COST', 'CPRT', 'CRWD', 'CSCO', 'CSGP',
+    'CSX', 'CTAS', 'CTSH', 'DASH', 'DDOG', 'DLTR', 'DXCM', 'EA', 'EXC', 'FANG',
+    'FAST', 'FTNT', 'GEHC', 'GFS', 'GILD', 'GOOG', 'GOOGL', 'HON', 'IDXX', 'ILMN',
+    'INTC', 'INTU', 'ISRG', 'KDP', 'KHC', 'KLAC', 'LIN', 'LRCX', 'LULU', 'MAR',
+    'MCHP', 'MDB', 'MDLZ', 'MELI', 'META', 'MNST', 'MRNA', 'MRVL', 'MSFT', 'MU',
+    'NFLX', 'NVDA', 'NXPI', 'ODFL', 'ON', 'ORLY', 'PANW', 'PAYX', 'PCAR', 'PDD',
+    'PEP', 'PLTR', 'PYPL', 'QCOM', 'REGN', 'ROP', 'ROST', 'SBUX', 'SMCI', 'SNPS',
+    'TEAM', 'TMUS', 'TSLA', 'TTD', 'TTWO', 'TXN', 'VRSK', 'VRTX', 'WBD', 'WDAY',
+    'XEL', 'ZS'
+]
+AI_ETFS = ['SOXX', 'SMH', 'SOXL', 'TECL', 'BOTZ', 'AIQ', 'ROBO', 'QQQ']
+UNIVERSE = list(dict.fromkeys(NASDAQ_100 + AI_ETFS))
+# Ranked in the Executive Summary heatmap
+HEATMAP_SYMBOLS = list(dict.fromkeys(WATCHLIST + UNIVERSE))
+# Quoted live by the refresher; the rest of the heatmap takes its daily change from daily closes,
+# since quoting ~110 symbols a minute would spend the Alpha Vantage free tier (500/day) in under two hours
+LIVE_QUOTE_SYMBOLS = list(dict.fromkeys(WATCHLIST + HOLDINGS))
+
+# Keys used by the background refresher; session keys never leave the session
+SERVER_API_KEYS = {
+    'alpha_vantage': os.environ.get('ALPHA_VANTAGE_KEY', ''),
+    'newsdata': os.environ.get('NEWSDATA_API_KEY', '')
+}
+
+# Shared dark layout for page charts
+CHART_LAYOUT = {
+    'paper_bgcolor': 'rgba(0,0,0,0)',
+    'plot_bgcolor': 'rgba(0,0,0,0)',
+    'font_color': 'white'
+}
+
+# Column dtypes for bulk quote frames
+QUOTE_COLUMNS = {
+    'symbol': 'string',
+    'price': 'float64',
+    'change': 'float64',
+    'volume': 'Int64',
+    'market_cap': 'Int64',
+    'status': 'category',
+    'error': 'string'
+}
+
 # Data Provider Class
 class DataProvider:
-    def __init__(self):
-        self.api_keys = st.session_state.api_keys
+    def __init__(self, api_keys=None):
+        self.api_keys = st.session_state.api_keys if api_keys is None else api_keys
         
     def set_api_key(self, service, key):
         self.api_keys[service] = key
         st.session_state.api_keys[service] = key
         
-    def get_stock_data(self, symbol):
-        """Get stock data (mock for demo)"""
-        if self.api_keys['alpha_vantage']:
-            # In production, this would call Alpha Vantage API
-            return {
+    @timed('provider')
+    def get_stock_data(self, symbol, priority=PRIORITY_FOREGROUND):
+        """Get stock data (cached process-wide, rate limited per provider)"""
+        try:
+            return self._get_quote(symbol, priority)
+        except Exception:
+            # Fall back to the last known quote, then to mock data
+            stale = get_quote_cache().get_stale(self._quote_provider(), symbol, 'GLOBAL_QUOTE')
+            return stale if stale is not None else self._mock_stock_data(symbol)
+    
+    @timed('provider')
+    def get_stock_data_many(self, symbols, priority=PRIORITY_BACKGROUND):
+        """Get stock data for many symbols concurrently as one DataFrame row per symbol"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        provider = self._quote_provider()
+        
+        def fetch_one(symbol):
+            try:
+                return symbol, self._get_quote(symbol, priority), 'ok', None
+            except Exception as error:
+                stale = get_quote_cache().get_stale(provider, symbol, 'GLOBAL_QUOTE')
+                return symbol, stale, 'stale' if stale is not None else 'error', str(error)
+        
+        rows = []
+        for symbol, quote, status, error in get_fetch_pool().map(fetch_one, unique_symbols):
+            quote = quote or {}
+            rows.append({
                 'symbol': symbol,
-                'price': np.random.uniform(50, 500),
-                'change': np.random.uniform(-10, 10),
-                'volume': np.random.randint(1000000, 10000000),
-                'market_cap': np.random.randint(100000000000, 1000000000000)
-            }
+                'price': quote.get('price'),
+                'change': quote.get('change'),
+                'volume': quote.get('volume'),
+                'market_cap': quote.get('market_cap'),
+                'status': status,
+                'error': error
+            })
+        
+        df = pd.DataFrame(rows, columns=list(QUOTE_COLUMNS))
+        return df.astype(QUOTE_COLUMNS).set_index('symbol')
+    
+    @timed('provider')
+    def get_news_sentiment(self, query, priority=PRIORITY_FOREGROUND):
+        """Get rolling news sentiment from the news pipeline (cached process-wide)"""
+        if self.api_keys['newsdata']:
+            provider, fetch = 'newsdata', lambda: self._fetch_news_sentiment(query, priority)
         else:
-            # Mock data
-            return {
-                'symbol': symbol,
-                'price': np.random.uniform(50, 500),
-                'change': np.random.uniform(-10, 10),
-                'volume': np.random.randint(1000000, 10000000),
-                'market_cap': np.random.randint(100000000000, 1000000000000)
-            }
+            provider, fetch = 'mock', lambda: self._offline_news_sentiment(query)
+        try:
+            return get_quote_cache().get_or_fetch(provider, query, 'NEWS', fetch)
+        except Exception:
+            stale = get_quote_cache().get_stale(provider, query, 'NEWS')
+            return stale if stale is not None else self._mock_news_sentiment(query)
+    
+    def get_risk_inputs(self, options=None):
+        """Get inputs for the five risk families (mock for demo, options from chain analytics if given)"""
+        from risk_calculator import MOCK_RISK_INPUTS
+        from options_analytics import options_risk_inputs
+        
+        inputs = {family: dict(values) for family, values in MOCK_RISK_INPUTS.items()}
+        if options is not None:
+            inputs['options'] = options_risk_inputs(options)
+        return inputs
+    
+    @timed('provider')
+    def get_price_history(self, symbols, years=PRICE_HISTORY_YEARS):
+        """Daily close prices (date x symbol) from PRICE_HISTORY_PATH (mock for demo)"""
+        from portfolio_engine import PRICE_HISTORY_PATH, load_price_history
+        
+        if os.path.exists(PRICE_HISTORY_PATH):
+            return load_price_history(PRICE_HISTORY_PATH, symbols)
+        fixtures = get_fixture_set()
+        if fixtures is not None:
+            return fixtures.price_history(symbols)
+        return self._mock_price_history(symbols, years)
+    
+    @timed('provider')
+    def get_daily_changes(self, symbols):
+        """Last daily change (%) per symbol from the daily closes, without a quote call per symbol"""
+        closes = self.get_price_history(symbols, years=1).ffill().tail(2)
+        return (closes.iloc[-1] / closes.iloc[0] - 1) * 100
+    
+    @timed('provider')
+    def get_options_analytics(self):
+        """Options-chain analytics from the OPTIONS_CHAIN_PATH snapshot (mock chain for demo)"""
+        from options_analytics import analyze_chain, get_chain_snapshot
+        
+        analytics = get_chain_snapshot().get()
+        if analytics is not None:
+            return analytics
+        fixtures = get_fixture_set()
+        return analyze_chain(fixtures.options_chain() if fixtures is not None else self._mock_options_chain())
+    
+    @timed('provider')
+    def get_fundamentals(self, symbols, priority=PRIORITY_BACKGROUND):
+        """Quarterly statements for ``symbols`` from the on-disk cache, refetched only around earnings"""
+        from fundamentals import get_fundamentals_store, synthetic_statements
+        
+        store = get_fundamentals_store()
+        provider = self._quote_provider()
+        if provider == 'mock':
+            fetch = synthetic_statements
+        elif provider == 'replay':
+            fetch = get_fixture_set().statement
+        else:
+            def fetch(symbol, endpoint):
+                return get_scheduler().execute(
+                    'alpha_vantage', (endpoint, symbol), lambda: self._fetch_statement(symbol, endpoint),
+                    priority=priority, defer=False
+                )
+        try:
+            store.refresh(symbols, fetch, provider)
+        except Exception:
+            # Out of budget or a failed call: the cached statements stand and the rest stay due
+            pass
+        return store.table(symbols)
     
-    def get_news_sentiment(self, query):
-        """Get news sentiment (mock for demo)"""
+    @timed('provider')
+    def get_universe_risk_inputs(self, symbols):
+        """Get risk inputs for many tickers as one row per symbol (mock for demo)"""
+        from risk_calculator import MOCK_RISK_INPUTS
+        
+        fixtures = get_fixture_set()
+        if fixtures is not None:
+            return fixtures.universe_inputs(symbols)
+        n = len(symbols)
+        return pd.DataFrame({
+            'fcf_margin': np.random.normal(0.15, 0.15, n),
+            'revenue_growth': np.random.normal(0.2, 0.2, n),
+            'price_change': np.random.normal(0.2, 0.3, n),
+            'pe_ratio': np.random.lognormal(3.5, 0.5, n),
+            'price_to_sales': np.random.lognormal(2.2, 0.6, n),
+            'credit_spreads': np.full(n, MOCK_RISK_INPUTS['leverage']['credit_spreads']),
+            'breadth': np.full(n, MOCK_RISK_INPUTS['leverage']['breadth']),
+            'iv_level': np.random.uniform(0.12, 0.6, n),
+            'skew': np.random.uniform(0.0, 0.2, n),
+            'news_sentiment': np.random.uniform(-1, 1, n),
+            'social_sentiment': np.random.uniform(-1, 1, n)
+        }, index=pd.Index(symbols, name='symbol'))
+    
+    def record_fixtures(self, path, seed=0, query=SENTIMENT_QUERY, articles=100):
+        """Record what this provider serves now (live where keys are set, else mock) as replay fixtures"""
+        from fundamentals import STATEMENT_FIELDS, get_fundamentals_store, synthetic_statements
+        from options_analytics import OPTIONS_CHAIN_PATH, load_chain
+        
+        np.random.seed(seed)
+        quotes = self.get_stock_data_many(list(dict.fromkeys(HEATMAP_SYMBOLS + HOLDINGS)))
+        quotes = quotes[quotes['status'] != 'error'][['price', 'change', 'volume', 'market_cap']]
         if self.api_keys['newsdata']:
-            # In production, this would call NewsData.io API
-            return {
-                'sentiment': np.random.uniform(-1, 1),
-                'intensity': np.random.uniform(0, 1),
-                'article_count': np.random.randint(10, 100)
+            recorded = self._fetch_news_page(query, None, PRIORITY_BACKGROUND)['results']
+        else:
+            recorded = list(self._mock_news_articles(query, articles))
+        # Statements the refresher already fetched are recorded as stored; the rest are synthetic
+        cache = get_fundamentals_store().cache
+        statements = {}
+        for symbol in NASDAQ_100:
+            entry = cache.entry(symbol)
+            statements[symbol] = {
+                endpoint: (cache.get(entry['digests'][endpoint]) if entry and endpoint in entry['digests']
+                           else synthetic_statements(symbol, endpoint))
+                for endpoint in STATEMENT_FIELDS
             }
+        price_symbols = list(dict.fromkeys(list(PORTFOLIO_WEIGHTS) + EXPOSURE_BENCHMARKS + UNIVERSE))
+        write_fixtures(
+            path,
+            quotes={symbol: {'symbol': symbol, **{key: None if pd.isna(value) else value for key, value in row.items()}}
+                    for symbol, row in quotes.to_dict('index').items()},
+            articles=recorded,
+            chain=load_chain() if os.path.exists(OPTIONS_CHAIN_PATH) else self._mock_options_chain(seed),
+            prices=self.get_price_history(price_symbols),
+            statements=statements,
+            universe_inputs=self.get_universe_risk_inputs(UNIVERSE)
+        )
+    
+    def _quote_provider(self):
+        if self.api_keys['alpha_vantage']:
+            return 'alpha_vantage'
+        return 'replay' if get_fixture_set() is not None else 'mock'
+    
+    def _get_quote(self, symbol, priority):
+        """Get a quote through the cache; raises on provider errors or throttling"""
+        provider = self._quote_provider()
+        if provider != 'alpha_vantage':
+            fetch = get_fixture_set().quote if provider == 'replay' else self._mock_stock_data
+            return get_quote_cache().get_or_fetch(provider, symbol, 'GLOBAL_QUOTE', lambda: fetch(symbol))
+        return self._get_limited(
+            'alpha_vantage', symbol, 'GLOBAL_QUOTE', priority,
+            lambda: self._fetch_stock_data(symbol)
+        )
+    
+    def _get_limited(self, provider, symbol, endpoint, priority, fetch):
+        """Fetch through the cache and rate limiter; raises BudgetExhausted when throttled"""
+        cache = get_quote_cache()
+        
+        def scheduled_fetch():
+            return get_scheduler().execute(
+                provider, (endpoint, symbol), fetch, priority=priority,
+                on_result=lambda value: cache.set(provider, symbol, endpoint, value)
+            )
+        
+        return cache.get_or_fetch(provider, symbol, endpoint, scheduled_fetch)
+    
+    @timed('provider_call', 'alpha_vantage:GLOBAL_QUOTE')
+    def _fetch_stock_data(self, symbol):
+        """Fetch a real-time quote from Alpha Vantage"""
+        response = get_http_session().get(
+            ALPHA_VANTAGE_URL,
+            params={
+                'function': 'GLOBAL_QUOTE',
+                'symbol': symbol,
+                'apikey': self.api_keys['alpha_vantage']
+            },
+            timeout=HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        quote = response.json().get('Global Quote')
+        if not quote:
+            raise ValueError(f"No quote returned for {symbol}")
+        return {
+            'symbol': symbol,
+            'price': float(quote['05. price']),
+            'change': float(quote['09. change']),
+            'volume': int(quote['06. volume']),
+            'market_cap': None
+        }
+    
+    @timed('provider_call', 'alpha_vantage:statement')
+    def _fetch_statement(self, symbol, endpoint):
+        """Fetch one quarterly statement (INCOME_STATEMENT, CASH_FLOW, BALANCE_SHEET) from Alpha Vantage"""
+        response = get_http_session().get(
+            ALPHA_VANTAGE_URL,
+            params={
+                'function': endpoint,
+                'symbol': symbol,
+                'apikey': self.api_keys['alpha_vantage']
+            },
+            timeout=HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        payload = response.json()
+        # Throttled or invalid calls come back as 200 with a note instead of reports
+        if 'quarterlyReports' not in payload:
+            raise ValueError(f"No {endpoint} returned for {symbol}")
+        return payload
+    
+    def _fetch_news_sentiment(self, query, priority=PRIORITY_FOREGROUND):
+        """Pull the latest NewsData.io pages through the news pipeline"""
+        pipeline = get_news_pipeline(query)
+        fetched = []
+        
+        def fetch_page(query, page):
+            payload = self._fetch_news_page(query, page, priority)
+            fetched.append(page)
+            return payload
+        
+        try:
+            pipeline.ingest_pages(newsdata_pages(fetch_page, query, max_pages=NEWS_MAX_PAGES))
+        except BudgetExhausted:
+            # Out of budget part way through: keep what the earlier pages added
+            if not fetched:
+                raise
+        return pipeline.summary()
+    
+    def _fetch_news_page(self, query, page, priority):
+        """Fetch one NewsData.io result page, counted against the provider budget"""
+        params = {'apikey': self.api_keys['newsdata'], 'q': query, 'language': 'en'}
+        if page:
+            params['page'] = page
+        
+        @timed('provider_call', 'newsdata:NEWS')
+        def fetch():
+            response = get_http_session().get(NEWSDATA_URL, params=params, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            payload = response.json()
+            if payload.get('status') != 'success':
+                raise ValueError(f"NewsData.io error for {query!r}: {payload.get('results')}")
+            return payload
+        
+        try:
+            return get_scheduler().execute('newsdata', ('NEWS', query, page), fetch,
+                                           priority=priority, defer=False)
+        except BudgetExhausted as error:
+            # The per-second limit frees up quickly; only background refreshes wait for it
+            if priority != PRIORITY_BACKGROUND or error.retry_after > 1:
+                raise
+            time.sleep(error.retry_after)
+            return get_scheduler().execute('newsdata', ('NEWS', query, page), fetch,
+                                           priority=priority, defer=False)
+    
+    def _offline_news_sentiment(self, query):
+        """News sentiment without an API key: replay fixtures or NEWS_REPLAY_PATH, else mock articles"""
+        pipeline = get_news_pipeline(query)
+        fixtures = get_fixture_set()
+        if fixtures is not None:
+            pipeline.ingest(fixtures.news_articles(query))
+        elif os.path.exists(NEWS_REPLAY_PATH):
+            pipeline.replay(NEWS_REPLAY_PATH)
         else:
-            # Mock data
-            return {
-                'sentiment': np.random.uniform(-1, 1),
-                'intensity': np.random.uniform(0, 1),
-                'article_count': np.random.randint(10, 100)
+            pipeline.ingest(self._mock_news_articles(query))
+        return pipeline.summary()
+    
+    def _mock_stock_data(self, symbol):
+        """Mock stock data"""
+        return {
+            'symbol': symbol,
+            'price': np.random.uniform(50, 500),
+            'change': np.random.uniform(-10, 10),
+            'volume': np.random.randint(1000000, 10000000),
+            'market_cap': np.random.randint(100000000000, 1000000000000)
+        }
+    
+    def _mock_news_articles(self, query, count=25):
+        """Mock NewsData.io articles published over the last hour"""
+        headlines = [
+            ("NVIDIA's AI Dominance Shows No Signs of Slowing", 'Data center revenue growth stays strong'),
+            ("Analysts Warn of AI Bubble as Valuations Reach Historic Levels", 'Stretched valuations draw echoes of 1999'),
+            ("AI Infrastructure Spending Set to Double", 'Hyperscaler capex boom continues'),
+            ("GPU Shortage Persists as Demand Outpaces Supply", 'Chip shortage delays data center builds'),
+            ("Generative AI Revolution Lifts Software Stocks", "Bulls say this time it's different: a new paradigm"),
+            ("Retail Traders Pile Into AI Names", "Fear of missing out on a once in a generation rally"),
+            ("Semiconductor Stocks Decline on Rate Worries", 'Risk appetite falls across tech'),
+        ]
+        sources = ['reuters', 'bloomberg', 'ft', 'wsj', 'cnbc']
+        now = datetime.now(timezone.utc)
+        for index in np.random.randint(0, len(headlines), count):
+            title, description = headlines[index]
+            yield {
+                'article_id': uuid.uuid4().hex,
+                'title': title,
+                'description': description,
+                'source_id': sources[np.random.randint(len(sources))],
+                'pubDate': (now - timedelta(minutes=np.random.uniform(0, 60))).strftime('%Y-%m-%d %H:%M:%S')
             }
+    
+    def _mock_price_history(self, symbols, years):
+        """Mock daily prices from a market + AI factor model; the same history on every call"""
+        from portfolio_engine import LEVERAGED_ETFS, leveraged_returns
+        
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=years * 252)
+        rng = np.random.default_rng(7)
+        market = rng.normal(0.0004, 0.011, (len(dates), 1))
+        ai = rng.normal(0.0003, 0.012, (len(dates), 1))
+        underlyings = list(dict.fromkeys(
+            [LEVERAGED_ETFS[symbol][0] if symbol in LEVERAGED_ETFS else symbol for symbol in symbols]
+        ))
+        returns = {}
+        for symbol in underlyings:
+            # Seeded per symbol so a symbol's history does not depend on the others requested
+            own = np.random.default_rng(sum(map(ord, symbol)))
+            if symbol == 'SPY':
+                market_beta, ai_beta, noise = 1.0, 0.0, 0.002
+            else:
+                market_beta, ai_beta, noise = own.uniform(0.8, 1.4), own.uniform(0.3, 1.2), 0.012
+            returns[symbol] = (market_beta * market + ai_beta * ai)[:, 0] + own.normal(0, noise, len(dates))
+        for symbol in symbols:
+            if symbol in LEVERAGED_ETFS:
+                underlying, leverage = LEVERAGED_ETFS[symbol]
+                returns[symbol] = leveraged_returns(returns[underlying], leverage)
+        frame = pd.DataFrame(returns, index=dates)[list(symbols)]
+        return 100 * (1 + frame.clip(lower=-0.95)).cumprod()
+    
+    def _mock_options_chain(self, seed=None):
+        """Mock SPX-like options chain, seeded by the date so it only changes once a day"""
+        from options_analytics import synthetic_chain
+        
+        today = pd.Timestamp.now().normalize()
+        # A new chain every cycle would move the options inputs and rerun the Monte Carlo each refresh
+        rng = np.random.default_rng(today.toordinal() if seed is None else seed)
+        return synthetic_chain(spot=rng.uniform(4800, 5200), as_of=today, seed=rng)
+    
+    def _mock_news_sentiment(self, query):
+        """Mock news sentiment"""
+        return {
+            'sentiment': np.random.uniform(-1, 1),
+            'intensity': np.random.uniform(0, 1),
+            'article_count': np.random.randint(10, 100)
+        }
 
-# Risk Calculator Class
-class RiskCalculator:
-    def __init__(self):
-        pass
-        
-    def calculate_fundamental_divergence(self, fundamentals):
-        """Calculate fundamental divergence score"""
-        score = 0
-        if fundamentals.get('fcf_margin', 0) < 0:
-            score += 30
-        if fundamentals.get('revenue_growth', 0) < 0.1 and fundamentals.get('price_change', 0) > 0.2:
-            score += 25
-        return min(score, 100)
-    
-    def calculate_valuation_stretch(self, metrics):
-        """Calculate valuation stretch score"""
-        score = 0
-        if metrics.get('pe_ratio', 0) > 50:
-            score += 30
-        if metrics.get('price_to_sales', 0) > 20:
-            score += 25
-        return min(score, 100)
-    
-    def calculate_leverage_stress(self, market_data):
-        """Calculate leverage stress score"""
-        score = 0
-        if market_data.get('credit_spreads', 0) > 2:
-            score += 30
-        if market_data.get('breadth', 0) < 0.3:
-            score += 25
-        return min(score, 100)
-    
-    def calculate_options_euphoria(self, options_data):
-        """Calculate options euphoria score"""
-        score = 0
-        if options_data.get('iv_level', 0) < 0.2:
-            score += 30
-        if options_data.get('skew', 0) > 0.1:
-            score += 25
-        return min(score, 100)
-    
-    def calculate_sentiment_crowding(self, sentiment_data):
-        """Calculate sentiment crowding score"""
-        score = 0
-        if sentiment_data.get('news_sentiment', 0) > 0.8:
-            score += 20
-        if sentiment_data.get('social_sentiment', 0) > 0.9:
-            score += 20
-        return min(score, 100)
-    
-    def calculate_overall_risk_score(self):
-        """Calculate overall risk score"""
-        weights = {
-            'fundamentals': 0.30,
-            'valuation': 0.25,
-            'leverage': 0.20,
-            'options': 0.15,
-            'sentiment': 0.10
+@st.cache_resource
+def get_refresher():
+    """Start the single background refresher for this process (one leader across replicas with REDIS_URL)"""
+    if REDIS_URL:
+        from shared_tier import SharedRefresher, connect
+
+        return SharedRefresher(connect(REDIS_URL), setup=setup_refresh_tasks, interval_ms=REFRESH_INTERVAL_MS).start()
+    return BackgroundRefresher(setup=setup_refresh_tasks, interval_ms=REFRESH_INTERVAL_MS).start()
+
+def setup_refresh_tasks(refresher):
+    """Create the refresh tasks on the refresher thread, off the first-paint path"""
+    from risk_calculator import RiskCalculator
+    from history_store import get_history_store
+    from bar_store import get_bar_store
+    
+    provider = DataProvider(api_keys=SERVER_API_KEYS)
+    calculator = RiskCalculator()
+    latest = {}
+    
+    def refresh_exposure():
+        from portfolio_engine import ExposureEngine
+        
+        prices = provider.get_price_history(list(dict.fromkeys(list(PORTFOLIO_WEIGHTS) + EXPOSURE_BENCHMARKS)))
+        engine = latest.get('exposure_engine')
+        if engine is None:
+            engine = latest['exposure_engine'] = ExposureEngine(PORTFOLIO_WEIGHTS, EXPOSURE_BENCHMARKS).fit(prices)
+        else:
+            # Only new daily bars are folded into the EWMA covariance
+            engine.update(prices)
+        return engine.summary(seed=engine.bars)
+    
+    def refresh_options():
+        latest['options'] = provider.get_options_analytics()
+        return latest['options']
+    
+    def refresh_risk():
+        inputs = provider.get_risk_inputs(options=latest.get('options'))
+        score = calculator.calculate_risk_score_incremental('MARKET', inputs)
+        latest['risk'] = {
+            'inputs': inputs,
+            'score': score,
+            'components': calculator.component_scores('MARKET'),
+            'recompute_stats': dict(calculator.recompute_stats)
         }
+        return latest['risk']
+    
+    def refresh_scenarios():
+        from crash_simulator import CrashSimulator
         
-        # Mock data
-        fundamentals = {'fcf_margin': -0.02, 'revenue_growth': 0.15, 'price_change': 0.25}
-        valuation = {'pe_ratio': 65, 'price_to_sales': 25, 'market_cap_growth': 2.5}
-        leverage = {'credit_spreads': 2.5, 'breadth': 0.25, 'leverage_ratio': 4}
-        options = {'iv_level': 0.18, 'skew': 0.12, 'put_call_ratio': 0.7}
-        sentiment = {'news_sentiment': 0.85, 'social_sentiment': 0.92, 'narrative_intensity': 0.75}
-        
-        fundamental_score = self.calculate_fundamental_divergence(fundamentals)
-        valuation_score = self.calculate_valuation_stretch(valuation)
-        leverage_score = self.calculate_leverage_stress(leverage)
-        options_score = self.calculate_options_euphoria(options)
-        sentiment_score = self.calculate_sentiment_crowding(sentiment)
-        
-        overall_score = (
-            fundamental_score * weights['fundamentals'] +
-            valuation_score * weights['valuation'] +
-            leverage_score * weights['leverage'] +
-            options_score * weights['options'] +
-            sentiment_score * weights['sentiment']
-        )
+        inputs = latest['risk']['inputs']
+        # The simulation is seeded, so it only needs rerunning when the inputs move
+        if latest.get('scenario_inputs') != inputs:
+            latest['scenarios'] = CrashSimulator(workers=SIMULATION_WORKERS).run(inputs)
+            latest['scenario_inputs'] = inputs
+        return latest['scenarios']
+    
+    def refresh_fundamentals():
+        from fundamentals import fundamental_metrics, get_fundamentals_store
         
-        return min(100, int(overall_score))
+        table = provider.get_fundamentals(NASDAQ_100)
+        # Metrics move only with a new statement or a new daily close
+        key = (get_fundamentals_store().table_key, datetime.now().date())
+        if latest.get('fundamentals_key') != key:
+            symbols = list(table['symbol'].astype(str).unique())
+            metrics = fundamental_metrics(table, provider.get_price_history(symbols, years=2))
+            metrics['divergence'] = calculator.calculate_fundamental_divergence(metrics)
+            latest['fundamentals'] = {'table': table, 'metrics': metrics}
+            latest['fundamentals_key'] = key
+        return latest['fundamentals']
+    
+    def refresh_daily_changes():
+        # Daily closes move once a day
+        if latest.get('daily_changes_date') != datetime.now().date():
+            latest['daily_changes'] = provider.get_daily_changes(UNIVERSE)
+            latest['daily_changes_date'] = datetime.now().date()
+        return latest['daily_changes']
+    
+    def refresh_universe():
+        inputs = provider.get_universe_risk_inputs(UNIVERSE)
+        fundamentals = latest.get('fundamentals')
+        if fundamentals is not None:
+            # Statement-based inputs replace the mock ones where a ticker has them
+            inputs.update(fundamentals['metrics'][['fcf_margin', 'revenue_growth', 'price_change']])
+        return {'inputs': inputs, 'scores': calculator.score_universe_incremental(inputs)}
+    
+    refresher.tasks.update({
+        'quotes': lambda: provider.get_stock_data_many(LIVE_QUOTE_SYMBOLS, priority=PRIORITY_BACKGROUND),
+        'daily_changes': refresh_daily_changes,
+        'news_sentiment': lambda: provider.get_news_sentiment(SENTIMENT_QUERY, priority=PRIORITY_BACKGROUND),
+        'news': lambda: get_news_pipeline(SENTIMENT_QUERY).feed(),
+        'options': refresh_options,
+        'exposure': refresh_exposure,
+        'risk': refresh_risk,
+        'scenarios': refresh_scenarios,
+        'fundamentals': refresh_fundamentals,
+        'universe_risk': refresh_universe
+    })
+    history = get_history_store()
+    
+    def record_history(snapshot):
+        history.record_snapshot(snapshot, SENTIMENT_QUERY)
+        # Downsamples raw rows past HISTORY_RAW_DAYS once a day, so the database stops growing per refresh
+        history.compact_daily(snapshot.created_at)
+    
+    refresher.add_listener(record_history)
+    bars = get_bar_store()
+    
+    def record_bars(snapshot):
+        quotes = snapshot.get('quotes')
+        # Another worker on this host may be writing the bar file; take over once it exits
+        if quotes is not None and bars.acquire():
+            bars.append_quotes(quotes, snapshot.created_at)
+    
+    refresher.add_listener(record_bars)
+
+@st.cache_resource
+def get_state_service():
+    """Shared dashboard state, rebuilt once per refresh cycle for all sessions"""
+    refresher = get_refresher()
+    service = DashboardStateService(watchlist=HEATMAP_SYMBOLS)
+    refresher.add_listener(service.update)
+    if refresher.latest() is not None:
+        service.update(refresher.latest())
+    return service
+
+@st.cache_resource
+def get_telemetry():
+    """Start the metrics endpoint and the per-cycle JSON-lines log once per process, if configured"""
+    registry = get_registry()
+    if METRICS_PORT:
+        serve_metrics(registry, METRICS_PORT)
+    if METRICS_JSONL_PATH:
+        get_refresher().add_listener(lambda snapshot: registry.write_json_lines(METRICS_JSONL_PATH))
+    return registry
+
+def format_age(timestamp):
+    """'N minutes/hours ago' for an epoch-seconds timestamp"""
+    minutes = max(0, int((time.time() - timestamp) // 60))
+    if minutes < 60:
+        return f"{minutes} minutes ago"
+    return f"{minutes // 60} hours ago"
+
+# Sidebar page name -> render method; a page's data and imports load only when it is selected
+PAGES = {
+    "Executive Summary": "render_executive_summary",
+    "Fundamentals Analysis": "render_fundamentals_analysis",
+    "Options Risk": "render_options_risk",
+    "Exposure Map": "render_exposure_map",
+    "Sentiment Analysis": "render_sentiment_analysis"
+}
 
 # Main Dashboard Class
 class AIBubbleDashboard:
     def __init__(self):
-        self.data_provider = DataProvider()
-        self.risk_calculator = RiskCalculator()
+        self._data_provider = None
+        self._risk_calculator = None
+        self.state = None
+        self.watchlist_index = None
+    
+    @property
+    def data_provider(self):
+        if self._data_provider is None:
+            self._data_provider = DataProvider()
+        return self._data_provider
+    
+    @property
+    def risk_calculator(self):
+        if self._risk_calculator is None:
+            from risk_calculator import RiskCalculator
+            self._risk_calculator = RiskCalculator()
+        return self._risk_calculator
         
     def render_sidebar(self):
         """Render the sidebar with configuration options"""
@@ -263,6 +771,29 @@ class AIBubbleDashboard:
                     else:
                         st.warning("⚠️ Using mock data. Add API keys for live data.")
         
+        with st.sidebar.expander("API Budget", expanded=False):
+            for provider, usage in get_scheduler().metrics().items():
+                st.markdown(f"**{provider}**")
+                for window, budget in usage['usage'].items():
+                    st.progress(
+                        min(1.0, budget['used'] / budget['limit']),
+                        text=f"{window.replace('_', ' ')}: {budget['used']:.0f}/{budget['limit']}"
+                    )
+                st.caption(f"Queued: {usage['queued']} • Deferred: {usage['deferred']} • Failed: {usage['failed']}")
+            if REDIS_URL:
+                refresher = get_refresher()
+                st.caption(f"Shared data tier: {refresher.role} • snapshot {refresher.snapshot_bytes / 1e3:,.0f} kB")
+        
+        with st.sidebar.expander("Timings", expanded=False):
+            rows = get_registry().summary()
+            if rows:
+                timings = pd.DataFrame(rows).set_index(['span', 'name'])[['count', 'p50', 'p95', 'max']]
+                timings[['p50', 'p95', 'max']] *= 1000
+                st.dataframe(timings.round(1), width='stretch')
+                st.caption("Milliseconds; p50/p95 are bucket estimates • ?profile=1 profiles one rerun")
+            else:
+                st.caption("No spans recorded yet")
+        
         st.sidebar.markdown("---")
         st.sidebar.markdown("### 📊 Current Risk Score")
         risk_score = st.session_state.risk_score
@@ -297,13 +828,18 @@ class AIBubbleDashboard:
         st.sidebar.markdown("### 🧭 Navigation")
         page = st.sidebar.selectbox(
             "Select Page",
-            ["Executive Summary", "Fundamentals Analysis", "Options Risk", "Exposure Map", "Sentiment Analysis"]
+            list(PAGES)
         )
         
         return page
     
     def render_risk_gauge(self, score):
-        """Render the risk score gauge"""
+        """Render the risk score gauge (cached per score)"""
+        return get_figure_cache().get_or_build(
+            'risk_gauge', lambda: self._build_risk_gauge(score), data=score
+        )
+    
+    def _build_risk_gauge(self, score):
         fig = go.Figure(go.Indicator(
             mode = "gauge+number+delta",
             value = score,
@@ -322,7 +858,7 @@ class AIBubbleDashboard:
                 'threshold': {
                     'line': {'color': "red", 'width': 4},
                     'thickness': 0.75,
-                    'value': 70
+                    'value': ALERT_THRESHOLD
                 }
             }
         ))
@@ -346,27 +882,44 @@ class AIBubbleDashboard:
         with col1:
             st.markdown("### Risk Score")
             fig = self.render_risk_gauge(st.session_state.risk_score)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, width='stretch')
             
             st.markdown("### Key Metrics")
-            metrics = {
-                "Market Breadth": f"{-12.3}%",
-                "Options Skew": f"{2.1}%",
-                "NVDA vs SOXX": f"{8.7}%"
-            }
+            if self.state is not None and self.state.indicators:
+                metrics = self.state.indicators
+            else:
+                metrics = {
+                    "Market Breadth": f"{-12.3}%",
+                    "Options Skew": f"{2.1}%",
+                    "NVDA vs SOXX": f"{8.7}%"
+                }
             
             for metric, value in metrics.items():
                 st.metric(metric, value)
+            
+            scenarios = self.state.scenarios if self.state is not None else {}
+            if scenarios:
+                st.markdown("### Shock Scenarios")
+                percentiles = scenarios['percentiles']
+                st.metric("Median Score After Shock", percentiles[50],
+                          f"{percentiles[50] - scenarios['base_score']:+d}", delta_color="inverse")
+                st.metric("5th–95th Percentile", f"{percentiles[5]}–{percentiles[95]}")
+                st.metric("Regime Escalation", f"{scenarios['p_escalation'] * 100:.1f}%")
+                st.caption(f"{scenarios['paths']:,} correlated shock paths from the "
+                           f"{scenarios['current_regime']} regime")
         
         with col2:
             st.markdown("### Top Risk Drivers Today")
             
-            drivers = [
-                {"driver": "FCF Margin Deterioration", "impact": "+12 pts", "risk": "High"},
-                {"driver": "Leverage Froth", "impact": "+8 pts", "risk": "Medium"},
-                {"driver": "Sentiment Crowding", "impact": "+5 pts", "risk": "Medium"},
-                {"driver": "Credit Spreads", "impact": "+3 pts", "risk": "Low"}
-            ]
+            if self.state is not None and self.state.drivers:
+                drivers = self.state.drivers
+            else:
+                drivers = [
+                    {"driver": "FCF Margin Deterioration", "impact": "+12 pts", "risk": "High"},
+                    {"driver": "Leverage Froth", "impact": "+8 pts", "risk": "Medium"},
+                    {"driver": "Sentiment Crowding", "impact": "+5 pts", "risk": "Medium"},
+                    {"driver": "Credit Spreads", "impact": "+3 pts", "risk": "Low"}
+                ]
             
             for driver in drivers:
                 color = "red" if driver["risk"] == "High" else "orange" if driver["risk"] == "Medium" else "yellow"
@@ -387,106 +940,243 @@ class AIBubbleDashboard:
         with col3:
             st.markdown("### Live Alerts")
             
-            alerts = [
-                {"type": "High Risk", "message": "Risk score exceeded 70", "severity": "red"},
-                {"type": "Options", "message": "IV falling while prices rise", "severity": "yellow"}
-            ]
+            if self.state is None:
+                st.caption("Alerts appear after the first refresh")
+                alerts = ()
+            else:
+                alerts = self.state.alerts
+                if not alerts:
+                    st.caption("No active alerts")
             
-            for alert in alerts:
+            for alert in alerts[:LIVE_ALERTS_SHOWN]:
                 st.markdown(f"""
                 <div class="metric-container" style="border-left: 4px solid {alert['severity']};">
                     <strong style="color: {alert['severity']};">{alert['type']}</strong>
                     <p style="font-size: 0.9em; margin: 5px 0;">{alert['message']}</p>
                 </div>
                 """, unsafe_allow_html=True)
+            if len(alerts) > LIVE_ALERTS_SHOWN:
+                st.caption(f"+{len(alerts) - LIVE_ALERTS_SHOWN} more alerts")
             
             st.markdown("### Watchlist Heatmap")
-            watchlist = [
-                {"symbol": "NVDA", "risk": 85, "change": "+12%"},
-                {"symbol": "MSFT", "risk": 45, "change": "-2%"},
-                {"symbol": "AMD", "risk": 72, "change": "+8%"},
-                {"symbol": "SOXL", "risk": 92, "change": "+18%"}
-            ]
+            index = self.watchlist_index
+            if self.state is not None and index is not None and len(index):
+                order = st.radio("Rank by", ["Risk", "Daily change"], horizontal=True, key='heatmap_order')
+                low, high = st.slider("Risk range", 0, 100, (0, 100), key='heatmap_range')
+                shown = st.select_slider("Show", HEATMAP_SIZES, value=HEATMAP_SIZES[1], key='heatmap_size')
+                if order == "Risk":
+                    items = index.range(low, high, limit=shown)
+                elif (low, high) == (0, 100):
+                    items = index.top(shown, by='change')
+                else:
+                    # The change order has no risk bounds; walk it until enough symbols are in range
+                    items = [item for item in index.top(len(index), by='change')
+                             if low <= item['risk'] <= high][:shown]
+                st.caption(f"{len(items)} of {index.count(low, high)} symbols with risk {low}–{high}")
+            else:
+                items = [
+                    {"symbol": "SOXL", "risk": 92, "change": 18.0},
+                    {"symbol": "NVDA", "risk": 85, "change": 12.0},
+                    {"symbol": "AMD", "risk": 72, "change": 8.0},
+                    {"symbol": "MSFT", "risk": 45, "change": -2.0}
+                ]
             
-            for item in watchlist:
-                color = "red" if item["risk"] > 75 else "orange" if item["risk"] > 55 else "yellow"
-                st.markdown(f"""
-                <div class="metric-container">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <strong>{item['symbol']}</strong>
-                        <div style="text-align: right;">
-                            <div style="color: {color}; font-weight: bold;">{item['risk']}</div>
-                            <div style="font-size: 0.8em; color: #888;">{item['change']}</div>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            if items:
+                st.plotly_chart(self.render_watchlist_heatmap(items), width='stretch')
+            
+            self.render_intraday()
+    
+    def render_watchlist_heatmap(self, items):
+        """Render ranked watchlist items as one heatmap of tiles (cached per content)"""
+        cells = tuple((item['symbol'], item['risk'], item['change']) for item in items)
+        return get_figure_cache().get_or_build(
+            'watchlist_heatmap', lambda: self._build_watchlist_heatmap(cells), data=cells
+        )
+    
+    def render_intraday(self):
+        """Intraday price line and realized volatility of one watchlist symbol, from the bar store"""
+        from bar_store import get_bar_store
+        from risk_calculator import realized_volatility
+        
+        st.markdown("### Intraday")
+        # Bars are only recorded for the live-quoted symbols
+        symbol = st.selectbox("Symbol", LIVE_QUOTE_SYMBOLS, key='intraday_symbol')
+        # A view into the mapped file: no copy until Plotly serializes it
+        bars = get_bar_store().window(symbol, since=datetime.now() - timedelta(hours=INTRADAY_HOURS))
+        if len(bars) < 2:
+            st.caption("Intraday bars appear after a few refreshes")
+            return
+        fig = get_figure_cache().get_or_build(
+            'intraday', lambda: self._build_intraday_chart(bars), data=(symbol, int(bars['ts'][0]), int(bars['ts'][-1]))
+        )
+        st.plotly_chart(fig, width='stretch')
+        volatility = realized_volatility(bars['price'], bars['ts'])
+        shown = 'n/a' if np.isnan(volatility) else f"{volatility:.0%}"
+        st.caption(f"{len(bars)} bars over {INTRADAY_HOURS}h • realized volatility {shown} annualised")
+    
+    def _build_intraday_chart(self, bars):
+        fig = go.Figure(go.Scatter(
+            x=bars['ts'].astype('datetime64[ms]'), y=bars['price'], mode='lines',
+            line={'color': REGIME_FILLS[0], 'width': 2}
+        ))
+        fig.update_layout(**CHART_LAYOUT)
+        fig.update_layout(height=180, margin={'l': 0, 'r': 0, 't': 0, 'b': 0}, showlegend=False)
+        return fig
+    
+    def _build_watchlist_heatmap(self, cells):
+        rows = -(-len(cells) // HEATMAP_COLUMNS)
+        z = np.full(rows * HEATMAP_COLUMNS, np.nan)
+        text = np.full(rows * HEATMAP_COLUMNS, '', dtype=object)
+        for position, (symbol, risk, change) in enumerate(cells):
+            z[position] = risk
+            move = 'n/a' if np.isnan(change) else f"{change:+.1f}%"
+            text[position] = f"<b>{symbol}</b><br>{risk} · {move}"
+        # Discrete colorscale: one flat color per risk regime, as on the gauge
+        edges = [0] + [bound / 100 for bound in REGIME_BOUNDS] + [1]
+        colorscale = [[edge, fill] for low, high, fill in zip(edges, edges[1:], REGIME_FILLS)
+                      for edge in (low, high)]
+        fig = go.Figure(go.Heatmap(
+            z=z.reshape(rows, HEATMAP_COLUMNS),
+            text=text.reshape(rows, HEATMAP_COLUMNS),
+            texttemplate="%{text}",
+            hovertemplate="%{text}<extra></extra>",
+            zmin=0, zmax=100,
+            colorscale=colorscale,
+            showscale=False,
+            xgap=3, ygap=3
+        ))
+        fig.update_layout(**CHART_LAYOUT)
+        fig.update_layout(
+            height=60 * rows + 20,
+            margin={'l': 0, 'r': 0, 't': 0, 'b': 0},
+            xaxis={'visible': False},
+            yaxis={'visible': False, 'autorange': 'reversed'}
+        )
+        return fig
     
     def render_fundamentals_analysis(self):
         """Render fundamentals analysis page"""
+        import plotly.express as px
+        from history_store import get_history_store
+        
         st.title("📈 Fundamentals vs Market Analysis")
         
+        fundamentals = self.state.fundamentals if self.state is not None else {}
+        metrics = fundamentals.get('metrics')
+        
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("### NVIDIA (NVDA)")
-            
             # Mock data for demonstration
-            nvda_data = {
-                "Price": "$875.30",
-                "Change": "+2.4%",
-                "FCF Margin": "32.1%",
-                "Revenue Growth": "+122%",
-                "Price/FCF": "68.5x",
-                "Quality Score": "A-"
+            companies = {
+                "NVDA": ("NVIDIA (NVDA)", {
+                    "Price": "$875.30",
+                    "Change": "+2.4%",
+                    "FCF Margin": "32.1%",
+                    "Revenue Growth": "+122%",
+                    "Price/FCF": "68.5x",
+                    "Quality Score": "A-"
+                }),
+                "MSFT": ("Microsoft (MSFT)", {
+                    "Price": "$415.25",
+                    "Change": "+1.2%",
+                    "FCF Margin": "28.9%",
+                    "Revenue Growth": "+16.5%",
+                    "Price/FCF": "32.1x",
+                    "Quality Score": "A+"
+                })
             }
             
-            for key, value in nvda_data.items():
-                st.metric(key, value)
-            
-            st.markdown("### Microsoft (MSFT)")
+            def percent(value, sign=''):
+                return "n/a" if pd.isna(value) else f"{value * 100:{sign}.1f}%"
             
-            msft_data = {
-                "Price": "$415.25",
-                "Change": "+1.2%",
-                "FCF Margin": "28.9%",
-                "Revenue Growth": "+16.5%",
-                "Price/FCF": "32.1x",
-                "Quality Score": "A+"
-            }
-            
-            for key, value in msft_data.items():
-                st.metric(key, value)
+            for symbol, (title, values) in companies.items():
+                st.markdown(f"### {title}")
+                if metrics is not None and symbol in metrics.index:
+                    # Trailing twelve months from the cached quarterly statements
+                    row = metrics.loc[symbol]
+                    values = {
+                        "Price": f"${row['price']:,.2f}",
+                        "1Y Change": percent(row['price_change'], '+'),
+                        "FCF Margin": percent(row['fcf_margin']),
+                        "Revenue Growth": percent(row['revenue_growth'], '+'),
+                        "Price/FCF": "n/a" if pd.isna(row['price_fcf']) else f"{row['price_fcf']:.1f}x",
+                        "Quality Score": row['quality']
+                    }
+                
+                for key, value in values.items():
+                    st.metric(key, value)
+                if metrics is not None and symbol in metrics.index:
+                    st.caption(f"TTM to quarter ending {row['fiscal_date']:%b %d, %Y}")
         
         with col2:
             st.markdown("### FCF Trends")
             
-            # Create sample chart
-            dates = pd.date_range(start='2023-01-01', periods=5, freq='Q')
-            nvda_fcf = [28.5, 31.2, 34.8, 35.1, 32.1]
-            msft_fcf = [25.7, 27.1, 28.5, 29.3, 28.9]
+            table = fundamentals.get('table')
+            history = None
+            if table is None or not {'NVDA', 'MSFT'} <= set(table['symbol'].astype(str)):
+                # Stored history when there is some, otherwise a sample chart
+                history = get_history_store().daily(
+                    'risk_inputs', 'fcf_margin', keys=['NVDA', 'MSFT'],
+                    start=datetime.now() - timedelta(days=365), how='mean'
+                )
+            if history is None:
+                from fundamentals import trailing
+                
+                ttm = trailing(table[table['symbol'].isin(['NVDA', 'MSFT'])])
+                df = (ttm.assign(symbol=ttm['symbol'].astype(str), margin=ttm['fcf'] / ttm['revenue'] * 100)
+                      .pivot(index='fiscal_date', columns='symbol', values='margin')
+                      .rename_axis('Date').rename_axis(None, axis=1).reset_index())
+            elif len(history) > 1 and {'NVDA', 'MSFT'} <= set(history.columns):
+                df = (history * 100).dropna().rename_axis('Date').reset_index()
+            else:
+                dates = pd.date_range(start='2023-01-01', periods=5, freq='QS')
+                nvda_fcf = [28.5, 31.2, 34.8, 35.1, 32.1]
+                msft_fcf = [25.7, 27.1, 28.5, 29.3, 28.9]
+                
+                df = pd.DataFrame({
+                    'Date': dates,
+                    'NVDA': nvda_fcf,
+                    'MSFT': msft_fcf
+                })
             
-            df = pd.DataFrame({
-                'Date': dates,
-                'NVDA': nvda_fcf,
-                'MSFT': msft_fcf
-            })
+            def build_fcf_chart():
+                fig = px.line(df, x='Date', y=['NVDA', 'MSFT'], 
+                             title="Free Cash Flow Margin Trends")
+                fig.update_layout(**CHART_LAYOUT)
+                return fig
             
-            fig = px.line(df, x='Date', y=['NVDA', 'MSFT'], 
-                         title="Free Cash Flow Margin Trends")
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+            fig = get_figure_cache().get_or_build(
+                'fcf_trends', build_fcf_chart, data=df, layout=CHART_LAYOUT
             )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, width='stretch')
             
             st.markdown("### Divergence Warnings")
-            warnings = [
-                {"company": "CrowdStrike", "issue": "Negative FCF", "risk": "High"},
-                {"company": "Oracle", "issue": "FCF compression", "risk": "Medium"},
-                {"company": "AMD", "issue": "Multiple expansion", "risk": "Watch"}
-            ]
+            if metrics is not None and len(metrics):
+                from risk_calculator import RISK_THRESHOLDS
+                
+                # calculate_fundamental_divergence has scored every ticker in the table
+                flagged = metrics[metrics['divergence'] > 0].sort_values(
+                    ['divergence', 'fcf_margin'], ascending=[False, True]
+                )
+                warnings = []
+                for symbol, row in flagged.head(DIVERGENCE_WARNINGS_SHOWN).iterrows():
+                    issues = []
+                    if row['fcf_margin'] < RISK_THRESHOLDS['fcf_margin']:
+                        issues.append(f"Negative FCF ({row['fcf_margin'] * 100:.1f}% margin)")
+                    if (row['revenue_growth'] < RISK_THRESHOLDS['revenue_growth']
+                            and row['price_change'] > RISK_THRESHOLDS['price_change']):
+                        issues.append(f"Price {row['price_change'] * 100:+.0f}% on "
+                                      f"{row['revenue_growth'] * 100:+.0f}% revenue growth")
+                    level = "High" if row['divergence'] >= 55 else "Medium" if row['divergence'] >= 30 else "Watch"
+                    warnings.append({"company": symbol, "issue": "; ".join(issues), "risk": level})
+                st.caption(f"{len(flagged)} of {len(metrics)} tickers diverging from fundamentals")
+            else:
+                warnings = [
+                    {"company": "CrowdStrike", "issue": "Negative FCF", "risk": "High"},
+                    {"company": "Oracle", "issue": "FCF compression", "risk": "Medium"},
+                    {"company": "AMD", "issue": "Multiple expansion", "risk": "Watch"}
+                ]
             
             for warning in warnings:
                 color = "red" if warning["risk"] == "High" else "orange" if warning["risk"] == "Medium" else "yellow"
@@ -513,6 +1203,16 @@ class AIBubbleDashboard:
                 "Put/Call Ratio": "0.73",
                 "Crash Risk": "Elevated"
             }
+            options = self.state.options if self.state is not None else {}
+            if options:
+                # Computed from the options chain by options_analytics.analyze_chain
+                euphoria = self.state.components.get('options', 0)
+                indicators = {
+                    "Market IV Level": f"{options['iv_level'] * 100:.1f}%",
+                    "10Δ–90Δ Skew": f"{options['skew'] * 100:.1f} vol pts",
+                    "Put/Call Ratio": f"{options['put_call_ratio']:.2f}",
+                    "Crash Risk": "Elevated" if euphoria >= 50 else "Moderate" if euphoria >= 25 else "Low"
+                }
             
             for indicator, value in indicators.items():
                 st.metric(indicator, value)
@@ -524,6 +1224,13 @@ class AIBubbleDashboard:
                 {"name": "VVIX", "status": "112.5", "change": "+8.2"},
                 {"name": "Skew Kurtosis", "status": "3.2", "change": "Fat tails"}
             ]
+            if options:
+                gamma = options['gamma_exposure']
+                crash_indicators[1] = {
+                    "name": "Gamma Exposure",
+                    "status": f"{'-' if gamma < 0 else '+'}${abs(gamma) / 1e9:.1f}B",
+                    "change": "Dealers short gamma" if gamma < 0 else "Dealers long gamma"
+                }
             
             for indicator in crash_indicators:
                 st.markdown(f"""
@@ -542,17 +1249,24 @@ class AIBubbleDashboard:
             strikes = ['10Δ', '25Δ', '40Δ', '50Δ', '60Δ', '75Δ', '90Δ']
             current_iv = [22.5, 20.1, 18.9, 18.2, 17.8, 17.2, 16.8]
             historical_iv = [19.8, 18.5, 17.9, 17.5, 17.2, 16.9, 16.5]
+            if options:
+                strikes = list(options['skew_curve'])
+                current_iv = [round(iv * 100, 2) for iv in options['skew_curve'].values()]
+                historical_iv = None
+            
+            def build_skew_chart():
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=strikes, y=current_iv, name='Current', line=dict(color='#00d4ff')))
+                if historical_iv is not None:
+                    fig.add_trace(go.Scatter(x=strikes, y=historical_iv, name='Historical', line=dict(color='#6c757d', dash='dash')))
+                fig.update_layout(title="Implied Volatility by Strike", **CHART_LAYOUT)
+                return fig
             
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=strikes, y=current_iv, name='Current', line=dict(color='#00d4ff')))
-            fig.add_trace(go.Scatter(x=strikes, y=historical_iv, name='Historical', line=dict(color='#6c757d', dash='dash')))
-            fig.update_layout(
-                title="Implied Volatility by Strike",
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+            fig = get_figure_cache().get_or_build(
+                'volatility_skew', build_skew_chart,
+                data=[strikes, current_iv, historical_iv], layout=CHART_LAYOUT
             )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, width='stretch')
             
             st.markdown("### Options Flow")
             flow_data = [
@@ -573,30 +1287,55 @@ class AIBubbleDashboard:
     
     def render_exposure_map(self):
         """Render exposure map analysis page"""
+        import plotly.express as px
+        
         st.title("🗺️ Sector & ETF Exposure Map")
         
+        exposure = self.state.exposure if self.state is not None else {}
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("### Portfolio Metrics")
             
-            metrics = {
-                "AI Beta Exposure": "2.4x",
-                "Leverage Ratio": "4.2x",
-                "Concentration Risk": "High",
-                "Hedge Effectiveness": "Low"
-            }
+            if exposure:
+                ai_betas = exposure['benchmark_betas'][EXPOSURE_BENCHMARKS[1]]
+                ai_beta = sum(weight * ai_betas[symbol] for symbol, weight in exposure['weights'].items())
+                positions = exposure['effective_positions']
+                hedge = exposure['hedge_ratio']
+                metrics = {
+                    "AI Beta Exposure": f"{ai_beta / sum(exposure['weights'].values()):.1f}x",
+                    "Leverage Ratio": f"{exposure['effective_leverage']:.1f}x",
+                    "Concentration Risk": "High" if positions < 5 else "Medium" if positions < 10 else "Low",
+                    "Hedge Effectiveness": "High" if hedge > 0.5 else "Medium" if hedge > 0.2 else "Low"
+                }
+            else:
+                metrics = {
+                    "AI Beta Exposure": "2.4x",
+                    "Leverage Ratio": "4.2x",
+                    "Concentration Risk": "High",
+                    "Hedge Effectiveness": "Low"
+                }
             
             for metric, value in metrics.items():
                 st.metric(metric, value)
             
             st.markdown("### Risk Metrics")
-            risk_metrics = [
-                {"metric": "Portfolio Beta", "value": "1.87", "note": "vs S&P 500"},
-                {"metric": "Diversification Ratio", "value": "0.73", "note": "Lower = better"},
-                {"metric": "Max Drawdown Risk", "value": "-42%", "note": "Stress test"},
-                {"metric": "Liquidity Risk", "value": "Medium", "note": "Leveraged ETFs"}
-            ]
+            if exposure:
+                risk_metrics = [
+                    {"metric": "Portfolio Beta", "value": f"{exposure['portfolio_beta']:.2f}", "note": "vs S&P 500"},
+                    {"metric": "Diversification Ratio", "value": f"{exposure['diversification_ratio']:.2f}",
+                     "note": "Higher = more diversified"},
+                    {"metric": "Max Drawdown Risk", "value": f"{exposure['monte_carlo_drawdown'] * 100:.0f}%",
+                     "note": f"1-year stress test, 5% tail (worst historical {exposure['historical_max_drawdown'] * 100:.0f}%)"},
+                    {"metric": "Liquidity Risk", "value": "Medium", "note": "Leveraged ETFs"}
+                ]
+            else:
+                risk_metrics = [
+                    {"metric": "Portfolio Beta", "value": "1.87", "note": "vs S&P 500"},
+                    {"metric": "Diversification Ratio", "value": "0.73", "note": "Lower = better"},
+                    {"metric": "Max Drawdown Risk", "value": "-42%", "note": "Stress test"},
+                    {"metric": "Liquidity Risk", "value": "Medium", "note": "Leveraged ETFs"}
+                ]
             
             for metric in risk_metrics:
                 st.markdown(f"""
@@ -612,12 +1351,21 @@ class AIBubbleDashboard:
         with col2:
             st.markdown("### Portfolio Holdings")
             
-            holdings = [
-                {"symbol": "NVDA", "weight": "8.5%", "type": "Individual"},
-                {"symbol": "SOXX", "weight": "12.3%", "type": "ETF"},
-                {"symbol": "SOXL", "weight": "15.7%", "type": "Leveraged ETF"},
-                {"symbol": "TECL", "weight": "11.2%", "type": "Leveraged ETF"}
-            ]
+            if exposure:
+                decay = exposure['leveraged_decay']
+                holdings = [
+                    {"symbol": symbol, "weight": f"{weight * 100:.1f}%",
+                     "type": (f"Leveraged ETF · {decay[symbol] * 100:.0f}%/yr volatility decay" if symbol in decay
+                              else "ETF" if symbol in AI_ETFS else "Individual")}
+                    for symbol, weight in exposure['weights'].items()
+                ]
+            else:
+                holdings = [
+                    {"symbol": "NVDA", "weight": "8.5%", "type": "Individual"},
+                    {"symbol": "SOXX", "weight": "12.3%", "type": "ETF"},
+                    {"symbol": "SOXL", "weight": "15.7%", "type": "Leveraged ETF"},
+                    {"symbol": "TECL", "weight": "11.2%", "type": "Leveraged ETF"}
+                ]
             
             for holding in holdings:
                 color = "red" if "Leveraged" in holding["type"] else "blue" if "ETF" in holding["type"] else "green"
@@ -633,24 +1381,55 @@ class AIBubbleDashboard:
             
             st.markdown("### ETF Performance")
             
-            months = ['1M', '3M', '6M', 'YTD', '1Y']
-            soxl_returns = [45, 78, 125, 156, 234]
-            tecl_returns = [38, 65, 98, 134, 189]
+            df = self.load_period_returns(['SOXL', 'TECL'])
+            if df is None:
+                months = ['1M', '3M', '6M', 'YTD', '1Y']
+                soxl_returns = [45, 78, 125, 156, 234]
+                tecl_returns = [38, 65, 98, 134, 189]
+                
+                df = pd.DataFrame({
+                    'Period': months,
+                    'SOXL': soxl_returns,
+                    'TECL': tecl_returns
+                })
             
-            df = pd.DataFrame({
-                'Period': months,
-                'SOXL': soxl_returns,
-                'TECL': tecl_returns
-            })
+            def build_etf_chart():
+                fig = px.line(df, x='Period', y=['SOXL', 'TECL'], 
+                             title="Leveraged ETF Returns (%)")
+                fig.update_layout(**CHART_LAYOUT)
+                return fig
             
-            fig = px.line(df, x='Period', y=['SOXL', 'TECL'], 
-                         title="Leveraged ETF Returns (%)")
-            fig.update_layout(
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+            fig = get_figure_cache().get_or_build(
+                'etf_returns', build_etf_chart, data=df, layout=CHART_LAYOUT
             )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, width='stretch')
+    
+    def load_period_returns(self, symbols):
+        """Trailing returns (%) per period from stored quotes, or None without enough history"""
+        from history_store import get_history_store
+        
+        now = datetime.now()
+        starts = {
+            '1M': now - timedelta(days=30),
+            '3M': now - timedelta(days=91),
+            '6M': now - timedelta(days=182),
+            'YTD': datetime(now.year, 1, 1),
+            '1Y': now - timedelta(days=365)
+        }
+        # Daily closes aggregated in SQL and cached until the next write, not every stored refresh
+        prices = get_history_store().daily('quotes', 'price', keys=symbols, start=min(starts.values()))
+        if prices.empty or not set(symbols) <= set(prices.columns):
+            return None
+        prices = prices[symbols].ffill().dropna()
+        rows = []
+        for period, start in starts.items():
+            window = prices[prices.index >= start]
+            # Skip periods the stored history does not cover
+            if len(window) < 2 or window.index[0] - pd.Timestamp(start) > timedelta(days=5):
+                continue
+            returns = (window.iloc[-1] / window.iloc[0] - 1) * 100
+            rows.append({'Period': period, **returns.to_dict()})
+        return pd.DataFrame(rows) if rows else None
     
     def render_sentiment_analysis(self):
         """Render sentiment analysis page"""
@@ -667,6 +1446,12 @@ class AIBubbleDashboard:
                 "Source Credibility": "8.4/10",
                 "Bubble Language": "Detected"
             }
+            summary = self.state.news_summary if self.state is not None else {}
+            if summary:
+                intensity = summary['intensity']
+                sentiment_data["Overall Sentiment"] = f"{summary['sentiment']:+.2f}"
+                sentiment_data["Narrative Intensity"] = "High" if intensity >= 0.66 else "Medium" if intensity >= 0.33 else "Low"
+                sentiment_data["Bubble Language"] = "Detected" if self.state.bubble_phrases else "None"
             
             for metric, value in sentiment_data.items():
                 color = "green" if "+" in value or "/10" in value else "red" if "Detected" in value else "yellow"
@@ -687,6 +1472,12 @@ class AIBubbleDashboard:
                 {"topic": "Data Center Boom", "mentions": "1,456", "sentiment": "+0.67"},
                 {"topic": "Valuation Concerns", "mentions": "987", "sentiment": "-0.45"}
             ]
+            if self.state is not None and self.state.topics:
+                # Rolling 24h counts from the news pipeline
+                topics = [
+                    {"topic": row['topic'], "mentions": f"{row['mentions']:,}", "sentiment": f"{row['sentiment']:+.2f}"}
+                    for row in self.state.topics
+                ]
             
             for topic in topics:
                 color = "green" if float(topic["sentiment"]) > 0 else "red" if float(topic["sentiment"]) < -0.3 else "yellow"
@@ -710,6 +1501,13 @@ class AIBubbleDashboard:
                 {"phrase": "Once in a Lifetime", "mentions": "98", "type": "Unique framing"}
             ]
             
+            if self.state is not None and self.state.bubble_phrases:
+                # Rolling 24h phrase counts from the news pipeline
+                bubble_phrases = [
+                    {"phrase": row['phrase'], "mentions": f"{row['mentions']:,}", "type": row['type']}
+                    for row in self.state.bubble_phrases[:4]
+                ]
+            
             for phrase in bubble_phrases:
                 st.markdown(f"""
                 <div class="metric-container" style="border-left: 4px solid #ff6b6b;">
@@ -742,6 +1540,17 @@ class AIBubbleDashboard:
                 }
             ]
             
+            if self.state is not None and self.state.news:
+                news_items = [
+                    {
+                        "title": article['title'],
+                        "source": article['source'],
+                        "sentiment": "Positive" if article['sentiment'] > 0.05 else "Negative" if article['sentiment'] < -0.05 else "Neutral",
+                        "time": format_age(article['published_at'])
+                    }
+                    for article in self.state.news[:5]
+                ]
+            
             for item in news_items:
                 color = "green" if item["sentiment"] == "Positive" else "red" if item["sentiment"] == "Negative" else "yellow"
                 st.markdown(f"""
@@ -752,22 +1561,40 @@ class AIBubbleDashboard:
                 </div>
                 """, unsafe_allow_html=True)
     
+    def apply_snapshot(self):
+        """Pick up the shared dashboard state without blocking or copying it"""
+        service = get_state_service()
+        self.state = service.current()
+        self.watchlist_index = service.watchlist_index
+        if self.state is None:
+            return
+        st.session_state.risk_score = self.state.risk_score
+        st.session_state.last_update = self.state.created_at
+    
     def run(self):
-        """Main application runner"""
+        """Main application runner; ``?profile=1`` captures a cProfile of this one rerun"""
+        get_telemetry()
+        if st.query_params.get('profile') != '1':
+            self.render()
+            return
+        # Cleared first so only this rerun is profiled
+        del st.query_params['profile']
+        with profiled() as profile:
+            self.render()
+        with st.expander("⏱️ Profile of this rerun", expanded=True):
+            st.caption(f"Saved to {profile['path']} (open with snakeviz or pstats)")
+            st.code(profile['report'])
+    
+    def render(self):
+        """Render the sidebar, the selected page and the footer"""
+        self.apply_snapshot()
+        
         # Sidebar configuration
         selected_page = self.render_sidebar()
         
         # Main content area
-        if selected_page == "Executive Summary":
-            self.render_executive_summary()
-        elif selected_page == "Fundamentals Analysis":
-            self.render_fundamentals_analysis()
-        elif selected_page == "Options Risk":
-            self.render_options_risk()
-        elif selected_page == "Exposure Map":
-            self.render_exposure_map()
-        elif selected_page == "Sentiment Analysis":
-            self.render_sentiment_analysis()
+        with span('page', PAGES[selected_page]):
+            getattr(self, PAGES[selected_page])()
         
         # Footer
         st.markdown("---")
@@ -779,7 +1606,7 @@ class AIBubbleDashboard:
                 © 2025 AI Bubble Dashboard • For educational purposes only • Not investment advice
             </p>
         </div>
-        """.format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")), unsafe_allow_html=True)
+        """.format(st.session_state.last_update.strftime("%Y-%m-%d %H:%M:%S")), unsafe_allow_html=True)
 
 if __name__ == "__main__":
     dashboard = AIBubbleDashboard()
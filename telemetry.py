@@ -0,0 +1,255 @@
+import functools
+import io
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+TELEMETRY_ENABLED = os.environ.get('TELEMETRY_ENABLED', '1') != '0'
+# Serves /metrics (Prometheus text) and /metrics.jsonl on localhost when set
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+# Appends one JSON line per span series after every refresh cycle when set
+METRICS_JSONL_PATH = os.environ.get('METRICS_JSONL_PATH', '')
+PROFILE_DIR = os.path.join('data', 'profiles')
+
+METRIC_NAME = 'dashboard_span_seconds'
+# Upper bounds (seconds) of the histogram buckets: 50us to ~52s, doubling
+BUCKET_BOUNDS = tuple(0.00005 * 2 ** i for i in range(21))
+
+
+class Histogram:
+    """Counts of span durations per fixed bucket, plus their sum and max"""
+    __slots__ = ('counts', 'sum', 'count', 'max', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        bucket = bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.sum += seconds
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count, self.max
+
+    def quantile(self, q):
+        counts, _, count, largest = self.snapshot()
+        return bucket_quantile(counts, count, largest, q)
+
+
+def bucket_quantile(counts, count, largest, q):
+    """Upper bound of the bucket holding the ``q`` quantile, capped at the largest sample (NaN when empty)"""
+    if not count:
+        return float('nan')
+    target, seen = q * count, 0
+    for bucket, bucket_count in enumerate(counts[:-1]):
+        seen += bucket_count
+        if seen >= target:
+            return min(BUCKET_BOUNDS[bucket], largest)
+    return largest
+
+
+class Registry:
+    """Span histograms keyed by (span, name), rendered as Prometheus text or JSON lines"""
+
+    def __init__(self, enabled=TELEMETRY_ENABLED):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, span, name):
+        key = (span, name)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, span, name, seconds):
+        self.histogram(span, name).observe(seconds)
+
+    def span(self, span, name=''):
+        """Context manager timing the block into the (span, name) histogram, errors included"""
+        return _Span(self.histogram(span, name)) if self.enabled else _NO_SPAN
+
+    def timed(self, span, name=None):
+        """Decorator timing every call; ``name`` defaults to the function's name"""
+        def decorate(function):
+            label = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.histogram(span, label).observe(time.perf_counter() - started)
+            return wrapper
+        return decorate
+
+    def series(self):
+        """[(span, name, counts, sum, count, max)] sorted by span and name"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return [(span, name, *histogram.snapshot()) for (span, name), histogram in items]
+
+    def summary(self):
+        """One dict per series with count, total, mean, p50/p95/p99 and max seconds"""
+        rows = []
+        for span, name, counts, total, count, largest in self.series():
+            rows.append({
+                'span': span, 'name': name, 'count': count, 'sum': total,
+                'mean': total / count if count else float('nan'),
+                'p50': bucket_quantile(counts, count, largest, 0.5),
+                'p95': bucket_quantile(counts, count, largest, 0.95),
+                'p99': bucket_quantile(counts, count, largest, 0.99),
+                'max': largest
+            })
+        return rows
+
+    def prometheus(self):
+        """Prometheus text exposition format (cumulative ``le`` buckets)"""
+        lines = [f"# HELP {METRIC_NAME} Duration of instrumented spans.", f"# TYPE {METRIC_NAME} histogram"]
+        for span, name, counts, total, count, _ in self.series():
+            labels = f'span="{_escape(span)}",name="{_escape(name)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKET_BOUNDS, counts):
+                cumulative += bucket_count
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total:.9f}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def json_lines(self, ts=None):
+        """One JSON object per series, stamped with ``ts`` (epoch seconds)"""
+        ts = time.time() if ts is None else ts
+        return ''.join(json.dumps({'ts': ts, **row}) + '\n' for row in self.summary())
+
+    def write_json_lines(self, path=METRICS_JSONL_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as handle:
+            handle.write(self.json_lines())
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+class _Span:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def serve_metrics(registry, port=METRICS_PORT, host='127.0.0.1'):
+    """Serve ``registry`` at /metrics and /metrics.jsonl on a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = registry.prometheus(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.jsonl':
+                body, content_type = registry.json_lines(), 'application/x-ndjson'
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+@contextmanager
+def profiled(directory=PROFILE_DIR, label='rerun', top=25):
+    """cProfile the block; yields a dict that receives the stats path and a text report"""
+    import cProfile
+    import pstats
+
+    result = {}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+        result.update(path=path, report=report.getvalue())
+
+
+# Process-wide registry shared by the refresher and every Streamlit session
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide span Registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = Registry()
+        return _registry
+
+
+def span(span, name=''):
+    """Time a block into the process-wide registry"""
+    return get_registry().span(span, name)
+
+
+def timed(span, name=None):
+    """Decorator timing calls into the process-wide registry"""
+    return get_registry().timed(span, name)
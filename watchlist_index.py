@@ -0,0 +1,235 @@
+import math
+import random
+import threading
+
+import numpy as np
+
+MAX_LEVEL = 24                 # enough for ~16M keys at p = 1/2
+ORDERS = ('risk', 'change')
+_LAST = '\uffff'               # sorts after every symbol, closing (value, symbol) ranges
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        # width[i]: keys skipped by following next[i], so ranks are found on the way down
+        self.width = [1] * level
+
+
+class SkipList:
+    """Sorted keys with O(log n) insert, remove, rank and range lookups (indexable skip list)"""
+
+    def __init__(self, max_level=MAX_LEVEL, seed=None):
+        self.max_level = max_level
+        self._head = _Node(None, max_level)
+        self._level = 1
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        level = 1
+        while level < self.max_level and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """Last node before ``key`` on every level, and the rank of each"""
+        update, ranks = [self._head] * self.max_level, [0] * self.max_level
+        node, rank = self._head, 0
+        for level in range(self._level - 1, -1, -1):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                rank += node.width[level]
+                node = following
+                following = node.next[level]
+            update[level] = node
+            ranks[level] = rank
+        return update, ranks
+
+    def insert(self, key):
+        update, ranks = self._path(key)
+        level = self._random_level()
+        for fresh in range(self._level, level):
+            self._head.width[fresh] = self._size + 1
+        self._level = max(self._level, level)
+        node = _Node(key, level)
+        rank = ranks[0] + 1
+        for i in range(self._level):
+            if i < level:
+                before = update[i]
+                node.next[i] = before.next[i]
+                before.next[i] = node
+                skipped = rank - ranks[i]
+                node.width[i] = before.width[i] - skipped + 1
+                before.width[i] = skipped
+            else:
+                update[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        update, _ = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(self._level):
+            before = update[i]
+            if before.next[i] is node:
+                before.width[i] += node.width[i] - 1
+                before.next[i] = node.next[i]
+            else:
+                before.width[i] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+
+    def bisect_left(self, key):
+        """Number of keys below ``key``"""
+        return self._path(key)[1][0]
+
+    def _node_at(self, rank):
+        """Node at 0-based ``rank``"""
+        node, position = self._head, -1
+        for level in reversed(range(self._level)):
+            while node.next[level] is not None and position + node.width[level] <= rank:
+                position += node.width[level]
+                node = node.next[level]
+        return node
+
+    def islice(self, start, stop):
+        """Keys at ranks [start, stop), ascending"""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        node, keys = self._node_at(start), []
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def irange(self, low, high):
+        """Keys with low <= key <= high, ascending"""
+        node, keys = self._path(low)[0][0].next[0], []
+        while node is not None and node.key <= high:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class WatchlistIndex:
+    """Watchlist symbols ranked by risk score and by daily change.
+
+    Each order is a SkipList of (value, symbol) keys, so moving a symbol
+    when its score changes, top-K and value-range queries are all
+    O(log n) plus the size of the answer. Symbols without a quote are
+    ranked by risk only. Safe to share between threads.
+    """
+
+    def __init__(self, seed=0):
+        self._orders = {order: SkipList(seed=seed) for order in ORDERS}
+        self._items = {}
+        self.version = 0
+        self.moves = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, symbol):
+        return symbol in self._items
+
+    def get(self, symbol):
+        with self._lock:
+            return self._items.get(symbol)
+
+    def _update(self, symbol, risk, change):
+        item = self._items.get(symbol)
+        if item is None:
+            item = self._items[symbol] = {'symbol': symbol, 'risk': None, 'change': math.nan}
+        moved = False
+        for by, value in (('risk', risk), ('change', change)):
+            current = item[by]
+            if current == value or (current != current and value != value):
+                continue
+            # NaN (no quote) keeps a symbol out of that order
+            if current is not None and current == current:
+                self._orders[by].remove((current, symbol))
+            if value == value:
+                self._orders[by].insert((value, symbol))
+            item[by] = value
+            moved = True
+        self.moves += moved
+        return moved
+
+    def update(self, symbol, risk, change=float('nan')):
+        """Add ``symbol`` or move it to its new risk score and daily change (%, NaN if unknown)"""
+        with self._lock:
+            if self._update(symbol, int(risk), float(change)):
+                self.version += 1
+
+    def update_many(self, table):
+        """Fold a DataFrame (index symbol; columns risk, change) in; only changed rows move"""
+        risks = table['risk'].to_numpy(dtype=np.int64).tolist()
+        changes = table['change'].to_numpy(dtype=np.float64).tolist()
+        with self._lock:
+            moved = sum(self._update(symbol, risk, change) for symbol, risk, change in zip(table.index, risks, changes))
+            if moved:
+                self.version += 1
+            return moved
+
+    def remove(self, symbol):
+        with self._lock:
+            item = self._items.pop(symbol)
+            for by in ORDERS:
+                if item[by] == item[by]:
+                    self._orders[by].remove((item[by], symbol))
+            self.version += 1
+
+    def _check(self, by):
+        if by not in self._orders:
+            raise ValueError(f"Unknown watchlist order {by!r}; expected one of {ORDERS}")
+        return self._orders[by]
+
+    def _resolve(self, keys):
+        return [dict(self._items[symbol]) for _, symbol in keys]
+
+    def top(self, k, by='risk'):
+        """The ``k`` highest items by ``by``, highest first"""
+        with self._lock:
+            order = self._check(by)
+            return self._resolve(reversed(order.islice(len(order) - k, len(order))))
+
+    def bottom(self, k, by='risk'):
+        """The ``k`` lowest items by ``by``, lowest first"""
+        with self._lock:
+            return self._resolve(self._check(by).islice(0, k))
+
+    def range(self, low, high, by='risk', limit=None):
+        """Items with low <= value <= high, highest first, at most ``limit`` of them"""
+        with self._lock:
+            order = self._check(by)
+            if limit is None:
+                keys = order.irange((low, ''), (high, _LAST))[::-1]
+            else:
+                # Rank bounds give the top ``limit`` in range without walking the rest of it
+                start = order.bisect_left((low, ''))
+                stop = order.bisect_left((high, _LAST))
+                keys = order.islice(max(start, stop - limit), stop)[::-1]
+            return self._resolve(keys)
+
+    def count(self, low, high, by='risk'):
+        """Number of items with low <= value <= high"""
+        with self._lock:
+            order = self._check(by)
+            return order.bisect_left((high, _LAST)) - order.bisect_left((low, ''))